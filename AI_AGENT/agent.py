@@ -1,17 +1,28 @@
 import google.generativeai as genai
+from google.api_core import exceptions as google_exceptions
+from google.generativeai import caching
 from tools import TOOL_FUNCTIONS
 from conditions import AVAILABLE_CONDITIONS
+from metrics import metrics
+from datetime import timedelta
 import json
+import os
+import threading
+import time
 
-class AutobidAgent:
+MODEL_NAME = 'gemini-2.5-flash'
+GENERATION_CONFIG = {"temperature": 0.4}
+# The system prompt is registered once as cached content; turns then only send the conversation
+PROMPT_CACHE_ENABLED = os.getenv('AGENT_PROMPT_CACHE', 'true').lower() == 'true'
+PROMPT_CACHE_TTL_SECONDS = int(os.getenv('AGENT_PROMPT_CACHE_TTL_SECONDS', '3600'))
+PROMPT_CACHE_REFRESH_MARGIN_SECONDS = 300
+PROMPT_CACHE_RETRY_SECONDS = 600
+
+metrics.declare("agent_turns_total", "counter", "Agent turns by how the system prompt was sent (cached, inline, off)")
     
-    def __init__(self, api_key: str):
-        genai.configure(api_key=api_key)
-        self.model = genai.GenerativeModel('gemini-2.5-flash')
-        
-    def _get_system_prompt(self):
-        conditions_json = json.dumps(AVAILABLE_CONDITIONS, indent=2, ensure_ascii=False)
-        return f"""You are a friendly AI assistant that helps users set up automatic bidding (autobid) for auctions.
+def build_system_prompt():
+    conditions_json = json.dumps(AVAILABLE_CONDITIONS, indent=2, ensure_ascii=False)
+    return f"""You are a friendly AI assistant that helps users set up automatic bidding (autobid) for auctions.
 Your task is to gather the required information from the user through natural conversation.
 
 **CRITICAL LANGUAGE RULE:**
@@ -84,6 +95,83 @@ Always respond with a JSON object:
 }}
 """
 
+SYSTEM_PROMPT = build_system_prompt()
+
+class AutobidAgent:
+    
+    def __init__(self, api_key: str):
+        genai.configure(api_key=api_key)
+        self.system_prompt = SYSTEM_PROMPT
+        # Fallback when caching is off or unavailable; an identical prefix on every turn
+        # still lets Gemini's implicit prefix cache apply
+        self.inline_model = genai.GenerativeModel(MODEL_NAME, system_instruction=self.system_prompt)
+        self._cache = None
+        self._cached_model = None
+        self._cache_expires_at = 0.0
+        self._cache_retry_at = 0.0
+        self._cache_lock = threading.Lock()
+        if PROMPT_CACHE_ENABLED:
+            self._model()
+    
+    def _create_cache(self, now: float):
+        self._cache = caching.CachedContent.create(
+            model=MODEL_NAME,
+            display_name="autobid-agent-system-prompt",
+            system_instruction=self.system_prompt,
+            ttl=timedelta(seconds=PROMPT_CACHE_TTL_SECONDS)
+        )
+        self._cached_model = genai.GenerativeModel.from_cached_content(self._cache)
+        self._cache_expires_at = now + PROMPT_CACHE_TTL_SECONDS
+        print(f"System prompt cached as {self._cache.name} for {PROMPT_CACHE_TTL_SECONDS}s")
+    
+    def _drop_cache(self):
+        with self._cache_lock:
+            self._cache = None
+            self._cached_model = None
+    
+    def _model(self):
+        """Model for the next turn: bound to the cached system prompt when possible, extending it before expiry."""
+        if not PROMPT_CACHE_ENABLED:
+            return self.inline_model, "off"
+        
+        with self._cache_lock:
+            now = time.time()
+            if self._cached_model is not None and now < self._cache_expires_at - PROMPT_CACHE_REFRESH_MARGIN_SECONDS:
+                return self._cached_model, "cached"
+            
+            if self._cached_model is not None:
+                try:
+                    self._cache.update(ttl=timedelta(seconds=PROMPT_CACHE_TTL_SECONDS))
+                    self._cache_expires_at = now + PROMPT_CACHE_TTL_SECONDS
+                    return self._cached_model, "cached"
+                except Exception as e:
+                    print(f"Could not extend the cached system prompt, creating a new one: {e}")
+                    self._cache = None
+                    self._cached_model = None
+            
+            if now >= self._cache_retry_at:
+                try:
+                    self._create_cache(now)
+                    return self._cached_model, "cached"
+                except Exception as e:
+                    # e.g. caching not available for the key or the prompt is below the minimum cacheable size
+                    print(f"Prompt caching unavailable, sending the system prompt with each turn: {e}")
+                    self._cache_retry_at = now + PROMPT_CACHE_RETRY_SECONDS
+        
+        return self.inline_model, "inline"
+    
+    def _record_turn(self, response, prompt_mode: str, seconds: float):
+        """Per-turn token and latency accounting; cached tokens are the part of the input billed at the cache rate."""
+        metrics.record_llm_usage(MODEL_NAME, "agent_turn", response)
+        metrics.inc("agent_turns_total", prompt=prompt_mode)
+        
+        usage = getattr(response, "usage_metadata", None)
+        input_tokens = getattr(usage, "prompt_token_count", 0) or 0
+        cached_tokens = getattr(usage, "cached_content_token_count", 0) or 0
+        output_tokens = getattr(usage, "candidates_token_count", 0) or 0
+        print(f"Agent turn: {input_tokens} input tokens ({cached_tokens} cached, {input_tokens - cached_tokens} uncached), "
+              f"{output_tokens} output tokens, {seconds:.2f}s, system prompt {prompt_mode}")
+    
     def process_message(self, messages: list) -> dict:
         conversation_text = ""
         for msg in messages:
@@ -94,17 +182,26 @@ Always respond with a JSON object:
             else:
                 conversation_text += f"Assistant: {content}\n"
         
-        prompt = f"""{self._get_system_prompt()}
-
-**CONVERSATION SO FAR:**
+        # The system prompt is not part of the turn: it is in the cached content or the model's system instruction
+        prompt = f"""**CONVERSATION SO FAR:**
 {conversation_text}
 
 Now respond to the user. Return valid JSON only!"""
 
-        response = self.model.generate_content(
-            prompt,
-            generation_config={"temperature": 0.4}
-        )
+        model, prompt_mode = self._model()
+        started = time.perf_counter()
+        with metrics.time_stage("gemini_generate"):
+            try:
+                response = model.generate_content(prompt, generation_config=GENERATION_CONFIG)
+            except (google_exceptions.NotFound, google_exceptions.PermissionDenied) as e:
+                if prompt_mode != "cached":
+                    raise
+                # The cached content expired or was deleted on the server side
+                print(f"Cached system prompt unusable, retrying with the inline one: {e}")
+                self._drop_cache()
+                model, prompt_mode = self.inline_model, "inline"
+                response = model.generate_content(prompt, generation_config=GENERATION_CONFIG)
+        self._record_turn(response, prompt_mode, time.perf_counter() - started)
         
         response_text = response.text.strip()
         
@@ -7,11 +7,13 @@ import json
 from agent import AutobidAgent
 from tools import TOOL_FUNCTIONS
 from conditions import AVAILABLE_CONDITIONS
+from metrics import metrics
 
 load_dotenv()
 
 app = Flask(__name__)
 CORS(app)
+metrics.instrument_app(app)
 
 api_key = os.getenv('GEMINI_API_KEY')
 agent = AutobidAgent(api_key=api_key)
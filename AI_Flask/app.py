@@ -4,13 +4,16 @@ import tempfile
 from werkzeug.utils import secure_filename
 import google.generativeai as genai
 from dotenv import load_dotenv
+from metrics import metrics
 
 load_dotenv()
 app = Flask(__name__)
+metrics.instrument_app(app)
 
 # Gemini set-up (using gemini-2.5-flash now, might change later)
 genai.configure(api_key=os.getenv("GOOGLE_API_KEY"))
-model = genai.GenerativeModel('gemini-2.5-flash')
+MODEL_NAME = 'gemini-2.5-flash'
+model = genai.GenerativeModel(MODEL_NAME)
 
 ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif'}
 ALLOWED_ORIGINS = ["http://localhost:8081"]
@@ -36,12 +39,13 @@ def generate_description():
 
     try:
         image_parts = []
-        for file in files:
-            if file and checking_file(file.filename):
-                image_parts.append({
-                    "mime_type": file.mimetype,
-                    "data": file.read()
-                })
+        with metrics.time_stage("image_read"):
+            for file in files:
+                if file and checking_file(file.filename):
+                    image_parts.append({
+                        "mime_type": file.mimetype,
+                        "data": file.read()
+                    })
 
         if not image_parts:
             return jsonify({"error": "Invalid pictures!"}), 400
@@ -119,7 +123,9 @@ def generate_description():
         Return the raw JSON object directly.
         """
 
-        response = model.generate_content([prompt, *image_parts])
+        with metrics.time_stage("gemini_generate"):
+            response = model.generate_content([prompt, *image_parts])
+        metrics.record_llm_usage(MODEL_NAME, "generate_description", response)
 
         if response.text.strip().lower().startswith('no'):
             return jsonify({"description": "The amount of photos and angles are insufficient, please provide more."}), 200
@@ -0,0 +1,168 @@
+"""
+Metrics - Közös Prometheus metrikák a Python szolgáltatásokhoz
+Every service keeps an identical copy of this file, because each Docker image
+is built from its own directory only. instrument_app() adds per-route latency
+histograms, in-flight gauges and error counters plus a /metrics endpoint in
+the Prometheus text format. time_stage() times internal steps (LLM call,
+embedding, vector search, ...) and record_llm_usage() counts LLM tokens.
+Values are per process.
+"""
+
+from contextlib import contextmanager
+import threading
+import time
+from typing import Dict, Tuple
+
+from flask import Flask, Response, g, request
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+
+def _format_labels(labels: LabelKey, extra: str = "") -> str:
+    parts = [f'{name}="{_escape(value)}"' for name, value in labels]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _format_value(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+class Metrics:
+    """Thread-safe registry of counters, gauges and histograms."""
+    
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        self._lock = threading.Lock()
+        self._types: Dict[str, Tuple[str, str]] = {}
+        self._values: Dict[str, Dict[LabelKey, object]] = {}
+        
+        self.declare("http_request_duration_seconds", "histogram", "Request latency by route, method and status")
+        self.declare("http_requests_in_flight", "gauge", "Requests currently being handled")
+        self.declare("http_request_errors_total", "counter", "Requests that raised or returned a 5xx status")
+        self.declare("stage_duration_seconds", "histogram", "Latency of internal request stages")
+        self.declare("stage_in_flight", "gauge", "Stage calls currently running")
+        self.declare("stage_errors_total", "counter", "Stage calls that raised an exception")
+        self.declare("llm_requests_total", "counter", "LLM calls by model and operation")
+        self.declare("llm_tokens_total", "counter", "LLM tokens by model, operation and kind (prompt, completion, cached)")
+    
+    def declare(self, name: str, metric_type: str, help_text: str):
+        with self._lock:
+            self._types.setdefault(name, (metric_type, help_text))
+            self._values.setdefault(name, {})
+    
+    @staticmethod
+    def _key(labels: dict) -> LabelKey:
+        return tuple(sorted((name, str(value)) for name, value in labels.items()))
+    
+    def inc(self, name: str, value: float = 1.0, **labels):
+        key = self._key(labels)
+        with self._lock:
+            series = self._values[name]
+            series[key] = series.get(key, 0.0) + value
+    
+    def gauge_add(self, name: str, delta: float, **labels):
+        self.inc(name, delta, **labels)
+    
+    def observe(self, name: str, seconds: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            series = self._values[name]
+            histogram = series.get(key)
+            if histogram is None:
+                histogram = series[key] = [[0] * len(self.buckets), 0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if seconds <= bound:
+                    histogram[0][i] += 1
+            histogram[1] += seconds
+            histogram[2] += 1
+    
+    @contextmanager
+    def time_stage(self, stage: str):
+        """Time one internal step of a request; exceptions are counted and re-raised."""
+        self.gauge_add("stage_in_flight", 1, stage=stage)
+        start = time.perf_counter()
+        try:
+            yield
+        except Exception:
+            self.inc("stage_errors_total", stage=stage)
+            raise
+        finally:
+            self.observe("stage_duration_seconds", time.perf_counter() - start, stage=stage)
+            self.gauge_add("stage_in_flight", -1, stage=stage)
+    
+    def record_llm_usage(self, model: str, operation: str, response):
+        """Count one LLM call and the tokens from its usage_metadata, when the response has it."""
+        self.inc("llm_requests_total", model=model, operation=operation)
+        usage = getattr(response, "usage_metadata", None)
+        if usage is None:
+            return
+        for kind, attribute in (("prompt", "prompt_token_count"), ("completion", "candidates_token_count"),
+                                ("cached", "cached_content_token_count")):
+            count = getattr(usage, attribute, None)
+            if count:
+                self.inc("llm_tokens_total", count, model=model, operation=operation, kind=kind)
+    
+    def render(self) -> str:
+        lines = []
+        with self._lock:
+            for name, (metric_type, help_text) in self._types.items():
+                lines.append(f"# HELP {name} {help_text}")
+                lines.append(f"# TYPE {name} {metric_type}")
+                for labels, value in self._values[name].items():
+                    if metric_type != "histogram":
+                        lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+                        continue
+                    bucket_counts, total, count = value
+                    for bound, bucket_count in zip(self.buckets, bucket_counts):
+                        le = 'le="%s"' % bound
+                        lines.append(f"{name}_bucket{_format_labels(labels, le)} {bucket_count}")
+                    le = 'le="+Inf"'
+                    lines.append(f"{name}_bucket{_format_labels(labels, le)} {count}")
+                    lines.append(f"{name}_sum{_format_labels(labels)} {_format_value(total)}")
+                    lines.append(f"{name}_count{_format_labels(labels)} {count}")
+        return "\n".join(lines) + "\n"
+    
+    def instrument_app(self, app: Flask, path: str = "/metrics"):
+        """Time every request of the app and serve the registry on `path`."""
+        
+        @app.before_request
+        def _start_request_timer():
+            g.metrics_start = time.perf_counter()
+            g.metrics_status = 500
+            self.gauge_add("http_requests_in_flight", 1)
+        
+        @app.after_request
+        def _record_status(response):
+            g.metrics_status = response.status_code
+            return response
+        
+        @app.teardown_request
+        def _observe_request(exception):
+            start = g.pop("metrics_start", None)
+            if start is None:
+                return
+            # The rule, not the raw path, so ids in URLs do not create new series
+            route = request.url_rule.rule if request.url_rule is not None else "unmatched"
+            status = 500 if exception is not None else g.pop("metrics_status", 500)
+            self.observe("http_request_duration_seconds", time.perf_counter() - start,
+                         route=route, method=request.method, status=status)
+            self.gauge_add("http_requests_in_flight", -1)
+            if status >= 500:
+                self.inc("http_request_errors_total", route=route, method=request.method)
+        
+        def metrics_endpoint():
+            return Response(self.render(), content_type=CONTENT_TYPE)
+        
+        app.add_url_rule(path, "metrics", metrics_endpoint, methods=["GET"])
+
+
+metrics = Metrics()
@@ -0,0 +1,278 @@
+"""
+Async serving benchmark - Flask/szálak és ASGI/eseményhurok összehasonlítása
+Preloads the local vector store with synthetic vectors and starts a stub
+embedding service that answers after a fixed delay. It then runs the search
+service in a child process in two modes, one after the other:
+- flask: Flask on werkzeug's threaded server, one thread per connection
+- asgi: search_service_asgi on hypercorn, one event loop
+At each concurrency level it keeps that many /search requests in flight. It
+reports throughput, p50/p99 latency and the server's peak thread count.
+The result cache is off. With --keyword-mode exact or fusion (the default is
+exact) half of the queries are stored keywords, so the keyword index paths run
+too; the rest embed and search. Exits with status 1 if any request failed.
+
+Usage: python benchmark_async.py --concurrency 50 200 500 --embed-latency-ms 20 --vectors 20000 --output async.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import zlib
+
+import numpy as np
+
+CATEGORIES = ["electronics", "vehicles", "fashion", "home", "sport", "collectibles"]
+WORDS = ["vintage", "iphone", "bicikli", "rolex", "laptop", "gaming", "antik", "szekrény", "samsung", "galaxy",
+         "beetle", "volkswagen", "canon", "camera", "lego", "bmx", "gitár", "fender", "porcelán", "herend"]
+SERVICE_ENV = {
+    "VECTOR_STORE_BACKEND": "local",
+    "SEARCH_CACHE_MAX_ENTRIES": "0"
+}
+
+
+def serve_embedder(port: int, dim: int, latency_seconds: float):
+    """Stub embedding service: deterministic float32 vectors after a fixed, non-blocking delay."""
+    from hypercorn.asyncio import serve
+    from hypercorn.config import Config
+    from quart import Quart, Response, request
+    
+    stub = Quart("embedding_stub")
+    
+    def vector(text):
+        return np.random.default_rng(zlib.crc32(text.encode("utf-8"))).standard_normal(dim).astype('<f4')
+    
+    @stub.route("/embed", methods=["POST"])
+    async def embed():
+        data = await request.get_json()
+        await asyncio.sleep(latency_seconds)
+        return Response(vector(data["text"]).tobytes(), content_type="application/octet-stream")
+    
+    @stub.route("/embed_batch", methods=["POST"])
+    async def embed_batch():
+        data = await request.get_json()
+        await asyncio.sleep(latency_seconds)
+        return Response(np.stack([vector(text) for text in data["texts"]]).tobytes(),
+                        content_type="application/octet-stream")
+    
+    config = Config()
+    config.bind = [f"127.0.0.1:{port}"]
+    config.backlog = 4096
+    asyncio.run(serve(stub, config))
+
+
+def serve_search(mode: str, port: int, embedder_url: str):
+    import search_service_flask as service
+    
+    # The service URL is a module constant; point both clients at the stub
+    service.EMBEDDING_SERVICE_URL = embedder_url
+    service.embedding_client.base_url = embedder_url
+    
+    if mode == "flask":
+        from werkzeug.serving import make_server
+        
+        service.ensure_collection_exists()
+        service.start_background_workers()
+        make_server("127.0.0.1", port, service.app, threaded=True).serve_forever()
+    else:
+        from hypercorn.asyncio import serve
+        from hypercorn.config import Config
+        
+        import search_service_asgi
+        
+        config = Config()
+        config.bind = [f"127.0.0.1:{port}"]
+        # hypercorn's default of 100 would drop connection bursts before they reach the loop
+        config.backlog = 4096
+        asyncio.run(serve(search_service_asgi.app, config))
+
+
+def preload(directory: str, num_vectors: int, dim: int):
+    from vector_store import LocalVectorStore
+    
+    rng = np.random.default_rng(0)
+    store = LocalVectorStore(directory, dim)
+    for start in range(0, num_vectors, 1000):
+        count = min(1000, num_vectors - start)
+        vectors = rng.standard_normal((count, dim)).astype(np.float32)
+        store.upsert([(start + i + 1, vectors[i], {"title": f"product {start + i + 1}",
+                                                   "category": CATEGORIES[(start + i) % len(CATEGORIES)],
+                                                   "keywords": [WORDS[(start + i) % len(WORDS)]]})
+                      for i in range(count)])
+
+
+def start_child(args, env):
+    return subprocess.Popen([sys.executable, os.path.abspath(__file__), *args], env=env,
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+
+def wait_until_up(url: str, timeout: float = 60, ready=lambda response: response.status_code < 500):
+    import requests
+    
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if ready(requests.get(url, timeout=1)):
+                return
+        except requests.exceptions.RequestException:
+            pass
+        time.sleep(0.2)
+    raise TimeoutError(f"{url} did not come up within {timeout}s")
+
+
+class ThreadSampler:
+    """Samples the thread count of a process from /proc while load runs (Linux only)."""
+    
+    def __init__(self, pid: int):
+        self.path = f"/proc/{pid}/status"
+        self.peak = None
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+    
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                with open(self.path) as f:
+                    for line in f:
+                        if line.startswith("Threads:"):
+                            self.peak = max(self.peak or 0, int(line.split()[1]))
+            except OSError:
+                return
+            self._stop.wait(0.05)
+    
+    def __enter__(self):
+        self._thread.start()
+        return self
+    
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+
+
+async def run_load(base_url: str, bodies, concurrency: int):
+    """Keep `concurrency` requests in flight until every body was sent; returns latencies, errors and wall time."""
+    import aiohttp
+    
+    queue = iter(bodies)
+    latencies, errors = [], 0
+    
+    async def worker(session):
+        nonlocal errors
+        for body in queue:
+            start = time.perf_counter()
+            try:
+                async with session.post(f"{base_url}/search", json=body) as response:
+                    await response.read()
+                    ok = response.status < 400
+            except (aiohttp.ClientError, asyncio.TimeoutError):
+                ok = False
+            if ok:
+                latencies.append(time.perf_counter() - start)
+            else:
+                errors += 1
+    
+    # aiohttp rather than httpx: httpx's pool bookkeeping would make the client the bottleneck
+    connector = aiohttp.TCPConnector(limit=concurrency)
+    async with aiohttp.ClientSession(connector=connector, timeout=aiohttp.ClientTimeout(total=120)) as session:
+        started = time.perf_counter()
+        await asyncio.gather(*(worker(session) for _ in range(concurrency)))
+        wall_seconds = time.perf_counter() - started
+    return latencies, errors, wall_seconds
+
+
+def summarize(latencies, errors, wall_seconds, peak_threads):
+    values = sorted(latencies)
+    
+    def percentile(fraction):
+        return values[min(len(values) - 1, int(len(values) * fraction))] * 1000 if values else None
+    
+    return {
+        "count": len(values),
+        "errors": errors,
+        "throughput_rps": len(values) / wall_seconds if wall_seconds else None,
+        "p50_ms": percentile(0.50),
+        "p99_ms": percentile(0.99),
+        "peak_threads": peak_threads
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--modes", nargs="+", choices=["flask", "asgi"], default=["flask", "asgi"])
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[10, 50, 200, 500])
+    parser.add_argument("--requests-per-client", type=int, default=20)
+    parser.add_argument("--embed-latency-ms", type=float, default=20)
+    parser.add_argument("--keyword-mode", choices=["off", "exact", "fusion"], default="exact")
+    parser.add_argument("--vectors", type=int, default=20000)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--port", type=int, default=18001)
+    parser.add_argument("--embedder-port", type=int, default=18002)
+    parser.add_argument("--output", help="Also write the results as JSON")
+    parser.add_argument("--serve", choices=["embedder", "flask", "asgi"], help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    
+    embedder_url = f"http://127.0.0.1:{args.embedder_port}"
+    if args.serve == "embedder":
+        return serve_embedder(args.embedder_port, args.dim, args.embed_latency_ms / 1000)
+    if args.serve:
+        return serve_search(args.serve, args.port, embedder_url)
+    
+    data_dir = tempfile.mkdtemp(prefix="async_benchmark_")
+    env = {**os.environ, **SERVICE_ENV, "KEYWORD_SEARCH_MODE": args.keyword_mode, "SEARCH_DATA_DIR": data_dir}
+    print(f"Loading {args.vectors} vectors...", file=sys.stderr)
+    preload(os.path.join(data_dir, "local_index", "auction_products"), args.vectors, args.dim)
+    
+    children = [start_child(["--serve", "embedder", "--embedder-port", str(args.embedder_port),
+                             "--dim", str(args.dim), "--embed-latency-ms", str(args.embed_latency_ms)], env)]
+    rows = []
+    try:
+        wait_until_up(f"{embedder_url}/")
+        for mode in args.modes:
+            server = start_child(["--serve", mode, "--port", str(args.port), "--embedder-port", str(args.embedder_port)], env)
+            children.append(server)
+            base_url = f"http://127.0.0.1:{args.port}"
+            wait_until_up(f"{base_url}/store/stats")
+            if args.keyword_mode != "off":
+                wait_until_up(f"{base_url}/keywords/index/stats", ready=lambda response: response.json().get("ready"))
+            
+            for concurrency in args.concurrency:
+                # Odd requests are exact keywords, answered (or fused) by the keyword index
+                bodies = [{"query": WORDS[i % len(WORDS)] if i % 2 else f"{WORDS[i % len(WORDS)]} {i}", "limit": 10}
+                          for i in range(concurrency * args.requests_per_client)]
+                print(f"{mode}: {len(bodies)} searches, {concurrency} in flight...", file=sys.stderr)
+                with ThreadSampler(server.pid) as sampler:
+                    latencies, errors, wall_seconds = asyncio.run(run_load(base_url, bodies, concurrency))
+                rows.append({"mode": mode, "concurrency": concurrency,
+                             **summarize(latencies, errors, wall_seconds, sampler.peak)})
+            
+            server.terminate()
+            server.wait()
+    finally:
+        for child in children:
+            child.terminate()
+            child.wait()
+        shutil.rmtree(data_dir, ignore_errors=True)
+    
+    print(f"\n{args.vectors} vectors, embedding latency {args.embed_latency_ms} ms, keyword mode {args.keyword_mode}")
+    print(f"{'mode':<7}{'in flight':>10}{'req/s':>9}{'p50 ms':>9}{'p99 ms':>9}{'threads':>9}{'errors':>8}")
+    for row in rows:
+        print(f"{row['mode']:<7}{row['concurrency']:>10}{row['throughput_rps'] or 0:>9.1f}{row['p50_ms'] or 0:>9.1f}"
+              f"{row['p99_ms'] or 0:>9.1f}{row['peak_threads'] or 0:>9}{row['errors']:>8}")
+    
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"timestamp": time.time(), "config": vars(args), "results": rows}, f, indent=2)
+
+    if any(row["errors"] for row in rows):
+        print("Some requests failed, see the errors column", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
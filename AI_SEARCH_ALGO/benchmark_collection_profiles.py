@@ -0,0 +1,147 @@
+"""
+Collection profile benchmark - Recall, késleltetés és memória profilonként
+Loads the same synthetic clustered corpus into one temporary collection per
+profile on a running Qdrant, waits for indexing, then runs the same queries with
+and without a category filter. Recall@k is measured against exact NumPy
+search. Memory is the resident vector and graph footprint estimated from the
+profile, because Qdrant does not report RAM per collection.
+
+Usage: python benchmark_collection_profiles.py --vectors 50000 --profiles default indexed quantized on_disk
+"""
+
+import argparse
+import time
+
+import numpy as np
+from qdrant_client import QdrantClient
+from qdrant_client.http import models
+
+from collection_profiles import PROFILES, create_collection, get_profile, search_params
+
+CATEGORIES = ["electronics", "vehicles", "fashion", "home", "sport", "collectibles"]
+
+
+def synthetic_corpus(num_vectors, dim, num_queries, seed=0):
+    rng = np.random.default_rng(seed)
+    # Clustered like real embeddings, so the ANN graph has realistic structure
+    centers = rng.standard_normal((256, dim)).astype(np.float32)
+    assignment = rng.integers(0, len(centers), num_vectors)
+    vectors = centers[assignment] + 0.6 * rng.standard_normal((num_vectors, dim)).astype(np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    categories = rng.integers(0, len(CATEGORIES), num_vectors)
+    
+    queries = centers[rng.integers(0, len(centers), num_queries)] + 0.6 * rng.standard_normal((num_queries, dim)).astype(np.float32)
+    queries /= np.linalg.norm(queries, axis=1, keepdims=True)
+    return vectors, categories, queries
+
+
+def exact_top_k(vectors, queries, k, mask=None):
+    scores = queries @ vectors.T
+    if mask is not None:
+        scores[:, ~mask] = -np.inf
+    return [set(row) for row in np.argsort(-scores, axis=1)[:, :k]]
+
+
+def estimated_memory_mb(profile, num_vectors, dim):
+    vectors = 0 if profile["on_disk"] else num_vectors * dim * 4
+    quantized = num_vectors * dim if profile["quantization"] else 0
+    # Layer 0 holds 2*m links per point, 4 bytes each
+    graph = num_vectors * profile["hnsw_m"] * 2 * 4
+    return (vectors + quantized + graph) / (1024 * 1024)
+
+
+def wait_until_indexed(client, name, timeout=600):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        info = client.get_collection(name)
+        if info.status == models.CollectionStatus.GREEN:
+            return
+        time.sleep(1)
+    raise TimeoutError(f"Collection {name} still indexing after {timeout}s")
+
+
+def run_queries(client, name, profile, queries, k, category=None):
+    query_filter = None
+    if category is not None:
+        query_filter = models.Filter(must=[
+            models.FieldCondition(key="category", match=models.MatchValue(value=category))
+        ])
+    
+    latencies, results = [], []
+    for query in queries:
+        start = time.perf_counter()
+        hits = client.query_points(
+            collection_name=name,
+            query=query.tolist(),
+            limit=k,
+            query_filter=query_filter,
+            search_params=search_params(profile),
+            with_payload=False
+        ).points
+        latencies.append(time.perf_counter() - start)
+        results.append({hit.id for hit in hits})
+    latencies.sort()
+    return results, latencies[len(latencies) // 2] * 1000, latencies[int(len(latencies) * 0.99)] * 1000
+
+
+def recall(results, truth):
+    return float(np.mean([len(found & expected) / len(expected) for found, expected in zip(results, truth)]))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="localhost")
+    parser.add_argument("--port", type=int, default=6333)
+    parser.add_argument("--vectors", type=int, default=50000)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--hnsw-m", type=int, default=16)
+    parser.add_argument("--hnsw-ef-construct", type=int, default=100)
+    parser.add_argument("--profiles", nargs="+", default=list(PROFILES), choices=list(PROFILES))
+    parser.add_argument("--keep", action="store_true", help="Keep the benchmark collections afterwards")
+    args = parser.parse_args()
+    
+    client = QdrantClient(host=args.host, port=args.port, timeout=120)
+    vectors, categories, queries = synthetic_corpus(args.vectors, args.dim, args.queries)
+    filter_category = 0
+    truth = exact_top_k(vectors, queries, args.k)
+    filtered_truth = exact_top_k(vectors, queries, args.k, categories == filter_category)
+    
+    rows = []
+    for name in args.profiles:
+        profile = get_profile(name, args.hnsw_m, args.hnsw_ef_construct)
+        collection = f"benchmark_profile_{name}"
+        if client.collection_exists(collection):
+            client.delete_collection(collection)
+        create_collection(client, collection, args.dim, profile)
+        
+        start = time.perf_counter()
+        for offset in range(0, args.vectors, 1000):
+            end = min(offset + 1000, args.vectors)
+            client.upsert(collection_name=collection, points=models.Batch(
+                ids=list(range(offset, end)),
+                vectors=vectors[offset:end].tolist(),
+                payloads=[{"category": CATEGORIES[c]} for c in categories[offset:end]]
+            ))
+        wait_until_indexed(client, collection)
+        load_seconds = time.perf_counter() - start
+        
+        results, p50, p99 = run_queries(client, collection, profile, queries, args.k)
+        filtered, filtered_p50, _ = run_queries(client, collection, profile, queries, args.k, CATEGORIES[filter_category])
+        rows.append((name, recall(results, truth), p50, p99, recall(filtered, filtered_truth), filtered_p50,
+                     estimated_memory_mb(profile, args.vectors, args.dim), load_seconds))
+        
+        if not args.keep:
+            client.delete_collection(collection)
+    
+    print(f"\n{args.vectors} vectors, dim {args.dim}, {args.queries} queries, k={args.k}")
+    print(f"{'profile':<12}{'recall@k':>10}{'p50 ms':>9}{'p99 ms':>9}"
+          f"{'filt recall':>13}{'filt p50':>10}{'RAM MB*':>10}{'load s':>9}")
+    for name, rec, p50, p99, filt_rec, filt_p50, memory, load in rows:
+        print(f"{name:<12}{rec:>10.3f}{p50:>9.2f}{p99:>9.2f}{filt_rec:>13.3f}{filt_p50:>10.2f}{memory:>10.1f}{load:>9.1f}")
+    print("* estimated resident vectors + quantized copy + HNSW links")
+
+
+if __name__ == "__main__":
+    main()
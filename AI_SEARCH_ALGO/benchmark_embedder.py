@@ -0,0 +1,63 @@
+"""
+Embedder benchmark - Távoli (HTTP) és helyi embedder késleltetése
+Measures per-query latency of the remote and the local embedder on short
+search queries and on longer enriched product texts. The remote embedder
+needs the embedding service running on --service-url.
+
+Usage: python benchmark_embedder.py --backends remote local --repeats 50
+"""
+
+import argparse
+import time
+
+from embedder import create_embedder
+
+QUERIES = ["iphone", "bicikli", "rolex", "gaming laptop", "antik szekrény"]
+PRODUCT_TEXTS = [
+    "Vintage Volkswagen Beetle 1970 Classic grey beetle in running condition with original interior "
+    "volkswagen beetle car vehicle vintage classic 1970 german bug retro grey",
+    "Samsung Galaxy S21 Ultra 256GB Phantom Black, lightly used, with box and charger "
+    "samsung galaxy s21 ultra smartphone phone mobile android 256gb black used",
+]
+
+
+def measure(call, texts, repeats):
+    latencies = []
+    for _ in range(repeats):
+        for text in texts:
+            start = time.perf_counter()
+            call(text)
+            latencies.append(time.perf_counter() - start)
+    latencies.sort()
+    return {
+        "mean_ms": sum(latencies) / len(latencies) * 1000,
+        "p50_ms": latencies[len(latencies) // 2] * 1000,
+        "p99_ms": latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--backends", nargs="+", default=["remote", "local"], choices=["remote", "local"])
+    parser.add_argument("--service-url", default="http://localhost:5001")
+    parser.add_argument("--repeats", type=int, default=50)
+    args = parser.parse_args()
+    
+    print(f"{'backend':<8} {'workload':<14} {'mean ms':>9} {'p50 ms':>9} {'p99 ms':>9}")
+    for backend in args.backends:
+        embedder = create_embedder(backend, args.service_url)
+        # First call pays connection setup or lazy model init; keep it out of the numbers
+        embedder.embed("warmup")
+        
+        workloads = {
+            "query": (embedder.embed, QUERIES),
+            "product text": (embedder.embed, PRODUCT_TEXTS),
+            "batch of 16": (lambda _: embedder.embed_batch(QUERIES * 3 + [QUERIES[0]]), ["batch"]),
+        }
+        for name, (call, texts) in workloads.items():
+            stats = measure(call, texts, args.repeats)
+            print(f"{backend:<8} {name:<14} {stats['mean_ms']:>9.2f} {stats['p50_ms']:>9.2f} {stats['p99_ms']:>9.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""
+Keyword index benchmark - Kulcsszó gyorsút és vektoros keresés késleltetése
+Builds a synthetic keyword index and times exact and ranked keyword lookups. It then times
+the vector path the lookup replaces: embedding the query and, if Qdrant is
+reachable, one ANN search on the real collection. The difference is the latency
+saved per exact-keyword query.
+
+Usage: python benchmark_keyword_index.py --products 100000 --embedder remote --qdrant-host localhost
+"""
+
+import argparse
+import random
+import time
+
+from keyword_index import KeywordIndex
+
+VOCABULARY_SIZE = 20000
+KEYWORDS_PER_PRODUCT = 12
+CATEGORIES = ["electronics", "vehicles", "fashion", "home", "sport", "collectibles"]
+
+
+def percentiles(latencies):
+    latencies = sorted(latencies)
+    return {
+        "p50_ms": latencies[len(latencies) // 2] * 1000,
+        "p99_ms": latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] * 1000,
+    }
+
+
+def measure(call, queries):
+    latencies = []
+    for query in queries:
+        start = time.perf_counter()
+        call(query)
+        latencies.append(time.perf_counter() - start)
+    return percentiles(latencies)
+
+
+def build_index(num_products, rng):
+    vocabulary = [f"keyword{i}" for i in range(VOCABULARY_SIZE)]
+    index = KeywordIndex()
+    
+    def pages():
+        page = []
+        for product_id in range(num_products):
+            # Zipf-like skew: a few keywords are very common, like real product keywords
+            keywords = {vocabulary[min(int(rng.paretovariate(0.5)) - 1, VOCABULARY_SIZE - 1)]
+                        for _ in range(KEYWORDS_PER_PRODUCT)}
+            page.append((product_id, keywords, rng.choice(CATEGORIES)))
+            if len(page) == 1000:
+                yield page
+                page = []
+        yield page
+    
+    index.rebuild(pages)
+    return index, vocabulary
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--products", type=int, default=100000)
+    parser.add_argument("--queries", type=int, default=2000)
+    parser.add_argument("--limit", type=int, default=100)
+    parser.add_argument("--embedder", choices=["none", "remote", "local"], default="none")
+    parser.add_argument("--service-url", default="http://localhost:5001")
+    parser.add_argument("--qdrant-host", help="Also time an ANN search against the live collection")
+    parser.add_argument("--qdrant-port", type=int, default=6333)
+    parser.add_argument("--collection", default="auction_products")
+    args = parser.parse_args()
+    
+    rng = random.Random(42)
+    start = time.perf_counter()
+    index, vocabulary = build_index(args.products, rng)
+    build_seconds = time.perf_counter() - start
+    stats = index.stats()
+    print(f"Index: {stats['products']} products, {stats['terms']} terms, "
+          f"{stats['postings']} postings, built in {build_seconds:.2f}s")
+    
+    queries = [rng.choice(vocabulary[:200]) for _ in range(args.queries)]
+    rows = [
+        ("keyword lookup", measure(lambda q: index.lookup(q, limit=args.limit), queries)),
+        ("keyword lookup + category", measure(lambda q: index.lookup(q, "electronics", args.limit), queries)),
+        ("ranked keyword lookup", measure(lambda q: index.ranked_lookup(q, limit=args.limit), queries)),
+    ]
+    
+    vector_queries = queries[:min(len(queries), 200)]
+    embedding = None
+    if args.embedder != "none":
+        from embedder import create_embedder
+        
+        embedder = create_embedder(args.embedder, args.service_url)
+        embedding = embedder.embed(vector_queries[0])
+        rows.append((f"embed ({args.embedder})", measure(embedder.embed, vector_queries)))
+    
+    if args.qdrant_host:
+        import numpy as np
+        from qdrant_client import QdrantClient
+        
+        client = QdrantClient(host=args.qdrant_host, port=args.qdrant_port)
+        vector = embedding if embedding is not None else np.random.default_rng(0).standard_normal(384).astype(np.float32)
+        rows.append(("qdrant search", measure(
+            lambda _: client.query_points(collection_name=args.collection, query=vector.tolist(),
+                                          limit=args.limit, with_payload=False),
+            vector_queries
+        )))
+    
+    print(f"\n{'path':<28}{'p50 ms':>10}{'p99 ms':>10}")
+    for name, result in rows:
+        print(f"{name:<28}{result['p50_ms']:>10.3f}{result['p99_ms']:>10.3f}")
+    
+    if len(rows) > 2:
+        vector_p50 = sum(result["p50_ms"] for _, result in rows[2:])
+        print(f"\nSaved per exact-keyword query (p50): {vector_p50 - rows[0][1]['p50_ms']:.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,277 @@
+"""
+Service benchmark - Terheléses teszt és szakaszonkénti késleltetés a keresőszolgáltatáshoz
+Runs the real Flask app on a local port with stand-ins for its dependencies:
+- a fake Gemini model that answers both keyword prompts after a set delay
+- a stub embedder that returns deterministic vectors after a set delay
+- the local memory-mapped vector store in a temporary data dir (or a
+  throwaway collection on a running Qdrant with --qdrant-host)
+It drives concurrent load against /index, /index_batch, /search and
+/search_batch and reports throughput and p50/p95/p99 per endpoint. It also
+reports latency per internal stage: keyword extraction, embedding, vector
+upsert and vector search. Results are written as JSON so builds can be compared.
+
+Usage: python benchmark_service.py --concurrency 8 --gemini-latency-ms 400 --embed-latency-ms 15 --output bench.json
+"""
+
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+import hashlib
+import json
+import os
+import platform
+import random
+import re
+import shutil
+import sys
+import tempfile
+import threading
+import time
+
+import numpy as np
+import requests
+
+CATEGORIES = ["electronics", "vehicles", "fashion", "home", "sport", "collectibles"]
+WORDS = ["vintage", "iphone", "bicikli", "rolex", "laptop", "gaming", "antik", "szekrény", "samsung", "galaxy",
+         "beetle", "volkswagen", "canon", "camera", "lego", "bmx", "gitár", "fender", "porcelán", "herend",
+         "nike", "cipő", "bőr", "táska", "kerámia", "váza", "óra", "ezüst", "gyűrű", "könyv"]
+
+
+class FakeResponse:
+    def __init__(self, text: str):
+        self.text = text
+
+
+class FakeGeminiModel:
+    """Answers the single and the batch keyword prompt in the format the service parses."""
+    
+    def __init__(self, latency_seconds: float):
+        self.latency_seconds = latency_seconds
+    
+    def generate_content(self, prompt: str, generation_config=None):
+        time.sleep(self.latency_seconds)
+        if generation_config and generation_config.get("response_mime_type") == "application/json":
+            items = re.findall(r"\[(\d+)\] Title: (.*)", prompt)
+            return FakeResponse(json.dumps({index: self._keywords(title) for index, title in items}))
+        title = re.search(r"Title: (.*)", prompt).group(1)
+        return FakeResponse(self._keywords(title))
+    
+    @staticmethod
+    def _keywords(title: str) -> str:
+        words = title.lower().split()
+        return ", ".join(words + [f"{word}s" for word in words])
+
+
+def make_stub_embedder(embedder_base, dim: int, latency_seconds: float):
+    class StubEmbedder(embedder_base):
+        """Deterministic pseudo-random vectors per text, one delay per call like a remote service."""
+        
+        def _vector(self, text: str) -> np.ndarray:
+            seed = int.from_bytes(hashlib.sha1(text.encode("utf-8")).digest()[:8], "little")
+            return np.random.default_rng(seed).standard_normal(dim).astype(np.float32)
+        
+        def embed(self, text):
+            time.sleep(latency_seconds)
+            return self._vector(text)
+        
+        def embed_batch(self, texts):
+            time.sleep(latency_seconds)
+            return np.stack([self._vector(text) for text in texts])
+    
+    return StubEmbedder()
+
+
+class StageTimer:
+    """Wraps functions and records how long each call took, per stage name."""
+    
+    def __init__(self):
+        self.samples = {}
+        self._lock = threading.Lock()
+    
+    def wrap(self, stage: str, function):
+        def timed(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                elapsed = time.perf_counter() - start
+                with self._lock:
+                    self.samples.setdefault(stage, []).append(elapsed)
+        return timed
+    
+    def reset(self):
+        with self._lock:
+            self.samples = {}
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return None
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * fraction))]
+
+
+def summarize(latencies, wall_seconds=None, errors=0):
+    values = sorted(latencies)
+    summary = {
+        "count": len(values),
+        "errors": errors,
+        "mean_ms": sum(values) / len(values) * 1000 if values else None,
+        "p50_ms": percentile(values, 0.50) * 1000 if values else None,
+        "p95_ms": percentile(values, 0.95) * 1000 if values else None,
+        "p99_ms": percentile(values, 0.99) * 1000 if values else None,
+    }
+    if wall_seconds is not None:
+        summary["throughput_rps"] = len(values) / wall_seconds if wall_seconds else None
+    return summary
+
+
+def generate_products(count, start_id, rng):
+    products = []
+    for product_id in range(start_id, start_id + count):
+        title = " ".join(rng.sample(WORDS, 3))
+        products.append({
+            "product_id": product_id,
+            "title": f"{title} {product_id}",
+            "description": " ".join(rng.choice(WORDS) for _ in range(20)),
+            "category": rng.choice(CATEGORIES)
+        })
+    return products
+
+
+def run_load(base_url, path, bodies, concurrency):
+    """POST every body with `concurrency` threads; returns per-request latencies, errors and wall time."""
+    local = threading.local()
+    
+    def send(body):
+        if not hasattr(local, "session"):
+            local.session = requests.Session()
+        start = time.perf_counter()
+        try:
+            response = local.session.post(f"{base_url}{path}", json=body, timeout=120)
+            ok = response.status_code < 400
+        except requests.exceptions.RequestException:
+            ok = False
+        return time.perf_counter() - start, ok
+    
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(send, bodies))
+    wall_seconds = time.perf_counter() - started
+    
+    latencies = [elapsed for elapsed, ok in results if ok]
+    errors = sum(1 for _, ok in results if not ok)
+    return summarize(latencies, wall_seconds, errors)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--index-requests", type=int, default=200, help="Products sent one by one to /index")
+    parser.add_argument("--batch-requests", type=int, default=20, help="Requests sent to /index_batch")
+    parser.add_argument("--batch-size", type=int, default=50, help="Products per /index_batch request")
+    parser.add_argument("--search-requests", type=int, default=2000)
+    parser.add_argument("--search-batch-requests", type=int, default=200)
+    parser.add_argument("--searches-per-batch", type=int, default=8)
+    parser.add_argument("--gemini-latency-ms", type=float, default=300)
+    parser.add_argument("--embed-latency-ms", type=float, default=10)
+    parser.add_argument("--keyword-mode", choices=["off", "exact", "fusion"], default="off")
+    parser.add_argument("--search-cache", action="store_true", help="Keep the search result cache enabled")
+    parser.add_argument("--qdrant-host", help="Use a throwaway collection on this Qdrant instead of the local store")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="Write the JSON results here instead of stdout")
+    args = parser.parse_args()
+    
+    # The service reads its configuration at import time
+    data_dir = tempfile.mkdtemp(prefix="search_benchmark_")
+    os.environ["SEARCH_DATA_DIR"] = data_dir
+    os.environ["VECTOR_STORE_BACKEND"] = "local"
+    os.environ["KEYWORD_SEARCH_MODE"] = args.keyword_mode
+    if not args.search_cache:
+        os.environ["SEARCH_CACHE_MAX_ENTRIES"] = "0"
+    
+    import search_service_flask as service
+    from collection_profiles import get_profile
+    from embedder import Embedder
+    from vector_store import create_vector_store
+    from werkzeug.serving import make_server
+    
+    if args.qdrant_host:
+        service.vector_store = create_vector_store(
+            "qdrant", host=args.qdrant_host, port=service.QDRANT_PORT, collection_name="benchmark_search_service",
+            vector_size=service.VECTOR_SIZE,
+            profile=get_profile(service.COLLECTION_PROFILE, service.HNSW_M, service.HNSW_EF_CONSTRUCT, service.SEARCH_HNSW_EF)
+        )
+        service.vector_store.drop()
+    
+    service.gemini_model = FakeGeminiModel(args.gemini_latency_ms / 1000)
+    service.embedder = make_stub_embedder(Embedder, service.VECTOR_SIZE, args.embed_latency_ms / 1000)
+    service.ensure_collection_exists()
+    service.start_background_workers()
+    
+    stages = StageTimer()
+    service.extract_keywords_with_gemini = stages.wrap("keyword_extraction", service.extract_keywords_with_gemini)
+    service.extract_keywords_batch_with_gemini = stages.wrap("keyword_extraction_batch", service.extract_keywords_batch_with_gemini)
+    service.get_embedding = stages.wrap("embedding", service.get_embedding)
+    service.get_embeddings = stages.wrap("embedding_batch", service.get_embeddings)
+    store = service.vector_store
+    store.upsert = stages.wrap("vector_upsert", store.upsert)
+    store.search = stages.wrap("vector_search", store.search)
+    store.search_batch = stages.wrap("vector_search_batch", store.search_batch)
+    
+    server = make_server("127.0.0.1", 0, service.app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f"http://127.0.0.1:{server.server_port}"
+    
+    rng = random.Random(args.seed)
+    index_products = generate_products(args.index_requests, 1, rng)
+    batch_products = generate_products(args.batch_requests * args.batch_size, args.index_requests + 1, rng)
+    queries = [" ".join(rng.sample(WORDS, rng.randint(1, 3))) for _ in range(args.search_requests)]
+    
+    phases = [
+        ("/index", index_products),
+        ("/index_batch", [{"products": batch_products[i:i + args.batch_size]}
+                          for i in range(0, len(batch_products), args.batch_size)]),
+        ("/search", [{"query": query, "limit": 20} for query in queries]),
+        ("/search_batch", [{"searches": [{"query": rng.choice(queries), "limit": 20,
+                                          "category_filter": rng.choice(CATEGORIES)}
+                                         for _ in range(args.searches_per_batch)]}
+                           for _ in range(args.search_batch_requests)]),
+    ]
+    
+    endpoints, stage_results = {}, {}
+    try:
+        for path, bodies in phases:
+            if not bodies:
+                continue
+            stages.reset()
+            print(f"Running {len(bodies)} requests against {path}...", file=sys.stderr)
+            endpoints[path] = run_load(base_url, path, bodies, args.concurrency)
+            stage_results[path] = {stage: summarize(samples) for stage, samples in stages.samples.items()}
+    finally:
+        server.shutdown()
+        if args.qdrant_host:
+            service.vector_store.drop()
+        shutil.rmtree(data_dir, ignore_errors=True)
+    
+    results = {
+        "timestamp": time.time(),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "config": {key: value for key, value in vars(args).items() if key != "output"},
+        "endpoints": endpoints,
+        "stages": stage_results
+    }
+    
+    for path, summary in endpoints.items():
+        print(f"{path:<15}{summary['throughput_rps'] or 0:>9.1f} req/s  p50 {summary['p50_ms'] or 0:>8.1f} ms  "
+              f"p95 {summary['p95_ms'] or 0:>8.1f} ms  p99 {summary['p99_ms'] or 0:>8.1f} ms  "
+              f"errors {summary['errors']}", file=sys.stderr)
+    
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+    else:
+        print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
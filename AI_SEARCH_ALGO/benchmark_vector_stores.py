@@ -0,0 +1,113 @@
+"""
+Vector store benchmark - Helyi memmap index és Qdrant összehasonlítása
+Loads identical synthetic vectors into the local memory-mapped store and, when
+--qdrant-host is given, into a temporary Qdrant collection. It then times single
+searches, category-filtered searches and batch searches on both, and reports
+recall@k against exact search. The local store is exact, so its recall is 1.0.
+
+Usage: python benchmark_vector_stores.py --vectors 20000 --qdrant-host localhost
+"""
+
+import argparse
+import shutil
+import tempfile
+import time
+
+import numpy as np
+
+from vector_store import LocalVectorStore, QdrantStore
+
+CATEGORIES = ["electronics", "vehicles", "fashion", "home", "sport", "collectibles"]
+
+
+def synthetic_points(num_vectors, dim, seed=0):
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((128, dim)).astype(np.float32)
+    vectors = centers[rng.integers(0, len(centers), num_vectors)] + 0.6 * rng.standard_normal((num_vectors, dim)).astype(np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    categories = rng.integers(0, len(CATEGORIES), num_vectors)
+    points = [(i + 1, vectors[i], {"title": f"product {i + 1}", "category": CATEGORIES[categories[i]]})
+              for i in range(num_vectors)]
+    queries = vectors[rng.integers(0, num_vectors, 200)] + 0.3 * rng.standard_normal((200, dim)).astype(np.float32)
+    return points, vectors, queries
+
+
+def latency(call, queries):
+    latencies = []
+    for query in queries:
+        start = time.perf_counter()
+        call(query)
+        latencies.append(time.perf_counter() - start)
+    latencies.sort()
+    return latencies[len(latencies) // 2] * 1000, latencies[int(len(latencies) * 0.99)] * 1000
+
+
+def recall(store, vectors, queries, k):
+    truth = np.argsort(-(queries @ vectors.T), axis=1)[:, :k] + 1
+    found = [{hit.id for hit in store.search(query, k)} for query in queries]
+    return float(np.mean([len(f & set(t)) / k for f, t in zip(found, truth)]))
+
+
+def wait_until_indexed(store, timeout=600):
+    from qdrant_client.http import models
+    
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if store.client.get_collection(store.collection_name).status == models.CollectionStatus.GREEN:
+            return
+        time.sleep(1)
+
+
+def benchmark(name, store, points, vectors, queries, k, batch_size):
+    store.ensure_collection()
+    start = time.perf_counter()
+    for offset in range(0, len(points), 1000):
+        store.upsert(points[offset:offset + 1000])
+    if isinstance(store, QdrantStore):
+        wait_until_indexed(store)
+    load_seconds = time.perf_counter() - start
+    
+    single = latency(lambda q: store.search(q, k), queries)
+    filtered = latency(lambda q: store.search(q, k, category="electronics"), queries)
+    batches = [queries[i:i + batch_size] for i in range(0, len(queries), batch_size)]
+    batch = latency(lambda qs: store.search_batch([(q, {"limit": k}) for q in qs]), batches)
+    return (name, load_seconds, single, filtered, batch, recall(store, vectors, queries, k))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--vectors", type=int, default=20000)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--batch-size", type=int, default=8)
+    parser.add_argument("--qdrant-host", help="Also benchmark a temporary collection on this Qdrant")
+    parser.add_argument("--qdrant-port", type=int, default=6333)
+    args = parser.parse_args()
+    
+    points, vectors, queries = synthetic_points(args.vectors, args.dim)
+    rows = []
+    
+    directory = tempfile.mkdtemp(prefix="local_vector_store_")
+    try:
+        rows.append(benchmark("local", LocalVectorStore(directory, args.dim), points, vectors, queries, args.k, args.batch_size))
+    finally:
+        shutil.rmtree(directory)
+    
+    if args.qdrant_host:
+        from collection_profiles import get_profile
+        
+        store = QdrantStore(args.qdrant_host, args.qdrant_port, "benchmark_vector_store", args.dim, get_profile("indexed"))
+        store.drop()
+        try:
+            rows.append(benchmark("qdrant", store, points, vectors, queries, args.k, args.batch_size))
+        finally:
+            store.drop()
+    
+    print(f"\n{args.vectors} vectors, dim {args.dim}, k={args.k}, batch size {args.batch_size}")
+    print(f"{'store':<8}{'load s':>8}{'p50 ms':>9}{'p99 ms':>9}{'filt p50':>10}{'batch p50/q':>13}{'recall@k':>10}")
+    for name, load, single, filtered, batch, rec in rows:
+        print(f"{name:<8}{load:>8.1f}{single[0]:>9.2f}{single[1]:>9.2f}{filtered[0]:>10.2f}{batch[0] / args.batch_size:>13.2f}{rec:>10.3f}")
+
+
+if __name__ == "__main__":
+    main()
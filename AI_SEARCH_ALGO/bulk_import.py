@@ -0,0 +1,203 @@
+"""
+Bulk import - Termékkatalógus tömeges betöltése a keresési indexbe
+Streams products from a JSONL or CSV file, one batch at a time, through the same
+keyword, embedding and upsert pipeline as /index_batch. After every batch the
+byte offset is written to a checkpoint file, so an interrupted run resumes
+where it stopped without re-reading the part already imported.
+
+CSV files need a header row with product_id, title, description and category columns,
+and may have updated_at and ends_at columns with Unix timestamps.
+
+With VECTOR_STORE_BACKEND=local the importer opens the index files itself, so it
+refuses to start while the search service has them open. Stop the service first,
+or send the products to the running service's /index_batch instead.
+
+Usage: python bulk_import.py products.jsonl --batch-size 500 --errors failed.jsonl
+"""
+
+import argparse
+import csv
+import json
+import logging
+import os
+import sys
+import time
+from typing import Optional
+
+import search_service_flask as service
+from vector_store import StoreLockedError
+
+logger = logging.getLogger(__name__)
+
+CHECKPOINT_VERSION = 1
+
+
+def detect_format(path: str) -> str:
+    return "csv" if path.lower().endswith(".csv") else "jsonl"
+
+
+def read_records(path: str, fmt: str, start_offset: int = 0):
+    """Yield (end_offset, record) pairs; end_offset is where the next record starts."""
+    with open(path, "rb") as f:
+        fieldnames = None
+        if fmt == "csv":
+            fieldnames = next(csv.reader([f.readline().decode("utf-8-sig")]))
+        if start_offset > f.tell():
+            f.seek(start_offset)
+        position = f.tell()
+        
+        if fmt == "jsonl":
+            for line in f:
+                position += len(line)
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    yield position, json.loads(line)
+                except json.JSONDecodeError as e:
+                    # Passed on as-is, so it is reported as an invalid product
+                    logger.warning(f"Invalid JSON ending at byte {position}: {e}")
+                    yield position, line.decode("utf-8", errors="replace")
+            return
+        
+        def lines():
+            nonlocal position
+            for line in f:
+                position += len(line)
+                yield line.decode("utf-8")
+        
+        # The reader pulls extra lines for quoted multi-line fields, so position is the row end
+        for row in csv.DictReader(lines(), fieldnames=fieldnames):
+            yield position, csv_row_to_product(row)
+
+
+def csv_row_to_product(row: dict) -> dict:
+    product = {key: value for key, value in row.items() if key is not None}
+    product_id = product.get("product_id")
+    if isinstance(product_id, str) and product_id.strip().lstrip("-").isdigit():
+        product["product_id"] = int(product_id)
+    # Optional timestamp columns; an unparsable value is left as is and reported by validation
+    for field in service.OPTIONAL_PRODUCT_FIELDS:
+        value = product.pop(field, None)
+        if value:
+            try:
+                product[field] = float(value)
+            except ValueError:
+                product[field] = value
+    return product
+
+
+def batches(records, size: int):
+    batch = []
+    for record in records:
+        batch.append(record)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def load_checkpoint(path: str, source: str) -> Optional[dict]:
+    if not os.path.exists(path):
+        return None
+    with open(path, "r", encoding="utf-8") as f:
+        checkpoint = json.load(f)
+    if checkpoint.get("version") != CHECKPOINT_VERSION or checkpoint.get("source") != source:
+        raise ValueError(f"Checkpoint {path} belongs to a different import; use --restart to discard it")
+    if checkpoint["offset"] > os.path.getsize(source):
+        raise ValueError("Source file is smaller than the checkpoint offset; use --restart")
+    return checkpoint
+
+
+def save_checkpoint(path: str, checkpoint: dict):
+    # Write then rename, so a crash mid-write never leaves a truncated checkpoint
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(checkpoint, f)
+    os.replace(tmp_path, path)
+
+
+def format_duration(seconds: float) -> str:
+    seconds = int(seconds)
+    return f"{seconds // 3600}:{seconds % 3600 // 60:02d}:{seconds % 60:02d}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("source", help="JSONL or CSV file with one product per line/row")
+    parser.add_argument("--format", choices=["jsonl", "csv"], help="Defaults to the file extension")
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--checkpoint", help="Defaults to <data dir>/<source name>.checkpoint.json")
+    parser.add_argument("--restart", action="store_true", help="Ignore an existing checkpoint")
+    parser.add_argument("--errors", help="Append failed products with their error to this JSONL file")
+    args = parser.parse_args()
+    
+    # Before the checkpoint is touched: a locked local store ends the run here
+    try:
+        service.ensure_collection_exists()
+    except StoreLockedError as e:
+        print(f"{e}. Stop the search service first, or import through its /index_batch endpoint.", file=sys.stderr)
+        sys.exit(1)
+    
+    source = os.path.abspath(args.source)
+    fmt = args.format or detect_format(source)
+    checkpoint_path = args.checkpoint or os.path.join(
+        service.DATA_DIR, f"{os.path.basename(source)}.checkpoint.json"
+    )
+    os.makedirs(os.path.dirname(os.path.abspath(checkpoint_path)), exist_ok=True)
+    
+    checkpoint = None if args.restart else load_checkpoint(checkpoint_path, source)
+    if checkpoint is None:
+        checkpoint = {"version": CHECKPOINT_VERSION, "source": source, "offset": 0, "processed": 0, "indexed": 0, "failed": 0}
+    else:
+        print(f"Resuming at byte {checkpoint['offset']} after {checkpoint['processed']} products")
+    
+    total_bytes = os.path.getsize(source)
+    start_offset = checkpoint["offset"]
+    started = time.perf_counter()
+    processed_this_run = 0
+    errors_file = open(args.errors, "a", encoding="utf-8") if args.errors else None
+    
+    try:
+        for batch in batches(read_records(source, fmt, start_offset), args.batch_size):
+            products = [record for _, record in batch]
+            results = service.index_products(products)
+            
+            failed = [(product, result) for product, result in zip(products, results) if result["status"] != "success"]
+            if errors_file:
+                for product, result in failed:
+                    errors_file.write(json.dumps({"product": product, "error": result["error"]}, ensure_ascii=False) + "\n")
+                errors_file.flush()
+            
+            checkpoint["offset"] = batch[-1][0]
+            checkpoint["processed"] += len(products)
+            checkpoint["indexed"] += len(products) - len(failed)
+            checkpoint["failed"] += len(failed)
+            save_checkpoint(checkpoint_path, checkpoint)
+            
+            processed_this_run += len(products)
+            elapsed = time.perf_counter() - started
+            rate = processed_this_run / elapsed
+            bytes_done = checkpoint["offset"] - start_offset
+            # Time per byte so far extrapolates to the rest of the file
+            eta = elapsed * (total_bytes - checkpoint["offset"]) / bytes_done if bytes_done else 0.0
+            print(
+                f"{checkpoint['processed']:>10} processed  {checkpoint['indexed']:>10} indexed  "
+                f"{checkpoint['failed']:>8} failed  {rate:8.1f} products/s  "
+                f"{checkpoint['offset'] / total_bytes:6.1%}  ETA {format_duration(eta)}",
+                flush=True
+            )
+    finally:
+        if errors_file:
+            errors_file.close()
+    
+    elapsed = time.perf_counter() - started
+    print(
+        f"Done: {checkpoint['indexed']} indexed, {checkpoint['failed']} failed, "
+        f"{processed_this_run} products in {format_duration(elapsed)} this run"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,215 @@
+"""
+Collection Profiles - Qdrant kollekció beállítások (payload index, kvantálás, lemezes tárolás)
+A profile decides how the product collection is stored and searched:
+- payload indexes on category, ends_at and indexed_at, so category filters,
+  bulk deletes by end time and the reindex catch-up do not scan payloads
+- int8 scalar quantization kept in RAM, with rescoring on the original vectors
+- original float32 vectors on disk instead of in RAM
+- HNSW graph parameters m and ef_construct
+An existing collection is migrated in place when its config differs from the profile.
+The service name (auction_products) is an alias to a versioned collection
+(auction_products_v1, _v2, ...), so a full reindex can build the next version
+next to the live one and switch the alias atomically. A collection created
+before aliases is copied to version 1 and replaced by the alias once, at startup.
+"""
+
+import logging
+from typing import List, Optional, Tuple
+
+from qdrant_client import QdrantClient
+from qdrant_client.http import models
+
+logger = logging.getLogger(__name__)
+
+PAYLOAD_INDEXES = {
+    "category": models.PayloadSchemaType.KEYWORD,
+    "ends_at": models.PayloadSchemaType.FLOAT,
+    "indexed_at": models.PayloadSchemaType.FLOAT
+}
+
+PROFILES = {
+    # The original setup: full float32 vectors in RAM, no payload index
+    "default": {"payload_index": False, "quantization": False, "on_disk": False},
+    "indexed": {"payload_index": True, "quantization": False, "on_disk": False},
+    "quantized": {"payload_index": True, "quantization": True, "on_disk": False},
+    # Only the int8 copy stays in RAM; rescoring reads the originals from disk
+    "on_disk": {"payload_index": True, "quantization": True, "on_disk": True},
+}
+
+DEFAULT_HNSW_M = 16
+DEFAULT_HNSW_EF_CONSTRUCT = 100
+QUANTIZATION_QUANTILE = 0.99
+RESCORE_OVERSAMPLING = 2.0
+
+
+def get_profile(name: str, hnsw_m: int = DEFAULT_HNSW_M, hnsw_ef_construct: int = DEFAULT_HNSW_EF_CONSTRUCT,
+                hnsw_ef: Optional[int] = None) -> dict:
+    if name not in PROFILES:
+        raise ValueError(f"Unknown collection profile '{name}', expected one of {', '.join(PROFILES)}")
+    return {"name": name, **PROFILES[name], "hnsw_m": hnsw_m, "hnsw_ef_construct": hnsw_ef_construct, "hnsw_ef": hnsw_ef}
+
+
+def quantization_config(profile: dict):
+    if not profile["quantization"]:
+        return None
+    return models.ScalarQuantization(
+        scalar=models.ScalarQuantizationConfig(
+            type=models.ScalarType.INT8,
+            quantile=QUANTIZATION_QUANTILE,
+            always_ram=True
+        )
+    )
+
+
+def search_params(profile: dict) -> Optional[models.SearchParams]:
+    """Per-query parameters matching the profile, or None for Qdrant's defaults."""
+    if not profile["quantization"] and profile["hnsw_ef"] is None:
+        return None
+    quantization = None
+    if profile["quantization"]:
+        quantization = models.QuantizationSearchParams(rescore=True, oversampling=RESCORE_OVERSAMPLING)
+    return models.SearchParams(hnsw_ef=profile["hnsw_ef"], quantization=quantization)
+
+
+def create_collection(client: QdrantClient, name: str, vector_size: int, profile: dict):
+    client.create_collection(
+        collection_name=name,
+        vectors_config=models.VectorParams(
+            size=vector_size,
+            distance=models.Distance.COSINE,
+            on_disk=profile["on_disk"]
+        ),
+        hnsw_config=models.HnswConfigDiff(m=profile["hnsw_m"], ef_construct=profile["hnsw_ef_construct"]),
+        quantization_config=quantization_config(profile)
+    )
+    if profile["payload_index"]:
+        create_payload_indexes(client, name, list(PAYLOAD_INDEXES))
+
+
+def create_payload_indexes(client: QdrantClient, name: str, fields: List[str]):
+    for field in fields:
+        client.create_payload_index(
+            collection_name=name,
+            field_name=field,
+            field_schema=PAYLOAD_INDEXES[field]
+        )
+
+
+def missing_payload_indexes(info: models.CollectionInfo) -> List[str]:
+    return [field for field in PAYLOAD_INDEXES if field not in (info.payload_schema or {})]
+
+
+def profile_drift(info: models.CollectionInfo, profile: dict) -> List[str]:
+    """Settings of an existing collection that differ from the profile."""
+    drift = []
+    vectors = info.config.params.vectors
+    if bool(vectors.on_disk) != profile["on_disk"]:
+        drift.append("on_disk")
+    
+    hnsw = info.config.hnsw_config
+    if hnsw.m != profile["hnsw_m"] or hnsw.ef_construct != profile["hnsw_ef_construct"]:
+        drift.append("hnsw")
+    
+    if (info.config.quantization_config is not None) != profile["quantization"]:
+        drift.append("quantization")
+    
+    if profile["payload_index"] and missing_payload_indexes(info):
+        drift.append("payload_index")
+    return drift
+
+
+def migrate_collection(client: QdrantClient, name: str, profile: dict) -> List[str]:
+    """Bring an existing collection in line with the profile; returns what was changed."""
+    info = client.get_collection(name)
+    drift = profile_drift(info, profile)
+    if not drift:
+        return drift
+    
+    logger.info(f"Migrating collection {name} to profile '{profile['name']}': {', '.join(drift)}")
+    if {"on_disk", "hnsw", "quantization"} & set(drift):
+        # Qdrant rebuilds the affected segments in the background; searches keep working meanwhile
+        client.update_collection(
+            collection_name=name,
+            vectors_config={"": models.VectorParamsDiff(on_disk=profile["on_disk"])},
+            hnsw_config=models.HnswConfigDiff(m=profile["hnsw_m"], ef_construct=profile["hnsw_ef_construct"]),
+            quantization_config=quantization_config(profile) or models.Disabled.DISABLED
+        )
+    if "payload_index" in drift:
+        create_payload_indexes(client, name, missing_payload_indexes(info))
+    return drift
+
+
+def version_name(alias: str, version: int) -> str:
+    return f"{alias}_v{version}"
+
+
+def collection_versions(client: QdrantClient, alias: str) -> List[Tuple[int, str]]:
+    """(version, name) of the versioned collections of an alias, oldest first."""
+    prefix = f"{alias}_v"
+    versions = []
+    for collection in client.get_collections().collections:
+        suffix = collection.name[len(prefix):]
+        if collection.name.startswith(prefix) and suffix.isdigit():
+            versions.append((int(suffix), collection.name))
+    return sorted(versions)
+
+
+def alias_target(client: QdrantClient, alias: str) -> Optional[str]:
+    for description in client.get_aliases().aliases:
+        if description.alias_name == alias:
+            return description.collection_name
+    return None
+
+
+def switch_alias(client: QdrantClient, alias: str, collection: str):
+    """Point the alias at the collection; searches see either the old or the new one, never neither."""
+    operations = []
+    if alias_target(client, alias) is not None:
+        operations.append(models.DeleteAliasOperation(delete_alias=models.DeleteAlias(alias_name=alias)))
+    elif alias in [col.name for col in client.get_collections().collections]:
+        raise ValueError(f"{alias} is a collection, not an alias; move it behind one with move_behind_alias() first")
+    operations.append(models.CreateAliasOperation(
+        create_alias=models.CreateAlias(collection_name=collection, alias_name=alias)
+    ))
+    client.update_collection_aliases(change_aliases_operations=operations)
+
+
+def move_behind_alias(client: QdrantClient, name: str, vector_size: int, profile: dict, batch_size: int = 1000) -> str:
+    """One-time migration of a collection created before aliases: copy it to version 1, then replace it by an alias.
+    
+    The original is only dropped once the copy has every point. Run it before the service takes traffic:
+    between the drop and the alias creation the name does not resolve.
+    """
+    target = version_name(name, 1)
+    if target in [col.name for col in client.get_collections().collections]:
+        # Left over by an interrupted migration; the original is still intact
+        client.delete_collection(target)
+    create_collection(client, target, vector_size, profile)
+    
+    logger.info(f"Copying collection {name} to {target}")
+    offset = None
+    while True:
+        points, offset = client.scroll(
+            collection_name=name,
+            limit=batch_size,
+            offset=offset,
+            with_payload=True,
+            with_vectors=True
+        )
+        if points:
+            client.upsert(
+                collection_name=target,
+                points=[models.PointStruct(id=point.id, vector=point.vector, payload=point.payload) for point in points]
+            )
+        if offset is None:
+            break
+    
+    source_count = client.count(name, exact=True).count
+    target_count = client.count(target, exact=True).count
+    if target_count != source_count:
+        raise RuntimeError(f"Copy of {name} has {target_count} of {source_count} points, keeping the original")
+    
+    client.delete_collection(name)
+    switch_alias(client, name, target)
+    logger.info(f"Collection {name} is now an alias to {target}")
+    return target
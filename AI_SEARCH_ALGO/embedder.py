@@ -0,0 +1,173 @@
+"""
+Embedder - Cserélhető embedding backendek a keresőszolgáltatáshoz
+  remote - calls the embedding service over HTTP (default)
+  local  - loads the sentence-transformers model inside the search process
+           (needs sentence-transformers and torch installed here)
+The ASGI serving mode uses the async variants from create_async_embedder().
+"""
+
+from abc import ABC, abstractmethod
+import asyncio
+import logging
+from typing import List
+
+import numpy as np
+import requests
+
+from http_client import AsyncResilientHttpClient, ResilientHttpClient
+
+logger = logging.getLogger(__name__)
+
+MODEL_NAME = 'all-MiniLM-L6-v2'
+BINARY_ACCEPT = "application/octet-stream, application/json;q=0.5"
+
+
+class Embedder(ABC):
+    """Turns texts into float32 embedding vectors."""
+    
+    @abstractmethod
+    def embed(self, text: str) -> np.ndarray:
+        pass
+    
+    def embed_batch(self, texts: List[str]) -> np.ndarray:
+        """Embed many texts; returns a (len(texts), dim) matrix in input order."""
+        return np.stack([self.embed(text) for text in texts])
+
+    def stats(self) -> dict:
+        return {}
+
+
+def _is_binary(response) -> bool:
+    return response.headers.get("Content-Type", "").startswith("application/octet-stream")
+
+
+def decode_embedding(response) -> np.ndarray:
+    """One vector from an /embed response (requests.Response or BufferedResponse)."""
+    # Raw little-endian float32 is decoded as a view over the response body
+    if _is_binary(response):
+        return np.frombuffer(response.content, dtype='<f4')
+    
+    try:
+        return np.asarray(response.json()["embedding"], dtype=np.float32)
+    except KeyError as e:
+        logger.error(f"Missing field in embedding response: {e}")
+        raise
+
+
+def decode_embeddings(response, count: int) -> np.ndarray:
+    """A (count, dim) matrix from an /embed_batch response."""
+    if _is_binary(response):
+        return np.frombuffer(response.content, dtype='<f4').reshape(count, -1)
+    
+    try:
+        return np.asarray(response.json()["embeddings"], dtype=np.float32)
+    except KeyError as e:
+        logger.error(f"Missing field in embedding response: {e}")
+        raise
+
+
+class RemoteEmbedder(Embedder):
+    """Embedding service client (AI_SEARCH_Flask)."""
+    
+    def __init__(self, base_url: str, client: ResilientHttpClient = None):
+        self.client = client or ResilientHttpClient(base_url)
+    
+    def _post(self, path: str, payload: dict) -> requests.Response:
+        try:
+            return self.client.post(path, json=payload, headers={"Accept": BINARY_ACCEPT})
+        except requests.exceptions.RequestException as e:
+            logger.error(f"Error communicating with embedding service: {e}")
+            raise
+    
+    def embed(self, text: str) -> np.ndarray:
+        return decode_embedding(self._post("/embed", {"text": text}))
+    
+    def embed_batch(self, texts: List[str]) -> np.ndarray:
+        return decode_embeddings(self._post("/embed_batch", {"texts": texts}), len(texts))
+
+    def stats(self) -> dict:
+        return {"backend": "remote", **self.client.stats()}
+
+
+class LocalEmbedder(Embedder):
+    """Runs the model in-process, skipping the loopback HTTP hop and JSON."""
+    
+    def __init__(self, model_name: str = MODEL_NAME, batch_size: int = 32):
+        try:
+            from sentence_transformers import SentenceTransformer
+        except ImportError as e:
+            raise RuntimeError("The local embedder requires 'sentence-transformers' and 'torch'") from e
+        
+        self.batch_size = batch_size
+        self.model = SentenceTransformer(model_name, device="cpu")
+        logger.info(f"Local embedding model loaded: {model_name}")
+    
+    def embed(self, text: str) -> np.ndarray:
+        return self.model.encode([text], convert_to_numpy=True)[0].astype(np.float32, copy=False)
+    
+    def embed_batch(self, texts: List[str]) -> np.ndarray:
+        embeddings = self.model.encode(texts, batch_size=self.batch_size, convert_to_numpy=True)
+        return embeddings.astype(np.float32, copy=False)
+
+    def stats(self) -> dict:
+        return {"backend": "local"}
+
+
+def create_embedder(backend: str, service_url: str, client: ResilientHttpClient = None) -> Embedder:
+    if backend == "remote":
+        return RemoteEmbedder(service_url, client)
+    if backend == "local":
+        return LocalEmbedder()
+    raise ValueError(f"Unknown embedder backend '{backend}', expected 'remote' or 'local'")
+
+
+class AsyncRemoteEmbedder:
+    """Embedding service client for the event loop; waiting on the service holds no thread."""
+    
+    def __init__(self, client: AsyncResilientHttpClient):
+        self.client = client
+    
+    async def _post(self, path: str, payload: dict):
+        try:
+            return await self.client.post(path, json=payload, headers={"Accept": BINARY_ACCEPT})
+        except self.client.errors as e:
+            logger.error(f"Error communicating with embedding service: {e}")
+            raise
+    
+    async def embed(self, text: str) -> np.ndarray:
+        return decode_embedding(await self._post("/embed", {"text": text}))
+    
+    async def embed_batch(self, texts: List[str]) -> np.ndarray:
+        return decode_embeddings(await self._post("/embed_batch", {"texts": texts}), len(texts))
+    
+    def stats(self) -> dict:
+        return {"backend": "remote", **self.client.stats()}
+    
+    async def close(self):
+        await self.client.close()
+
+
+class ThreadedAsyncEmbedder:
+    """Awaitable wrapper running a synchronous embedder in worker threads (the in-process model is CPU-bound)."""
+    
+    def __init__(self, embedder: Embedder):
+        self.embedder = embedder
+    
+    async def embed(self, text: str) -> np.ndarray:
+        return await asyncio.to_thread(self.embedder.embed, text)
+    
+    async def embed_batch(self, texts: List[str]) -> np.ndarray:
+        return await asyncio.to_thread(self.embedder.embed_batch, texts)
+    
+    def stats(self) -> dict:
+        return self.embedder.stats()
+    
+    async def close(self):
+        pass
+
+
+def create_async_embedder(embedder: Embedder, client: AsyncResilientHttpClient):
+    """Async counterpart of an embedder built by create_embedder()."""
+    if isinstance(embedder, RemoteEmbedder):
+        return AsyncRemoteEmbedder(client)
+    return ThreadedAsyncEmbedder(embedder)
@@ -0,0 +1,242 @@
+"""
+HTTP client - Újrafelhasználható kapcsolatok, újrapróbálkozás és circuit breaker
+Shared client for calls to other services: a persistent keep-alive connection
+pool, a deadline per call, bounded retries with jittered backoff, and a
+circuit breaker that fails fast while the remote side is unhealthy.
+AsyncResilientHttpClient does the same on aiohttp for the ASGI serving mode.
+"""
+
+import asyncio
+from contextlib import contextmanager
+import json
+import logging
+import random
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger(__name__)
+
+RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504}
+
+
+class CircuitOpenError(Exception):
+    """Raised without calling the remote service while the circuit is open."""
+    pass
+
+
+class CircuitBreaker:
+    """Opens after consecutive failures, lets one trial call through after reset_timeout."""
+    
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+    
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+    
+    def allow_request(self) -> bool:
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.OPEN and time.monotonic() - self.opened_at >= self.reset_timeout:
+                self.state = self.HALF_OPEN
+                self._trial_in_flight = False
+            if self.state == self.HALF_OPEN and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return True
+            return False
+    
+    def record_success(self):
+        with self._lock:
+            self.state = self.CLOSED
+            self.consecutive_failures = 0
+            self._trial_in_flight = False
+    
+    def record_failure(self):
+        with self._lock:
+            self.consecutive_failures += 1
+            self._trial_in_flight = False
+            if self.state == self.HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+                if self.state != self.OPEN:
+                    logger.warning(f"Circuit opened after {self.consecutive_failures} consecutive failures")
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
+
+
+class _RetryingClient:
+    """Settings, circuit breaker and counters shared by the sync and the async client."""
+    
+    def __init__(self, base_url: str, timeout: float, max_retries: int, backoff_base: float, backoff_max: float,
+                 breaker: CircuitBreaker):
+        self.base_url = base_url
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.breaker = breaker or CircuitBreaker()
+        
+        self._lock = threading.Lock()
+        self.in_flight = 0
+        self.counters = {"requests": 0, "retries": 0, "failures": 0, "short_circuited": 0}
+    
+    @contextmanager
+    def _track_in_flight(self):
+        with self._lock:
+            self.in_flight += 1
+            self.counters["requests"] += 1
+        try:
+            yield
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+    
+    def _count(self, name: str):
+        with self._lock:
+            self.counters[name] += 1
+    
+    def _backoff_delay(self, attempt: int, remaining: float) -> float:
+        # Full jitter: spread retries from many callers instead of retrying in lockstep
+        delay = random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+        return max(0.0, min(delay, remaining))
+    
+    def _check_breaker(self):
+        if not self.breaker.allow_request():
+            self._count("short_circuited")
+            raise CircuitOpenError(f"Circuit open for {self.base_url}, failing fast")
+    
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "base_url": self.base_url,
+                "in_flight": self.in_flight,
+                "circuit_state": self.breaker.state,
+                "consecutive_failures": self.breaker.consecutive_failures,
+                **self.counters
+            }
+
+
+class ResilientHttpClient(_RetryingClient):
+    """requests.Session wrapper with deadlines, retries and a circuit breaker."""
+    
+    def __init__(self, base_url: str, timeout: float = 10.0, max_retries: int = 2, pool_size: int = 20,
+                 backoff_base: float = 0.05, backoff_max: float = 1.0, breaker: CircuitBreaker = None):
+        super().__init__(base_url, timeout, max_retries, backoff_base, backoff_max, breaker)
+        
+        # Retries are done here, not by urllib3, so they respect the call deadline
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=0)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+    
+    def post(self, path: str, deadline: float = None, **kwargs) -> requests.Response:
+        """POST with retries; deadline (seconds) bounds the whole call including retries."""
+        self._check_breaker()
+        
+        deadline_at = time.monotonic() + (deadline or self.timeout)
+        last_error = None
+        
+        for attempt in range(self.max_retries + 1):
+            remaining = deadline_at - time.monotonic()
+            if remaining <= 0:
+                break
+            
+            try:
+                with self._track_in_flight():
+                    response = self.session.post(f"{self.base_url}{path}", timeout=remaining, **kwargs)
+            except requests.exceptions.RequestException as e:
+                last_error = e
+            else:
+                if response.status_code not in RETRYABLE_STATUS_CODES:
+                    # 4xx means the service is up and answered; only the request was wrong
+                    self.breaker.record_success()
+                    response.raise_for_status()
+                    return response
+                last_error = requests.exceptions.HTTPError(
+                    f"{response.status_code} from {self.base_url}{path}", response=response
+                )
+            
+            if attempt < self.max_retries:
+                self._count("retries")
+                time.sleep(self._backoff_delay(attempt, deadline_at - time.monotonic()))
+        
+        self._count("failures")
+        self.breaker.record_failure()
+        raise last_error or requests.exceptions.Timeout(f"Deadline exceeded for {self.base_url}{path}")
+    
+
+class BufferedResponse:
+    """Status, headers and fully read body of an async response, with the accessors of requests.Response."""
+    
+    __slots__ = ("status_code", "headers", "content")
+    
+    def __init__(self, status_code: int, headers, content: bytes):
+        self.status_code = status_code
+        self.headers = headers
+        self.content = content
+    
+    def json(self):
+        return json.loads(self.content)
+
+
+class AsyncResilientHttpClient(_RetryingClient):
+    """aiohttp session with the same deadlines, retries and circuit breaker; create it on the running loop."""
+    
+    def __init__(self, base_url: str, timeout: float = 10.0, max_retries: int = 2, pool_size: int = 100,
+                 backoff_base: float = 0.05, backoff_max: float = 1.0, breaker: CircuitBreaker = None):
+        import aiohttp
+        
+        super().__init__(base_url, timeout, max_retries, backoff_base, backoff_max, breaker)
+        self.aiohttp = aiohttp
+        self.errors = (aiohttp.ClientError, asyncio.TimeoutError)
+        # Connections are cheap here: no thread waits on them, so the pool can be much larger
+        self.session = aiohttp.ClientSession(connector=aiohttp.TCPConnector(limit=pool_size))
+    
+    async def post(self, path: str, deadline: float = None, **kwargs) -> BufferedResponse:
+        """POST with retries; deadline (seconds) bounds the whole call including retries."""
+        self._check_breaker()
+        
+        deadline_at = time.monotonic() + (deadline or self.timeout)
+        last_error = None
+        
+        for attempt in range(self.max_retries + 1):
+            remaining = deadline_at - time.monotonic()
+            if remaining <= 0:
+                break
+            
+            try:
+                with self._track_in_flight():
+                    async with self.session.post(f"{self.base_url}{path}",
+                                                 timeout=self.aiohttp.ClientTimeout(total=remaining),
+                                                 **kwargs) as response:
+                        content = await response.read()
+            except self.errors as e:
+                last_error = e
+            else:
+                if response.status not in RETRYABLE_STATUS_CODES:
+                    self.breaker.record_success()
+                    response.raise_for_status()
+                    return BufferedResponse(response.status, response.headers, content)
+                last_error = self.aiohttp.ClientResponseError(
+                    response.request_info, response.history, status=response.status,
+                    message=f"{response.status} from {self.base_url}{path}"
+                )
+            
+            if attempt < self.max_retries:
+                self._count("retries")
+                await asyncio.sleep(self._backoff_delay(attempt, deadline_at - time.monotonic()))
+        
+        self._count("failures")
+        self.breaker.record_failure()
+        raise last_error or asyncio.TimeoutError(f"Deadline exceeded for {self.base_url}{path}")
+    
+    async def close(self):
+        await self.session.close()
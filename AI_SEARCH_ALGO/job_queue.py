@@ -0,0 +1,228 @@
+"""
+Job Queue - Tartós háttér feladatsor az indexeléshez
+Jobs are stored in SQLite so they survive a restart. A fixed number of worker
+threads run them with bounded concurrency. Queued jobs for the same key are
+superseded by the latest one, jobs for a key never run in parallel, and
+failures are retried with exponential backoff.
+One serving process owns a job store: on start it requeues every job left running.
+"""
+
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+SUPERSEDED = "superseded"
+FINISHED_STATUSES = (SUCCEEDED, FAILED, SUPERSEDED)
+
+
+class JobQueue:
+    """SQLite-backed job queue with a worker thread pool."""
+    
+    def __init__(self, path: str, handler: Callable[[dict], None], num_workers: int = 4, max_attempts: int = 5,
+                 retry_base_delay: float = 2.0, retention_seconds: float = 7 * 24 * 3600):
+        self.path = path
+        self.handler = handler
+        self.num_workers = num_workers
+        self.max_attempts = max_attempts
+        self.retry_base_delay = retry_base_delay
+        self.retention_seconds = retention_seconds
+        self._workers = []
+        self._start_lock = threading.Lock()
+        self._wakeup = threading.Condition()
+        self._stopping = False
+        
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        
+        conn = self._connect()
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS jobs (
+                id TEXT PRIMARY KEY,
+                job_key TEXT NOT NULL,
+                payload TEXT NOT NULL,
+                status TEXT NOT NULL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                error TEXT,
+                created_at REAL NOT NULL,
+                updated_at REAL NOT NULL,
+                next_attempt_at REAL NOT NULL
+            )
+        """)
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs (status, next_attempt_at)")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_key ON jobs (job_key, status)")
+        conn.close()
+    
+    def _connect(self) -> sqlite3.Connection:
+        # Autocommit mode; multi-statement updates use explicit BEGIN IMMEDIATE so they
+        # are atomic across threads and across processes sharing the file
+        conn = sqlite3.connect(self.path, isolation_level=None, timeout=30)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")
+        return conn
+    
+    def start(self):
+        """Start the workers once; jobs left running by a previous process are requeued."""
+        with self._start_lock:
+            if self._workers:
+                return
+            
+            conn = self._connect()
+            now = time.time()
+            requeued = conn.execute(
+                "UPDATE jobs SET status = ?, updated_at = ?, next_attempt_at = ? WHERE status = ?",
+                (QUEUED, now, now, RUNNING)
+            ).rowcount
+            purged = conn.execute(
+                f"DELETE FROM jobs WHERE status IN ({','.join('?' * len(FINISHED_STATUSES))}) AND updated_at < ?",
+                (*FINISHED_STATUSES, now - self.retention_seconds)
+            ).rowcount
+            conn.close()
+            logger.info(f"Job queue starting: {requeued} interrupted jobs requeued, {purged} old jobs purged")
+            
+            for i in range(self.num_workers):
+                worker = threading.Thread(target=self._run, name=f"job-worker-{i}", daemon=True)
+                worker.start()
+                self._workers.append(worker)
+    
+    def stop(self):
+        with self._wakeup:
+            self._stopping = True
+            self._wakeup.notify_all()
+    
+    def enqueue(self, job_key: str, payload: dict) -> str:
+        """Queue a job; any still-queued job with the same key is superseded."""
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute(
+                "UPDATE jobs SET status = ?, updated_at = ? WHERE job_key = ? AND status = ?",
+                (SUPERSEDED, now, job_key, QUEUED)
+            )
+            conn.execute(
+                "INSERT INTO jobs (id, job_key, payload, status, attempts, created_at, updated_at, next_attempt_at) "
+                "VALUES (?, ?, ?, ?, 0, ?, ?, ?)",
+                (job_id, job_key, json.dumps(payload, ensure_ascii=False), QUEUED, now, now, now)
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+        
+        with self._wakeup:
+            self._wakeup.notify()
+        return job_id
+    
+    def _claim(self, conn: sqlite3.Connection) -> Optional[sqlite3.Row]:
+        now = time.time()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            # A key with a running job waits, so an older job can never overwrite a newer one
+            row = conn.execute(
+                "SELECT * FROM jobs WHERE status = ? AND next_attempt_at <= ? "
+                "AND job_key NOT IN (SELECT job_key FROM jobs WHERE status = ?) "
+                "ORDER BY created_at LIMIT 1",
+                (QUEUED, now, RUNNING)
+            ).fetchone()
+            if row is not None:
+                conn.execute(
+                    "UPDATE jobs SET status = ?, attempts = attempts + 1, updated_at = ? WHERE id = ?",
+                    (RUNNING, now, row["id"])
+                )
+            conn.execute("COMMIT")
+            return row
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+    
+    def _finish(self, conn: sqlite3.Connection, job: sqlite3.Row, error: Exception = None):
+        now = time.time()
+        attempts = job["attempts"] + 1
+        
+        if error is None:
+            conn.execute("UPDATE jobs SET status = ?, error = NULL, updated_at = ? WHERE id = ?",
+                         (SUCCEEDED, now, job["id"]))
+        elif attempts < self.max_attempts:
+            delay = self.retry_base_delay * (2 ** (attempts - 1))
+            logger.warning(f"Job {job['id']} failed (attempt {attempts}), retrying in {delay:.1f}s: {error}")
+            conn.execute(
+                "UPDATE jobs SET status = ?, error = ?, updated_at = ?, next_attempt_at = ? WHERE id = ?",
+                (QUEUED, str(error), now, now + delay, job["id"])
+            )
+        else:
+            logger.error(f"Job {job['id']} failed permanently after {attempts} attempts: {error}")
+            conn.execute("UPDATE jobs SET status = ?, error = ?, updated_at = ? WHERE id = ?",
+                         (FAILED, str(error), now, job["id"]))
+    
+    def _run(self):
+        conn = self._connect()
+        while not self._stopping:
+            try:
+                job = self._claim(conn)
+            except sqlite3.Error as e:
+                logger.error(f"Job queue claim failed: {e}")
+                job = None
+            
+            if job is None:
+                # Woken by enqueue; the timeout picks up delayed retries and other processes' jobs
+                with self._wakeup:
+                    self._wakeup.wait(timeout=1.0)
+                continue
+            
+            try:
+                self.handler(json.loads(job["payload"]))
+            except Exception as e:
+                self._finish(conn, job, e)
+            else:
+                self._finish(conn, job)
+        conn.close()
+    
+    def get(self, job_id: str) -> Optional[dict]:
+        conn = self._connect()
+        try:
+            row = conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        finally:
+            conn.close()
+        if row is None:
+            return None
+        
+        return {
+            "job_id": row["id"],
+            "key": row["job_key"],
+            "status": row["status"],
+            "attempts": row["attempts"],
+            "error": row["error"],
+            "created_at": row["created_at"],
+            "updated_at": row["updated_at"]
+        }
+    
+    def stats(self) -> dict:
+        conn = self._connect()
+        try:
+            counts = dict(conn.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall())
+            oldest = conn.execute("SELECT MIN(created_at) FROM jobs WHERE status = ?", (QUEUED,)).fetchone()[0]
+        finally:
+            conn.close()
+        
+        return {
+            "queue_depth": counts.get(QUEUED, 0),
+            "running": counts.get(RUNNING, 0),
+            "counts": counts,
+            "oldest_queued_age_seconds": time.time() - oldest if oldest else 0.0,
+            "workers": len(self._workers)
+        }
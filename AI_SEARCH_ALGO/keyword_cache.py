@@ -0,0 +1,133 @@
+"""
+Keyword Cache - Tartós SQLite gyorsítótár a Gemini kulcsszavakhoz
+Keyed by a hash of prompt version + title + description, so unchanged products
+are never sent to the LLM again. Entries from an older prompt version are
+dropped on startup; the least recently used entries are evicted above max_entries.
+Hits only note their time in memory; the recency is written in batches.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+EVICTION_CHECK_INTERVAL = 500  # puts between two size checks
+RECENCY_FLUSH_ENTRIES = 500  # pending last_used_at updates that force a write
+RECENCY_FLUSH_SECONDS = 30
+
+
+class KeywordCache:
+    """SQLite-backed keyword cache shared by all request threads."""
+    
+    def __init__(self, path: str, prompt_version: str, max_entries: int = 200000):
+        self.path = path
+        self.prompt_version = prompt_version
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._puts_since_check = 0
+        self._last_used: Dict[str, float] = {}
+        self._last_flush = time.monotonic()
+        self._lock = threading.Lock()
+        
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS keywords (
+                key TEXT PRIMARY KEY,
+                prompt_version TEXT NOT NULL,
+                keywords TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                last_used_at REAL NOT NULL
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_keywords_last_used ON keywords (last_used_at)")
+        
+        removed = self._conn.execute(
+            "DELETE FROM keywords WHERE prompt_version != ?", (prompt_version,)
+        ).rowcount
+        self._evict()
+        self._conn.commit()
+        if removed:
+            logger.info(f"Keyword cache: dropped {removed} entries from older prompt versions")
+    
+    def _key(self, title: str, description: str) -> str:
+        content = "\x00".join([self.prompt_version, title, description])
+        return hashlib.sha256(content.encode("utf-8")).hexdigest()
+    
+    def get(self, title: str, description: str) -> Optional[List[str]]:
+        key = self._key(title, description)
+        with self._lock:
+            row = self._conn.execute("SELECT keywords FROM keywords WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            
+            self.hits += 1
+            self._last_used[key] = time.time()
+            if (len(self._last_used) >= RECENCY_FLUSH_ENTRIES
+                    or time.monotonic() - self._last_flush >= RECENCY_FLUSH_SECONDS):
+                self._flush_recency()
+                self._conn.commit()
+        return json.loads(row[0])
+    
+    def put(self, title: str, description: str, keywords: List[str]):
+        key = self._key(title, description)
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO keywords (key, prompt_version, keywords, created_at, last_used_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (key, self.prompt_version, json.dumps(keywords, ensure_ascii=False), now, now)
+            )
+            self._last_used.pop(key, None)
+            self._flush_recency()
+            self._puts_since_check += 1
+            if self._puts_since_check >= EVICTION_CHECK_INTERVAL:
+                self._puts_since_check = 0
+                self._evict()
+            self._conn.commit()
+    
+    def _flush_recency(self):
+        """Write the pending last_used_at updates in one statement; caller holds the lock and commits."""
+        if self._last_used:
+            self._conn.executemany("UPDATE keywords SET last_used_at = ? WHERE key = ?",
+                                   [(used_at, key) for key, used_at in self._last_used.items()])
+            self._last_used = {}
+        self._last_flush = time.monotonic()
+    
+    def _evict(self):
+        count = self._conn.execute("SELECT COUNT(*) FROM keywords").fetchone()[0]
+        excess = count - self.max_entries
+        if excess > 0:
+            self._conn.execute(
+                "DELETE FROM keywords WHERE key IN "
+                "(SELECT key FROM keywords ORDER BY last_used_at ASC LIMIT ?)",
+                (excess,)
+            )
+            logger.info(f"Keyword cache: evicted {excess} least recently used entries")
+    
+    def stats(self) -> dict:
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM keywords").fetchone()[0]
+            lookups = self.hits + self.misses
+            return {
+                "path": self.path,
+                "prompt_version": self.prompt_version,
+                "entries": entries,
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": self.hits / lookups if lookups else 0.0
+            }
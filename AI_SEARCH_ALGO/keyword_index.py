@@ -0,0 +1,188 @@
+"""
+Keyword Index - Memóriában tartott invertált index a Gemini kulcsszavakra
+Maps every normalized payload keyword, and every word of it, to the products
+carrying it. Exact lookups match a whole keyword; ranked lookups score products
+by the query words their keywords share (IDF-weighted). It is updated by the index and delete paths of this process and rebuilt from a
+collection scroll on startup (and optionally on an interval, to pick up writes
+from other processes such as the bulk importer).
+"""
+
+import heapq
+import logging
+import math
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+RRF_K = 60  # standard reciprocal rank fusion constant
+
+
+def normalize_term(term: str) -> str:
+    return " ".join(str(term).split()).lower()
+
+
+def reciprocal_rank_fusion(rankings: List[List[Tuple[str, float]]], k: int = RRF_K) -> List[Tuple[str, float]]:
+    """Fuse (id, score) lists sorted best first; ids ranked high in several lists come first.
+    
+    Equal scores share a rank, so the order within a tie carries no weight.
+    """
+    scores = {}
+    for ranking in rankings:
+        rank = 0
+        for position, (item_id, score) in enumerate(ranking):
+            if position and score != ranking[position - 1][1]:
+                rank = position
+            scores[item_id] = scores.get(item_id, 0.0) + 1.0 / (k + rank + 1)
+    return sorted(scores.items(), key=lambda item: item[1], reverse=True)
+
+
+def keyword_words(terms: Iterable[str]) -> set:
+    return {word for term in terms for word in term.split()}
+
+
+class KeywordIndex:
+    """Thread-safe inverted index: keyword and word -> product ids, plus each product's category."""
+    
+    def __init__(self, enabled: bool = True):
+        self.enabled = enabled
+        self._postings: Dict[str, set] = {}
+        self._word_postings: Dict[str, set] = {}
+        self._documents: Dict[int, Tuple[frozenset, Optional[str]]] = {}
+        self._lock = threading.Lock()
+        self._rebuilding = False
+        self._touched_during_rebuild = set()
+        self.ready = False
+        self.last_rebuild_at = None
+        self.last_rebuild_seconds = None
+    
+    def _add_locked(self, product_id: int, keywords: Iterable[str], category: Optional[str]):
+        self._remove_locked(product_id)
+        terms = frozenset(term for term in (normalize_term(keyword) for keyword in keywords) if term)
+        self._documents[product_id] = (terms, category)
+        for term in terms:
+            self._postings.setdefault(term, set()).add(product_id)
+        for word in keyword_words(terms):
+            self._word_postings.setdefault(word, set()).add(product_id)
+    
+    def _remove_locked(self, product_id: int) -> bool:
+        document = self._documents.pop(product_id, None)
+        if document is None:
+            return False
+        for index, keys in ((self._postings, document[0]), (self._word_postings, keyword_words(document[0]))):
+            for key in keys:
+                postings = index.get(key)
+                if postings is not None:
+                    postings.discard(product_id)
+                    if not postings:
+                        del index[key]
+        return True
+    
+    def add(self, product_id: int, keywords: Iterable[str], category: Optional[str] = None):
+        """Index or re-index one product, replacing its previous keywords."""
+        if not self.enabled:
+            return
+        with self._lock:
+            if self._rebuilding:
+                self._touched_during_rebuild.add(product_id)
+            self._add_locked(product_id, keywords, category)
+    
+    def remove(self, product_id: int):
+        if not self.enabled:
+            return
+        with self._lock:
+            if self._rebuilding:
+                self._touched_during_rebuild.add(product_id)
+            self._remove_locked(product_id)
+    
+    def lookup(self, query: str, category: Optional[str] = None, limit: Optional[int] = None) -> List[int]:
+        """Products whose keywords contain the whole normalized query, in id order.
+        
+        Every match is equally relevant here; use ranked_lookup() for a ranking.
+        """
+        term = normalize_term(query)
+        with self._lock:
+            postings = self._postings.get(term)
+            if not postings:
+                return []
+            if category is not None:
+                postings = [product_id for product_id in postings if self._documents[product_id][1] == category]
+            # Common keywords have long posting lists; only the first `limit` ids need ordering
+            return heapq.nsmallest(limit, postings) if limit is not None else sorted(postings)
+    
+    def ranked_lookup(self, query: str, category: Optional[str] = None,
+                      limit: Optional[int] = None) -> List[Tuple[int, float]]:
+        """(product id, score) for products sharing words with the query, best first.
+        
+        A product scores the IDF of each query word found among its keyword words;
+        a keyword equal to the whole query doubles that. Only the top `limit` by
+        score are returned.
+        """
+        phrase = normalize_term(query)
+        with self._lock:
+            total = len(self._documents)
+            scores: Dict[int, float] = {}
+            for word in set(phrase.split()):
+                postings = self._word_postings.get(word)
+                if not postings:
+                    continue
+                idf = math.log(1 + total / len(postings))
+                for product_id in postings:
+                    scores[product_id] = scores.get(product_id, 0.0) + idf
+            for product_id in self._postings.get(phrase, ()):
+                scores[product_id] *= 2
+            if category is not None:
+                scores = {product_id: score for product_id, score in scores.items()
+                          if self._documents[product_id][1] == category}
+        
+        if limit is not None:
+            return heapq.nlargest(limit, scores.items(), key=lambda item: item[1])
+        return sorted(scores.items(), key=lambda item: item[1], reverse=True)
+    
+    def rebuild(self, scroll_pages: Callable[[], Iterable[List[Tuple[int, Iterable[str], Optional[str]]]]]):
+        """Reload from (id, keywords, category) pages; live updates made meanwhile win."""
+        started = time.perf_counter()
+        with self._lock:
+            self._rebuilding = True
+            self._touched_during_rebuild = set()
+            previous_ids = set(self._documents)
+        
+        seen = set()
+        completed = False
+        try:
+            for page in scroll_pages():
+                with self._lock:
+                    for product_id, keywords, category in page:
+                        seen.add(product_id)
+                        if product_id not in self._touched_during_rebuild:
+                            self._add_locked(product_id, keywords or [], category)
+            completed = True
+        finally:
+            with self._lock:
+                if completed:
+                    # Products gone from the collection, unless re-added by a live update
+                    for product_id in previous_ids - seen - self._touched_during_rebuild:
+                        self._remove_locked(product_id)
+                self._rebuilding = False
+                self._touched_during_rebuild = set()
+        
+        with self._lock:
+            self.ready = True
+            self.last_rebuild_at = time.time()
+            self.last_rebuild_seconds = time.perf_counter() - started
+        logger.info(f"Keyword index rebuilt: {len(seen)} products in {self.last_rebuild_seconds:.2f}s")
+    
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "enabled": self.enabled,
+                "ready": self.ready,
+                "rebuilding": self._rebuilding,
+                "products": len(self._documents),
+                "terms": len(self._postings),
+                "words": len(self._word_postings),
+                "postings": sum(len(postings) for postings in self._postings.values()),
+                "last_rebuild_at": self.last_rebuild_at,
+                "last_rebuild_seconds": self.last_rebuild_seconds
+            }
@@ -0,0 +1,269 @@
+"""
+Reindex - Teljes újraindexelés árnyék kollekcióba, alias-cserével
+Rebuilds the Qdrant collection behind the service's alias while searches keep
+reading the live version:
+1. the next version (auction_products_v<N>) is created with the current profile
+2. every upsert and delete of the live collection is mirrored into it, while all
+   products are read back from the live payloads and indexed again in throttled
+   batches (current keyword prompt, current embedding model)
+3. a catch-up pass re-indexes products that changed meanwhile and drops deleted ones
+4. products written to the live collection since the catch-up (by any process,
+   e.g. bulk_import, found by their indexed_at) are replayed into the shadow
+5. the point counts and the recall of a sample of titles are verified
+6. the alias is switched in one call; writes that reached the old version in
+   the last moment are replayed unless the new one already has newer content
+7. versions beyond the kept ones are dropped
+A failed rebuild drops its shadow collection; the live collection is never written by it.
+The mirror covers this process' writes, indexed_at replays the upserts of others;
+deletes are expected to come through the serving process (/delete, /sync).
+The collection must already be behind the alias, see move_behind_alias().
+"""
+
+import logging
+import random
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+
+from collection_profiles import alias_target, collection_versions, create_collection, switch_alias, version_name
+from vector_store import Point, QdrantStore
+
+logger = logging.getLogger(__name__)
+
+IDLE = "idle"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+
+PRODUCT_FIELDS = ['title', 'description', 'category', 'updated_at', 'ends_at']
+SCROLL_BATCH = 1000
+# indexed_at comes from the writing process' clock
+CLOCK_SKEW_SECONDS = 5
+
+
+class ReindexVerificationError(Exception):
+    pass
+
+
+class Reindexer:
+    """Runs one shadow-collection rebuild at a time in a background thread."""
+    
+    def __init__(self, store: QdrantStore, build_points: Callable[[List[dict]], List[Point]],
+                 embed_texts: Callable[[List[str]], np.ndarray], on_switch: Callable[[], None],
+                 batch_size: int = 100, max_products_per_second: float = 0, keep_versions: int = 1,
+                 min_point_ratio: float = 0.999, sample_size: int = 200, recall_k: int = 10,
+                 min_recall: float = 0.8, ready_timeout: float = 1800):
+        self.store = store
+        self.build_points = build_points
+        self.embed_texts = embed_texts
+        self.on_switch = on_switch
+        self.batch_size = batch_size
+        self.max_products_per_second = max_products_per_second
+        self.keep_versions = keep_versions
+        self.min_point_ratio = min_point_ratio
+        self.sample_size = sample_size
+        self.recall_k = recall_k
+        self.min_recall = min_recall
+        self.ready_timeout = ready_timeout
+        self._lock = threading.Lock()
+        self._thread = None
+        self._status = {"state": IDLE}
+    
+    def status(self) -> dict:
+        with self._lock:
+            return dict(self._status)
+    
+    def _update(self, **fields):
+        with self._lock:
+            self._status.update(fields)
+    
+    def start(self) -> bool:
+        """Start a rebuild; False when one is already running."""
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return False
+            self._status = {"state": RUNNING, "phase": "starting", "started_at": time.time(),
+                            "processed": 0, "indexed": 0, "failed": 0}
+            self._thread = threading.Thread(target=self._run, name="reindex", daemon=True)
+            self._thread.start()
+            return True
+    
+    def _run(self):
+        client = self.store.client
+        alias = self.store.collection_name
+        shadow = None
+        try:
+            live_version = alias_target(client, alias)
+            if live_version is None:
+                raise ReindexVerificationError(
+                    f"{alias} is not an alias yet; restart the service with COLLECTION_MIGRATE=true to move it behind one")
+            source = self.store.for_collection(live_version)
+            versions = collection_versions(client, alias)
+            shadow = self.store.for_collection(version_name(alias, versions[-1][0] + 1 if versions else 1))
+            self._update(source=source.collection_name, shadow=shadow.collection_name)
+            logger.info(f"Reindex: building {shadow.collection_name} from {source.collection_name}")
+            
+            create_collection(client, shadow.collection_name, self.store.vector_size, self.store.profile)
+            mirror_errors = self.store.mirror_errors
+            self.store.mirror = shadow
+            
+            self._update(phase="copy")
+            for page in source.scroll(PRODUCT_FIELDS, SCROLL_BATCH):
+                for start in range(0, len(page), self.batch_size):
+                    self._ingest(page[start:start + self.batch_size], shadow)
+            
+            self._update(phase="catch_up")
+            caught_up_to = time.time()
+            self._catch_up(source, shadow)
+            
+            self._update(phase="verify")
+            self._wait_until_ready(shadow)
+            caught_up_to = self._replay_writes(source, shadow, caught_up_to)
+            self._update(verification=self._verify(source, shadow))
+            if self.store.mirror_errors != mirror_errors:
+                raise ReindexVerificationError(
+                    f"{self.store.mirror_errors - mirror_errors} live writes could not be mirrored into the shadow")
+            
+            self._update(phase="switch")
+            switch_alias(client, alias, shadow.collection_name)
+            self.store.mirror = None
+            logger.info(f"Reindex: {alias} now points to {shadow.collection_name}")
+            self._replay_writes(source, shadow, caught_up_to, newer_only=True)
+            self.on_switch()
+            
+            self._update(phase="cleanup", dropped=self._collect_garbage(shadow.collection_name))
+            self._update(state=SUCCEEDED, phase="done", finished_at=time.time())
+        except Exception as e:
+            logger.error(f"Reindex failed: {e}")
+            self.store.mirror = None
+            if shadow is not None and alias_target(client, alias) != shadow.collection_name:
+                try:
+                    client.delete_collection(shadow.collection_name)
+                except Exception as drop_error:
+                    logger.warning(f"Could not drop shadow collection {shadow.collection_name}: {drop_error}")
+            self._update(state=FAILED, error=str(e), finished_at=time.time())
+    
+    def _ingest(self, page: List[tuple], shadow: QdrantStore):
+        """Index one batch of (id, payload) into the shadow, then sleep off the rate limit."""
+        started = time.monotonic()
+        products = [{"product_id": product_id, **payload} for product_id, payload in page
+                    if all(payload.get(field) is not None for field in ('title', 'description', 'category'))]
+        points = self.build_points(products) if products else []
+        if points:
+            shadow.upsert(points)
+        with self._lock:
+            self._status["processed"] += len(page)
+            self._status["indexed"] += len(points)
+            self._status["failed"] += len(page) - len(points)
+        
+        if self.max_products_per_second > 0:
+            time.sleep(max(0.0, len(page) / self.max_products_per_second - (time.monotonic() - started)))
+    
+    @staticmethod
+    def _hashes(store: QdrantStore) -> Dict[int, Optional[str]]:
+        return {product_id: payload.get('content_hash')
+                for page in store.scroll(["content_hash"], SCROLL_BATCH) for product_id, payload in page}
+    
+    def _catch_up(self, source: QdrantStore, shadow: QdrantStore):
+        """Re-index products whose live content differs from the shadow and drop ones deleted meanwhile."""
+        live = self._hashes(source)
+        built = self._hashes(shadow)
+        # Points indexed before content hashes existed only count as stale when missing
+        stale = [product_id for product_id, content_hash in live.items()
+                 if product_id not in built or (content_hash is not None and built[product_id] != content_hash)]
+        removed = [product_id for product_id in built if product_id not in live]
+        logger.info(f"Reindex catch-up: {len(stale)} stale, {len(removed)} removed")
+        
+        for start in range(0, len(removed), SCROLL_BATCH):
+            shadow.delete(removed[start:start + SCROLL_BATCH])
+        for start in range(0, len(stale), self.batch_size):
+            payloads = source.retrieve(stale[start:start + self.batch_size], PRODUCT_FIELDS)
+            self._ingest(list(payloads.items()), shadow)
+        self._update(stale=len(stale), removed=len(removed))
+    
+    def _replay_writes(self, source: QdrantStore, target: QdrantStore, since: float, newer_only: bool = False) -> float:
+        """Re-index products written to source since the timestamp whose content differs in target; returns the next mark.
+        
+        With newer_only a product is left alone when target holds a later write of it.
+        """
+        mark = time.time()
+        written = {product_id: payload
+                   for page in source.changed_since(since - CLOCK_SKEW_SECONDS, ['content_hash', 'indexed_at'], SCROLL_BATCH)
+                   for product_id, payload in page}
+        ids = list(written)
+        current = {}
+        for start in range(0, len(ids), SCROLL_BATCH):
+            current.update(target.retrieve(ids[start:start + SCROLL_BATCH], ['content_hash', 'indexed_at']))
+        
+        stale = []
+        for product_id, payload in written.items():
+            existing = current.get(product_id)
+            if existing is None:
+                stale.append(product_id)
+            elif existing.get('content_hash') != payload.get('content_hash'):
+                if not newer_only or (existing.get('indexed_at') or 0) < (payload.get('indexed_at') or 0):
+                    stale.append(product_id)
+        logger.info(f"Reindex replay into {target.collection_name}: {len(written)} written since the mark, {len(stale)} stale")
+        
+        for start in range(0, len(stale), self.batch_size):
+            payloads = source.retrieve(stale[start:start + self.batch_size], PRODUCT_FIELDS)
+            self._ingest(list(payloads.items()), target)
+        with self._lock:
+            self._status["replayed"] = self._status.get("replayed", 0) + len(stale)
+        return mark
+    
+    def _wait_until_ready(self, shadow: QdrantStore):
+        deadline = time.monotonic() + self.ready_timeout
+        while self.store.client.get_collection(shadow.collection_name).status != self.store.models.CollectionStatus.GREEN:
+            if time.monotonic() > deadline:
+                raise ReindexVerificationError(f"{shadow.collection_name} was not indexed within {self.ready_timeout}s")
+            time.sleep(1)
+    
+    def _sample_titles(self, shadow: QdrantStore) -> List[tuple]:
+        """Uniform sample of (id, title) in one pass over the collection (reservoir sampling)."""
+        sample, seen = [], 0
+        for page in shadow.scroll(['title'], SCROLL_BATCH):
+            for product_id, payload in page:
+                if not payload.get('title'):
+                    continue
+                seen += 1
+                if len(sample) < self.sample_size:
+                    sample.append((product_id, payload['title']))
+                else:
+                    slot = random.randrange(seen)
+                    if slot < self.sample_size:
+                        sample[slot] = (product_id, payload['title'])
+        return sample
+    
+    def _verify(self, source: QdrantStore, shadow: QdrantStore) -> dict:
+        """Compare point counts and check that a sample of titles finds its own product."""
+        client = self.store.client
+        source_points = client.count(source.collection_name, exact=True).count
+        shadow_points = client.count(shadow.collection_name, exact=True).count
+        if shadow_points < source_points * self.min_point_ratio:
+            raise ReindexVerificationError(f"Shadow has {shadow_points} points, live collection {source_points}")
+        
+        sample = self._sample_titles(shadow)
+        recall = None
+        if sample:
+            vectors = self.embed_texts([title for _, title in sample])
+            hits = shadow.search_batch([(vector, {"limit": self.recall_k}) for vector in vectors])
+            found = sum(1 for (product_id, _), results in zip(sample, hits) if product_id in {hit.id for hit in results})
+            recall = found / len(sample)
+            if recall < self.min_recall:
+                raise ReindexVerificationError(f"Sample recall@{self.recall_k} is {recall:.3f}, below {self.min_recall}")
+        
+        logger.info(f"Reindex verified: {shadow_points}/{source_points} points, recall@{self.recall_k} {recall}")
+        return {"source_points": source_points, "shadow_points": shadow_points,
+                "sample_size": len(sample), f"recall_at_{self.recall_k}": recall}
+    
+    def _collect_garbage(self, current: str) -> List[str]:
+        """Drop versions older than the newest keep_versions ones besides the current."""
+        previous = [name for _, name in collection_versions(self.store.client, self.store.collection_name) if name != current]
+        dropped = previous[:max(0, len(previous) - self.keep_versions)]
+        for name in dropped:
+            logger.info(f"Reindex: dropping old collection version {name}")
+            self.store.client.delete_collection(name)
+        return dropped
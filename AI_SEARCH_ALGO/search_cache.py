@@ -0,0 +1,99 @@
+"""
+Search Cache - TTL/LRU gyorsítótár a keresési eredményekhez
+Every entry remembers the collection generation it was computed at. Writes to
+the index bump the generation, so results computed before a write are never
+served afterwards. The TTL bounds staleness from writes made by other processes.
+"""
+
+from collections import OrderedDict
+import json
+import threading
+import time
+from typing import Optional
+
+
+def normalize_query(query: str) -> str:
+    # The embedding model is uncased and splits on whitespace
+    return " ".join(query.split()).lower()
+
+
+class SearchResultCache:
+    """Thread-safe LRU cache of search responses with TTL and generation checks."""
+    
+    def __init__(self, max_entries: int = 2000, ttl_seconds: float = 300.0):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.generation = 0
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+    
+    @staticmethod
+    def make_key(query: str, *params) -> tuple:
+        return (normalize_query(query),) + tuple(json.dumps(param, sort_keys=True) for param in params)
+    
+    def bump_generation(self):
+        """Invalidate every cached result; call after each write to the collection."""
+        with self._lock:
+            self.generation += 1
+            self.invalidations += 1
+    
+    def current_generation(self) -> int:
+        with self._lock:
+            return self.generation
+    
+    def _remove(self, key):
+        _, _, _, size = self._entries.pop(key)
+        self._bytes -= size
+    
+    def get(self, key: tuple) -> Optional[dict]:
+        if self.max_entries <= 0:
+            return None
+        
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                value, generation, stored_at, _ = entry
+                if generation == self.generation and time.monotonic() - stored_at < self.ttl_seconds:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+                self._remove(key)
+            self.misses += 1
+            return None
+    
+    def put(self, key: tuple, value: dict, generation: int):
+        """Store a result computed at the given generation (read before the search ran)."""
+        if self.max_entries <= 0:
+            return
+        
+        size = len(json.dumps(value))
+        with self._lock:
+            if generation != self.generation:
+                return
+            if key in self._entries:
+                self._remove(key)
+            
+            self._entries[key] = (value, generation, time.monotonic(), size)
+            self._bytes += size
+            
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+    
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "approx_bytes": self._bytes,
+                "generation": self.generation,
+                "invalidations": self.invalidations,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": self.hits / lookups if lookups else 0.0
+            }
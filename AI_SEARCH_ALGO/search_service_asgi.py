@@ -0,0 +1,378 @@
+"""
+Search Service (ASGI) - Aszinkron kiszolgálási mód a keresőszolgáltatáshoz
+Serves the same routes as search_service_flask.py from a single event loop:
+- /search, /search_batch and /index run natively async. Embeddings go over
+  aiohttp, Qdrant through AsyncQdrantClient and Gemini through
+  generate_content_async, so a waiting request holds no thread.
+- every other route is the Flask app itself, run in the loop's thread pool
+  through hypercorn's WSGI adapter, so its behaviour stays identical.
+The search cache, keyword index, keyword cache, job queue and metrics are the
+Flask module's own objects, shared by both sides. Needs quart, hypercorn and
+aiohttp.
+
+Usage: hypercorn search_service_asgi:app --bind 0.0.0.0:8001
+"""
+
+import asyncio
+import logging
+import os
+import time
+from typing import List, Tuple
+
+from hypercorn.middleware import AsyncioWSGIMiddleware
+from quart import Quart, g, jsonify, request
+
+import search_service_flask as service
+from embedder import create_async_embedder
+from http_client import AsyncResilientHttpClient, CircuitOpenError
+from metrics import metrics
+from vector_store import create_async_vector_store
+
+logger = logging.getLogger(__name__)
+
+ASYNC_ROUTES = {"/search", "/search_batch", "/index"}
+ASYNC_EMBEDDING_POOL_SIZE = int(os.getenv("ASYNC_EMBEDDING_POOL_SIZE", "200"))
+ASGI_MAX_BODY_BYTES = int(os.getenv("ASGI_MAX_BODY_BYTES", str(64 * 1024 * 1024)))  # for the Flask routes
+
+async_app = Quart(__name__)
+
+# Created on the serving loop, see open_clients()
+embedder = None
+vector_store = None
+
+
+@async_app.before_serving
+async def open_clients():
+    global embedder, vector_store
+    
+    service.ensure_collection_exists()
+    client = AsyncResilientHttpClient(
+        service.EMBEDDING_SERVICE_URL,
+        timeout=service.EMBEDDING_TIMEOUT_SECONDS,
+        max_retries=service.EMBEDDING_MAX_RETRIES,
+        pool_size=ASYNC_EMBEDDING_POOL_SIZE,
+        # One breaker for both clients: they talk to the same embedding service
+        breaker=service.embedding_client.breaker
+    )
+    embedder = create_async_embedder(service.embedder, client)
+    vector_store = create_async_vector_store(service.vector_store)
+    service.start_background_workers()
+    logger.info("Async search service initialized")
+
+
+@async_app.after_serving
+async def close_clients():
+    await embedder.close()
+    await vector_store.close()
+
+
+@async_app.before_request
+async def start_request_timer():
+    g.metrics_start = time.perf_counter()
+    g.metrics_status = 500
+    metrics.gauge_add("http_requests_in_flight", 1)
+
+
+@async_app.after_request
+async def record_status(response):
+    g.metrics_status = response.status_code
+    return response
+
+
+@async_app.teardown_request
+async def observe_request(exception):
+    start = getattr(g, "metrics_start", None)
+    if start is None:
+        return
+    route = request.url_rule.rule if request.url_rule is not None else "unmatched"
+    status = 500 if exception is not None else g.metrics_status
+    metrics.observe("http_request_duration_seconds", time.perf_counter() - start,
+                    route=route, method=request.method, status=status)
+    metrics.gauge_add("http_requests_in_flight", -1)
+    if status >= 500:
+        metrics.inc("http_request_errors_total", route=route, method=request.method)
+
+
+async def extract_keywords(title: str, description: str) -> List[str]:
+    """Async counterpart of extract_keywords_with_gemini"""
+    # The keyword cache and job queue are SQLite: their calls may wait on file locks, so never on the loop
+    cached = await asyncio.to_thread(service.keyword_cache.get, title, description)
+    if cached is not None:
+        return cached
+    
+    try:
+        with metrics.time_stage("gemini_keywords"):
+            response = await service.gemini_model.generate_content_async(service.keyword_prompt(title, description))
+        metrics.record_llm_usage(service.GEMINI_MODEL_NAME, "keywords", response)
+        keywords = service.parse_keywords(response.text)
+        
+        logger.info(f"Gemini keywords generated: {len(keywords)} items - {keywords[:5]}...")
+        await asyncio.to_thread(service.keyword_cache.put, title, description, keywords)
+        return keywords
+    
+    except Exception as e:
+        logger.error(f"Error in Gemini keyword extraction: {e}")
+        return service.fallback_keywords(title, description)
+
+
+async def get_embedding(text: str):
+    with metrics.time_stage("embed"):
+        return await embedder.embed(text)
+
+
+async def get_embeddings(texts: List[str]):
+    with metrics.time_stage("embed_batch"):
+        return await embedder.embed_batch(texts)
+
+
+async def fetch_payloads(ids: List[str], fields: List[str]) -> dict:
+    if not ids or not fields:
+        return {}
+    with metrics.time_stage("vector_retrieve"):
+        payloads = await vector_store.retrieve([int(item_id) for item_id in ids], fields)
+    return {str(product_id): payload for product_id, payload in payloads.items()}
+
+
+async def keyword_page(params: dict, keyword_hits: List[Tuple[str, float]]) -> dict:
+    """Response for a query answered by the keyword index alone"""
+    page = keyword_hits[params['offset']:params['offset'] + params['limit']]
+    payloads = await fetch_payloads([item_id for item_id, _ in page], params['fields'])
+    results = [{"id": item_id, "score": score, "payload": payloads.get(item_id)} for item_id, score in page]
+    return service.build_search_response(params, results, "keyword")
+
+
+async def rank_search_results(params: dict, keyword_hits: List[Tuple[str, float]], hits) -> tuple:
+    """Fusion may fetch payloads through the synchronous store, so it runs in a worker thread"""
+    if params['keyword_mode'] == "fusion" and keyword_hits:
+        return await asyncio.to_thread(service.rank_search_results, params, keyword_hits, hits)
+    return service.rank_search_results(params, keyword_hits, hits)
+
+
+async def index_single_product(product: dict):
+    """Extract keywords, embed and upsert one validated product"""
+    product_id = product['product_id']
+    
+    logger.info(f"Extracting keywords for product: {product_id}")
+    keywords = await extract_keywords(product['title'], product['description'])
+    embedding = await get_embedding(service.create_enriched_text(product['title'], product['description'], keywords))
+    payload = service.build_payload(product, keywords)
+    
+    with metrics.time_stage("vector_upsert"):
+        await vector_store.upsert([(product_id, embedding, payload)])
+    service.search_cache.bump_generation()
+    service.keyword_index.add(product_id, keywords, product['category'])
+    
+    logger.info(f"Product successfully indexed: {product_id}")
+
+
+@async_app.route('/index', methods=['POST'])
+async def index_product():
+    try:
+        data = await request.get_json()
+        
+        if not data:
+            return jsonify({"error": "JSON data required"}), 400
+        
+        error = service.validate_product(data)
+        if error:
+            return jsonify({"error": error}), 400
+        
+        product_id = data['product_id']
+        
+        if request.args.get('async', '').lower() == 'true' or data.get('async') is True:
+            fields = service.REQUIRED_PRODUCT_FIELDS + service.OPTIONAL_PRODUCT_FIELDS
+            product = {field: data[field] for field in fields if field in data}
+            job_id = await asyncio.to_thread(service.index_job_queue.enqueue, str(product_id), product)
+            logger.info(f"Indexing job queued for product {product_id}: {job_id}")
+            response = jsonify({
+                "status": "queued",
+                "message": f"Product '{product_id}' queued for indexing",
+                "product_id": product_id,
+                "job_id": job_id
+            })
+            response.headers["Location"] = f"/jobs/{job_id}"
+            return response, 202
+        
+        await index_single_product(data)
+        
+        return jsonify({
+            "status": "success",
+            "message": f"Product '{product_id}' successfully indexed",
+            "product_id": product_id
+        })
+    
+    except CircuitOpenError as e:
+        logger.warning(f"Embedding service unavailable, indexing rejected: {e}")
+        return jsonify({
+            "error": "Embedding service unavailable",
+            "message": str(e)
+        }), 503
+    
+    except Exception as e:
+        logger.error(f"Error indexing product: {e}")
+        return jsonify({
+            "error": "Product indexing failed",
+            "message": str(e)
+        }), 500
+
+
+@async_app.route('/search', methods=['POST'])
+async def search_products():
+    try:
+        params, error = service.parse_search_params(await request.get_json())
+        if error:
+            return jsonify({"error": error}), 400
+        
+        query = params['query']
+        cache_key = service.search_cache.make_key(query, params['limit'], params['offset'], params['score_threshold'],
+                                                  params['category_filter'], params['keyword_mode'], params['fields'])
+        cached = service.search_cache.get(cache_key)
+        if cached is not None:
+            logger.info(f"Search cache hit: {query}")
+            return jsonify({**cached, "query": query})
+        generation = service.search_cache.current_generation()
+        
+        keyword_hits = service.keyword_matches(params)
+        
+        if params['keyword_mode'] == "exact" and keyword_hits:
+            response = await keyword_page(params, keyword_hits)
+            logger.info(f"Keyword index answered search: {query} ({len(response['auction_ids'])} results)")
+            service.search_cache.put(cache_key, response, generation)
+            return jsonify(response)
+        
+        logger.info(f"Executing search: {query}")
+        search_embedding = await get_embedding(query)
+        
+        with metrics.time_stage("vector_search"):
+            search_results = await vector_store.search(
+                search_embedding, **service.vector_search_request(params, keyword_hits)
+            )
+        
+        logger.info(f"Search found {len(search_results)} results above threshold {params['score_threshold']}")
+        
+        results, ranking = await rank_search_results(params, keyword_hits, search_results)
+        response = service.build_search_response(params, results, ranking)
+        service.search_cache.put(cache_key, response, generation)
+        return jsonify(response)
+    
+    except CircuitOpenError as e:
+        logger.warning(f"Embedding service unavailable, search rejected: {e}")
+        return jsonify({
+            "error": "Embedding service unavailable",
+            "message": str(e)
+        }), 503
+    
+    except Exception as e:
+        logger.error(f"Error during search: {e}")
+        return jsonify({
+            "error": "Search error",
+            "message": str(e)
+        }), 500
+
+
+@async_app.route('/search_batch', methods=['POST'])
+async def search_products_batch():
+    """Run many searches with one embedding batch and one vector store batch search; results in input order"""
+    try:
+        data = await request.get_json()
+        
+        if not data or 'searches' not in data:
+            return jsonify({"error": "Missing 'searches' field"}), 400
+        
+        searches = data['searches']
+        
+        if not isinstance(searches, list) or not searches:
+            return jsonify({"error": "'searches' must be a non-empty list"}), 400
+        
+        if len(searches) > service.SEARCH_BATCH_MAX_QUERIES:
+            return jsonify({"error": f"At most {service.SEARCH_BATCH_MAX_QUERIES} searches are allowed per request"}), 400
+        
+        results = [None] * len(searches)
+        generation = service.search_cache.current_generation()
+        pending = []
+        
+        for i, search in enumerate(searches):
+            params, error = service.parse_search_params(search) if isinstance(search, dict) else (None, "Search must be a JSON object")
+            if error:
+                results[i] = {"error": error}
+                continue
+            
+            cache_key = service.search_cache.make_key(params['query'], params['limit'], params['offset'],
+                                                      params['score_threshold'], params['category_filter'],
+                                                      params['keyword_mode'], params['fields'])
+            cached = service.search_cache.get(cache_key)
+            if cached is not None:
+                results[i] = {**cached, "query": params['query']}
+                continue
+            
+            keyword_hits = service.keyword_matches(params)
+            if params['keyword_mode'] == "exact" and keyword_hits:
+                results[i] = await keyword_page(params, keyword_hits)
+                service.search_cache.put(cache_key, results[i], generation)
+                continue
+            
+            pending.append((i, params, keyword_hits, cache_key))
+        
+        if pending:
+            texts = list(dict.fromkeys(params['query'] for _, params, _, _ in pending))
+            embeddings = dict(zip(texts, await get_embeddings(texts)))
+            
+            logger.info(f"Batch search: {len(pending)} vector searches, {len(texts)} embeddings")
+            
+            with metrics.time_stage("vector_search_batch"):
+                batch_results = await vector_store.search_batch([
+                    (embeddings[params['query']], service.vector_search_request(params, keyword_hits))
+                    for _, params, keyword_hits, _ in pending
+                ])
+            
+            for (i, params, keyword_hits, cache_key), hits in zip(pending, batch_results):
+                page_results, ranking = await rank_search_results(params, keyword_hits, hits)
+                results[i] = service.build_search_response(params, page_results, ranking)
+                service.search_cache.put(cache_key, results[i], generation)
+        
+        return jsonify({
+            "total": len(searches),
+            "results": results
+        })
+    
+    except CircuitOpenError as e:
+        logger.warning(f"Embedding service unavailable, batch search rejected: {e}")
+        return jsonify({
+            "error": "Embedding service unavailable",
+            "message": str(e)
+        }), 503
+    
+    except Exception as e:
+        logger.error(f"Error during batch search: {e}")
+        return jsonify({
+            "error": "Batch search error",
+            "message": str(e)
+        }), 500
+
+
+class RouteDispatcher:
+    """ASGI entry point: the natively async routes go to Quart, every other route to the Flask app."""
+    
+    def __init__(self, asgi_app, wsgi_app, async_paths):
+        self.asgi_app = asgi_app
+        self.wsgi_app = AsyncioWSGIMiddleware(wsgi_app, max_body_size=ASGI_MAX_BODY_BYTES)
+        self.async_paths = async_paths
+    
+    async def __call__(self, scope, receive, send):
+        # Lifespan events go to Quart, which opens and closes the async clients
+        if scope["type"] == "http" and scope["path"] not in self.async_paths:
+            await self.wsgi_app(scope, receive, send)
+        else:
+            await self.asgi_app(scope, receive, send)
+
+
+app = RouteDispatcher(async_app, service.app, ASYNC_ROUTES)
+
+
+if __name__ == "__main__":
+    from hypercorn.asyncio import serve
+    from hypercorn.config import Config
+    
+    config = Config()
+    config.bind = ["0.0.0.0:8001"]
+    asyncio.run(serve(app, config))
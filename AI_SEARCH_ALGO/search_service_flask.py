@@ -2,63 +2,138 @@
 Search Service - Qdrant alapú vektorkereső szolgáltatás
 Ez a szolgáltatás a Qdrant vektordatabázissal kommunikál
 és az embedding service-t használja a szövegek vektorizálásához.
+With VECTOR_STORE_BACKEND=local it runs without Qdrant on a memory-mapped index in DATA_DIR.
 """
 
 from dotenv import load_dotenv
 load_dotenv()
 
 from flask import Flask, jsonify, request
-from qdrant_client import QdrantClient
-from qdrant_client.http import models
-import requests
+from werkzeug.serving import is_running_from_reloader
+import base64
+import hashlib
+import json
 import logging
 import os
+import threading
+import time
 import google.generativeai as genai
-from typing import List
+import numpy as np
+from typing import List, Tuple
+
+from collection_profiles import get_profile
+from embedder import create_embedder
+from http_client import CircuitBreaker, CircuitOpenError, ResilientHttpClient
+from job_queue import JobQueue
+from keyword_cache import KeywordCache
+from keyword_index import KeywordIndex, reciprocal_rank_fusion
+from metrics import metrics
+from reindex import Reindexer
+from search_cache import SearchResultCache
+from vector_store import create_vector_store
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 app = Flask(__name__)
+metrics.instrument_app(app)
 
 QDRANT_HOST = "localhost"
 QDRANT_PORT = 6333
 EMBEDDING_SERVICE_URL = "http://localhost:5001"
 COLLECTION_NAME = "auction_products"
 VECTOR_SIZE = 384  # all-MiniLM-L6-v2 model vector size
+VECTOR_STORE_BACKEND = os.getenv("VECTOR_STORE_BACKEND", "qdrant")  # "qdrant" or "local"
+COLLECTION_PROFILE = os.getenv("COLLECTION_PROFILE", "indexed")  # default, indexed, quantized or on_disk
+COLLECTION_MIGRATE = os.getenv("COLLECTION_MIGRATE", "true").lower() == "true"
+HNSW_M = int(os.getenv("HNSW_M", "16"))
+HNSW_EF_CONSTRUCT = int(os.getenv("HNSW_EF_CONSTRUCT", "100"))
+SEARCH_HNSW_EF = int(os.getenv("SEARCH_HNSW_EF")) if os.getenv("SEARCH_HNSW_EF") else None
+EMBEDDER_BACKEND = os.getenv("EMBEDDER_BACKEND", "remote")  # "remote" or "local"
+EMBEDDING_TIMEOUT_SECONDS = float(os.getenv("EMBEDDING_TIMEOUT_SECONDS", "10"))
+EMBEDDING_MAX_RETRIES = int(os.getenv("EMBEDDING_MAX_RETRIES", "2"))
+EMBEDDING_POOL_SIZE = int(os.getenv("EMBEDDING_POOL_SIZE", "20"))
+EMBEDDING_BREAKER_THRESHOLD = int(os.getenv("EMBEDDING_BREAKER_THRESHOLD", "5"))
+EMBEDDING_BREAKER_RESET_SECONDS = float(os.getenv("EMBEDDING_BREAKER_RESET_SECONDS", "30"))
+
+REQUIRED_PRODUCT_FIELDS = ['product_id', 'title', 'description', 'category']
+OPTIONAL_PRODUCT_FIELDS = ['updated_at', 'ends_at']  # Unix timestamps, stored in the payload
+INDEX_BATCH_MAX_PRODUCTS = int(os.getenv("INDEX_BATCH_MAX_PRODUCTS", "1000"))
+KEYWORD_BATCH_SIZE = int(os.getenv("KEYWORD_BATCH_SIZE", "10"))  # products per Gemini prompt
+EMBED_BATCH_SIZE = int(os.getenv("EMBED_BATCH_SIZE", "64"))  # texts per /embed_batch call
+UPSERT_BATCH_SIZE = int(os.getenv("UPSERT_BATCH_SIZE", "100"))  # points per vector store upsert
+DELETE_BATCH_SIZE = int(os.getenv("DELETE_BATCH_SIZE", "1000"))  # ids per vector store delete
+DELETE_MAX_IDS = int(os.getenv("DELETE_MAX_IDS", "10000"))  # per /delete request with product_ids
+SYNC_SCROLL_BATCH = int(os.getenv("SYNC_SCROLL_BATCH", "1000"))
+# Full reindex into a shadow collection (qdrant backend only)
+REINDEX_BATCH_SIZE = int(os.getenv("REINDEX_BATCH_SIZE", "100"))
+REINDEX_MAX_PRODUCTS_PER_SECOND = float(os.getenv("REINDEX_MAX_PRODUCTS_PER_SECOND", "50"))  # 0 = unthrottled
+REINDEX_KEEP_VERSIONS = int(os.getenv("REINDEX_KEEP_VERSIONS", "1"))  # previous versions kept for rollback
+REINDEX_MIN_POINT_RATIO = float(os.getenv("REINDEX_MIN_POINT_RATIO", "0.999"))
+REINDEX_SAMPLE_SIZE = int(os.getenv("REINDEX_SAMPLE_SIZE", "200"))
+REINDEX_MIN_RECALL = float(os.getenv("REINDEX_MIN_RECALL", "0.8"))
+
+DATA_DIR = os.getenv("SEARCH_DATA_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "data"))
+# Bump whenever the keyword prompts change; cached keywords from older versions are dropped
+KEYWORD_PROMPT_VERSION = os.getenv("KEYWORD_PROMPT_VERSION", "1")
+KEYWORD_CACHE_MAX_ENTRIES = int(os.getenv("KEYWORD_CACHE_MAX_ENTRIES", "200000"))
+INDEX_JOB_WORKERS = int(os.getenv("INDEX_JOB_WORKERS", "4"))
+INDEX_JOB_MAX_ATTEMPTS = int(os.getenv("INDEX_JOB_MAX_ATTEMPTS", "5"))
+SEARCH_CACHE_MAX_ENTRIES = int(os.getenv("SEARCH_CACHE_MAX_ENTRIES", "2000"))  # 0 disables the cache
+SEARCH_CACHE_TTL_SECONDS = float(os.getenv("SEARCH_CACHE_TTL_SECONDS", "300"))
+# "fusion": RRF of vector hits and keyword hits ranked by shared query words; "exact": queries
+# equal to a stored keyword skip vector search and return the matches by product id with
+# score 1.0, ignoring score_threshold
+KEYWORD_SEARCH_MODES = ("off", "exact", "fusion")
+KEYWORD_SEARCH_MODE = os.getenv("KEYWORD_SEARCH_MODE", "off")
+if KEYWORD_SEARCH_MODE not in KEYWORD_SEARCH_MODES:
+    raise ValueError(f"Unknown KEYWORD_SEARCH_MODE '{KEYWORD_SEARCH_MODE}', expected one of {', '.join(KEYWORD_SEARCH_MODES)}")
+KEYWORD_INDEX_REFRESH_SECONDS = float(os.getenv("KEYWORD_INDEX_REFRESH_SECONDS", "0"))  # 0 = only on startup
+KEYWORD_INDEX_SCROLL_BATCH = 1000
+SEARCH_MAX_LIMIT = int(os.getenv("SEARCH_MAX_LIMIT", "1000"))
+SEARCH_PAYLOAD_FIELDS = ['title', 'description', 'category', 'keywords']  # allowed in 'fields'
+SEARCH_BATCH_MAX_QUERIES = int(os.getenv("SEARCH_BATCH_MAX_QUERIES", "32"))
 
 genai.configure(api_key=os.getenv("GOOGLE_API_KEY"))
-gemini_model = genai.GenerativeModel('gemini-2.5-flash')
+GEMINI_MODEL_NAME = 'gemini-2.5-flash'
+gemini_model = genai.GenerativeModel(GEMINI_MODEL_NAME)
 
-qdrant_client = QdrantClient(host=QDRANT_HOST, port=QDRANT_PORT)
+vector_store = create_vector_store(
+    VECTOR_STORE_BACKEND,
+    host=QDRANT_HOST,
+    port=QDRANT_PORT,
+    collection_name=COLLECTION_NAME,
+    vector_size=VECTOR_SIZE,
+    profile=get_profile(COLLECTION_PROFILE, HNSW_M, HNSW_EF_CONSTRUCT, SEARCH_HNSW_EF),
+    migrate=COLLECTION_MIGRATE,
+    directory=os.path.join(DATA_DIR, "local_index", COLLECTION_NAME)
+)
+embedding_client = ResilientHttpClient(
+    EMBEDDING_SERVICE_URL,
+    timeout=EMBEDDING_TIMEOUT_SECONDS,
+    max_retries=EMBEDDING_MAX_RETRIES,
+    pool_size=EMBEDDING_POOL_SIZE,
+    breaker=CircuitBreaker(EMBEDDING_BREAKER_THRESHOLD, EMBEDDING_BREAKER_RESET_SECONDS)
+)
+embedder = create_embedder(EMBEDDER_BACKEND, EMBEDDING_SERVICE_URL, embedding_client)
+keyword_cache = KeywordCache(
+    os.path.join(DATA_DIR, "keyword_cache.db"),
+    KEYWORD_PROMPT_VERSION,
+    max_entries=KEYWORD_CACHE_MAX_ENTRIES
+)
+search_cache = SearchResultCache(SEARCH_CACHE_MAX_ENTRIES, SEARCH_CACHE_TTL_SECONDS)
+keyword_index = KeywordIndex(enabled=KEYWORD_SEARCH_MODE != "off")
 
 def ensure_collection_exists():
-    """Create collection if it doesn't exist"""
+    """Create collection if it doesn't exist, or migrate it to the configured profile"""
     try:
-        collections = qdrant_client.get_collections()
-        collection_names = [col.name for col in collections.collections]
-        
-        if COLLECTION_NAME not in collection_names:
-            logger.info(f"Creating collection: {COLLECTION_NAME}")
-            qdrant_client.create_collection(
-                collection_name=COLLECTION_NAME,
-                vectors_config=models.VectorParams(
-                    size=VECTOR_SIZE,
-                    distance=models.Distance.COSINE
-                )
-            )
-            logger.info("Collection successfully created")
-        else:
-            logger.info("Collection already exists")
-            
+        vector_store.ensure_collection()
     except Exception as e:
         logger.error(f"Error checking collection: {e}")
         raise
 
-def extract_keywords_with_gemini(title: str, description: str) -> List[str]:
-    """Extract keywords using Gemini LLM"""
-    try:
-        prompt = f"""
+def keyword_prompt(title: str, description: str) -> str:
+    return f"""
         Please extract the most important search keywords from the following auction item description.
         
         Title: {title}
@@ -75,41 +150,330 @@ def extract_keywords_with_gemini(title: str, description: str) -> List[str]:
         Example output: volkswagen, beetle, car, vehicle, vintage, classic, 1970, german, bug, retro, grey
         """
         
-        response = gemini_model.generate_content(prompt)
-        keywords_text = response.text.strip()
+def parse_keywords(keywords_text: str) -> List[str]:
+    return [kw.strip().lower() for kw in keywords_text.strip().split(',') if kw.strip()]
+
+def extract_keywords_with_gemini(title: str, description: str) -> List[str]:
+    """Extract keywords using Gemini LLM"""
+    cached = keyword_cache.get(title, description)
+    if cached is not None:
+        return cached
+    
+    try:
+        prompt = keyword_prompt(title, description)
         
-        keywords = [kw.strip().lower() for kw in keywords_text.split(',') if kw.strip()]
+        with metrics.time_stage("gemini_keywords"):
+            response = gemini_model.generate_content(prompt)
+        metrics.record_llm_usage(GEMINI_MODEL_NAME, "keywords", response)
+        keywords = parse_keywords(response.text)
         
         logger.info(f"Gemini keywords generated: {len(keywords)} items - {keywords[:5]}...")
+        keyword_cache.put(title, description, keywords)
         return keywords
         
     except Exception as e:
         logger.error(f"Error in Gemini keyword extraction: {e}")
-        words = f"{title} {description}".lower().split()
-        return list(set([w for w in words if len(w) > 3]))[:10]
+        return fallback_keywords(title, description)
+
+def fallback_keywords(title: str, description: str) -> List[str]:
+    """Plain word split used when Gemini is unavailable"""
+    words = f"{title} {description}".lower().split()
+    return list(set([w for w in words if len(w) > 3]))[:10]
+
+def extract_keywords_batch_with_gemini(products: List[dict]) -> List[List[str]]:
+    """Extract keywords for several products with a single Gemini prompt, skipping cached ones"""
+    results = [keyword_cache.get(product['title'], product['description']) for product in products]
+    missing = [i for i, keywords in enumerate(results) if keywords is None]
+    
+    if missing:
+        generated = _generate_keywords_batch([products[i] for i in missing])
+        for i, keywords in zip(missing, generated):
+            results[i] = keywords
+    
+    return results
+
+def _generate_keywords_batch(products: List[dict]) -> List[List[str]]:
+    items_text = "\n".join(
+        f"[{i}] Title: {product['title']}\n    Description: {product['description']}"
+        for i, product in enumerate(products)
+    )
+    prompt = f"""
+        Please extract the most important search keywords for each of the following auction item descriptions.
+        
+        {items_text}
+        
+        Rules for each item:
+        1. Return 10-40 relevant keywords and expressions (depending on the length and detail of the description)
+        2. Use both English and original language words if relevant
+        3. Include brand, type, condition, color, size information
+        4. Add synonyms as well (e.g. car, vehicle, automobile)
+        5. Do not include advertising phrases or unnecessary words like "for sale", "auction", "buy now", etc.
+        
+        Return only a JSON object that maps each item number to its keywords as one comma-separated string.
+        Example output: {{"0": "volkswagen, beetle, car, vehicle, vintage, classic, 1970, german, bug, retro, grey", "1": "..."}}
+        """
+    
+    try:
+        with metrics.time_stage("gemini_keywords_batch"):
+            response = gemini_model.generate_content(
+                prompt,
+                generation_config={"response_mime_type": "application/json"}
+            )
+        metrics.record_llm_usage(GEMINI_MODEL_NAME, "keywords_batch", response)
+        parsed = json.loads(response.text)
+        if not isinstance(parsed, dict):
+            raise ValueError("Gemini batch response is not a JSON object")
+    except Exception as e:
+        # The whole prompt failed, so another Gemini call per item would most likely fail too
+        logger.error(f"Error in Gemini batch keyword extraction: {e}")
+        return [fallback_keywords(product['title'], product['description']) for product in products]
+    
+    results = []
+    for i, product in enumerate(products):
+        keywords_text = parsed.get(str(i))
+        if isinstance(keywords_text, list):
+            keywords_text = ", ".join(str(kw) for kw in keywords_text)
+        
+        if keywords_text:
+            keywords = parse_keywords(keywords_text)
+            keyword_cache.put(product['title'], product['description'], keywords)
+            results.append(keywords)
+        else:
+            logger.warning(f"Item {i} missing from Gemini batch response, extracting it alone")
+            results.append(extract_keywords_with_gemini(product['title'], product['description']))
+    
+    logger.info(f"Gemini batch keywords generated for {len(products)} products")
+    return results
 
 def create_enriched_text(title: str, description: str, keywords: List[str]) -> str:
     keywords_text = " ".join(keywords)
     return f"{title} {description} {keywords_text}"
 
-def get_embedding(text: str) -> List[float]:
+def get_embedding(text: str) -> np.ndarray:
+    with metrics.time_stage("embed"):
+        return embedder.embed(text)
+
+def get_embeddings(texts: List[str]) -> np.ndarray:
+    with metrics.time_stage("embed_batch"):
+        return embedder.embed_batch(texts)
+
+def validate_product(data: dict) -> str:
+    """Return an error message for an invalid product, or None"""
+    for field in REQUIRED_PRODUCT_FIELDS:
+        if field not in data:
+            return f"Missing field: {field}"
+    
+    if not isinstance(data['product_id'], int):
+        return "product_id must be an integer"
+    
+    for field in OPTIONAL_PRODUCT_FIELDS:
+        if not isinstance(data.get(field, 0), (int, float)):
+            return f"{field} must be a Unix timestamp"
+    
+    return None
+
+def content_hash(title: str, description: str, category: str) -> str:
+    """SHA-256 of the indexed fields; /sync manifests may send it precomputed"""
+    content = json.dumps([title, description, category], ensure_ascii=False, separators=(',', ':'))
+    return hashlib.sha256(content.encode('utf-8')).hexdigest()
+
+def build_payload(product: dict, keywords: List[str]) -> dict:
+    return {
+        "title": product['title'],
+        "description": product['description'],
+        "category": product['category'],
+        "keywords": keywords,
+        "content_hash": content_hash(product['title'], product['description'], product['category']),
+        "updated_at": product.get('updated_at'),
+        "ends_at": product.get('ends_at'),
+        # Write time; a reindex replays writes made by other processes while it ran
+        "indexed_at": time.time()
+    }
+
+def chunked(items: list, size: int):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+def index_single_product(product: dict):
+    """Extract keywords, embed and upsert one validated product"""
+    product_id = product['product_id']
+    title = product['title']
+    description = product['description']
+    category = product['category']
+    
+    logger.info(f"Extracting keywords for product: {product_id}")
+    keywords = extract_keywords_with_gemini(title, description)
+    
+    enriched_text = create_enriched_text(title, description, keywords)
+    
+    logger.info(f"Generating embedding for product: {product_id}")
+    embedding = get_embedding(enriched_text)
+    
+    payload = build_payload(product, keywords)
+    
+    with metrics.time_stage("vector_upsert"):
+        vector_store.upsert([(product_id, embedding, payload)])
+    search_cache.bump_generation()
+    keyword_index.add(product_id, keywords, category)
+    
+    logger.info(f"Product successfully indexed: {product_id}")
+
+def prepare_points(products: List[tuple], fail) -> List[tuple]:
+    """(index, point) for validated (index, product) pairs via batched keyword prompts and embeddings; embedding failures go to fail"""
+    keywords = {}
+    for chunk in chunked(products, KEYWORD_BATCH_SIZE):
+        chunk_keywords = extract_keywords_batch_with_gemini([product for _, product in chunk])
+        for (i, _), product_keywords in zip(chunk, chunk_keywords):
+            keywords[i] = product_keywords
+    
+    points = []
+    for chunk in chunked(products, EMBED_BATCH_SIZE):
+        texts = [create_enriched_text(product['title'], product['description'], keywords[i]) for i, product in chunk]
+        try:
+            embeddings = get_embeddings(texts)
+        except Exception as e:
+            logger.error(f"Batch embedding failed for {len(chunk)} products: {e}")
+            for i, _ in chunk:
+                fail(i, f"Embedding failed: {e}")
+            continue
+        
+        for (i, product), embedding in zip(chunk, embeddings):
+            payload = build_payload(product, keywords[i])
+            points.append((i, (product['product_id'], embedding, payload)))
+    return points
+
+def index_products(products: list) -> List[dict]:
+    """Index many products: batched keyword prompts, batched embeddings, chunked upserts; one result per product"""
+    results = [None] * len(products)
+    
+    def fail(index, error):
+        product = products[index]
+        product_id = product.get('product_id') if isinstance(product, dict) else None
+        results[index] = {"index": index, "product_id": product_id, "status": "error", "error": error}
+    
+    valid = []
+    for i, product in enumerate(products):
+        error = validate_product(product) if isinstance(product, dict) else "Product must be a JSON object"
+        if error:
+            fail(i, error)
+        else:
+            valid.append((i, product))
+    
+    logger.info(f"Batch indexing {len(valid)} of {len(products)} products")
+    
+    points = prepare_points(valid, fail)
+    
+    for chunk in chunked(points, UPSERT_BATCH_SIZE):
+        try:
+            with metrics.time_stage("vector_upsert"):
+                vector_store.upsert([point for _, point in chunk])
+        except Exception as e:
+            logger.error(f"Batch upsert failed for {len(chunk)} products: {e}")
+            for i, _ in chunk:
+                fail(i, f"Upsert failed: {e}")
+            continue
+        finally:
+            search_cache.bump_generation()
+        
+        for i, (product_id, _, payload) in chunk:
+            keyword_index.add(product_id, payload['keywords'], payload['category'])
+            results[i] = {"index": i, "product_id": product_id, "status": "success"}
+    
+    return results
+
+def delete_products(product_ids: List[int], known_to_exist: bool = False) -> int:
+    """Delete ids from the store in chunks, one delete call each; returns how many of them were indexed
+    
+    Unless the caller found the ids in the store itself, the store counts the
+    ones that existed (see VectorStore.delete).
+    """
+    deleted = 0
     try:
-        response = requests.post(
-            f"{EMBEDDING_SERVICE_URL}/embed",
-            json={"text": text},
-            timeout=30
-        )
-        response.raise_for_status()
-        
-        data = response.json()
-        return data["embedding"]
-        
-    except requests.exceptions.RequestException as e:
-        logger.error(f"Error communicating with embedding service: {e}")
-        raise
-    except KeyError as e:
-        logger.error(f"Missing field in embedding response: {e}")
-        raise
+        for chunk in chunked(product_ids, DELETE_BATCH_SIZE):
+            with metrics.time_stage("vector_delete"):
+                deleted += vector_store.delete(chunk, count_existing=not known_to_exist)
+            for product_id in chunk:
+                keyword_index.remove(product_id)
+    finally:
+        search_cache.bump_generation()
+    return deleted
+
+def delete_matching(category: str = None, ended_before: float = None) -> int:
+    """Delete every product matching the filter, one page of ids per delete round-trip"""
+    deleted = 0
+    for page in vector_store.find_ids(category=category, ends_before=ended_before, batch_size=DELETE_BATCH_SIZE):
+        if page:
+            deleted += delete_products(page, known_to_exist=True)
+    return deleted
+
+def scroll_keyword_pages():
+    """Yield (id, keywords, category) pages of the whole collection"""
+    for page in vector_store.scroll(["keywords", "category"], KEYWORD_INDEX_SCROLL_BATCH):
+        yield [(product_id, payload.get('keywords'), payload.get('category')) for product_id, payload in page]
+
+def rebuild_keyword_index():
+    """Reload the keyword index; results cached before may have used the old one"""
+    keyword_index.rebuild(scroll_keyword_pages)
+    search_cache.bump_generation()
+
+def maintain_keyword_index():
+    """Build the keyword index from the collection, then refresh it on an interval"""
+    while True:
+        try:
+            rebuild_keyword_index()
+        except Exception as e:
+            logger.error(f"Keyword index rebuild failed, retrying in 30s: {e}")
+            time.sleep(30)
+            continue
+        
+        if KEYWORD_INDEX_REFRESH_SECONDS <= 0:
+            return
+        time.sleep(KEYWORD_INDEX_REFRESH_SECONDS)
+
+keyword_index_thread = threading.Thread(target=maintain_keyword_index, name="keyword-index", daemon=True)
+keyword_index_thread_lock = threading.Lock()
+
+index_job_queue = JobQueue(
+    os.path.join(DATA_DIR, "index_jobs.db"),
+    index_single_product,
+    num_workers=INDEX_JOB_WORKERS,
+    max_attempts=INDEX_JOB_MAX_ATTEMPTS
+)
+
+def build_reindex_points(products: List[dict]) -> list:
+    """Points for a reindex batch; products whose embedding fails are left out"""
+    return [point for _, point in prepare_points(list(enumerate(products)), lambda i, error: None)]
+
+def after_reindex_switch():
+    """Cached results and keywords came from the previous collection version"""
+    search_cache.bump_generation()
+    if keyword_index.enabled:
+        rebuild_keyword_index()
+
+reindexer = Reindexer(
+    vector_store,
+    build_reindex_points,
+    get_embeddings,
+    after_reindex_switch,
+    batch_size=REINDEX_BATCH_SIZE,
+    max_products_per_second=REINDEX_MAX_PRODUCTS_PER_SECOND,
+    keep_versions=REINDEX_KEEP_VERSIONS,
+    min_point_ratio=REINDEX_MIN_POINT_RATIO,
+    sample_size=REINDEX_SAMPLE_SIZE,
+    min_recall=REINDEX_MIN_RECALL
+) if VECTOR_STORE_BACKEND == "qdrant" else None
+
+def start_background_workers():
+    """Start the index job workers and the keyword index thread, once per serving process
+    
+    Called by the serving entry points, not at import: bulk_import and other
+    importers must not run workers against the serving process' job store.
+    """
+    index_job_queue.start()
+    if keyword_index.enabled:
+        with keyword_index_thread_lock:
+            if keyword_index_thread.ident is None:
+                keyword_index_thread.start()
 
 @app.route('/index', methods=['POST'])
 def index_product():
@@ -119,52 +483,40 @@ def index_product():
         if not data:
             return jsonify({"error": "JSON data required"}), 400
         
-        required_fields = ['product_id', 'title', 'description', 'category']
-        for field in required_fields:
-            if field not in data:
-                return jsonify({"error": f"Missing field: {field}"}), 400
+        error = validate_product(data)
+        if error:
+            return jsonify({"error": error}), 400
         
         product_id = data['product_id']
-        title = data['title']
-        description = data['description']
-        category = data['category']
-        
-        if not isinstance(product_id, int):
-            return jsonify({"error": "product_id must be an integer"}), 400
-        
-        logger.info(f"Extracting keywords for product: {product_id}")
-        keywords = extract_keywords_with_gemini(title, description)
-        
-        enriched_text = create_enriched_text(title, description, keywords)
         
-        logger.info(f"Generating embedding for product: {product_id}")
-        embedding = get_embedding(enriched_text)
+        if request.args.get('async', '').lower() == 'true' or data.get('async') is True:
+            product = {field: data[field] for field in REQUIRED_PRODUCT_FIELDS + OPTIONAL_PRODUCT_FIELDS if field in data}
+            job_id = index_job_queue.enqueue(str(product_id), product)
+            logger.info(f"Indexing job queued for product {product_id}: {job_id}")
+            response = jsonify({
+                "status": "queued",
+                "message": f"Product '{product_id}' queued for indexing",
+                "product_id": product_id,
+                "job_id": job_id
+            })
+            response.headers["Location"] = f"/jobs/{job_id}"
+            return response, 202
         
-        payload = {
-            "title": title,
-            "description": description,
-            "category": category,
-            "keywords": keywords
-        }
+        index_single_product(data)
         
-        qdrant_client.upsert(
-            collection_name=COLLECTION_NAME,
-            points=[
-                models.PointStruct(
-                    id=product_id,
-                    vector=embedding,
-                    payload=payload
-                )
-            ]
-        )
-        
-        logger.info(f"Product successfully indexed: {product_id}")
         return jsonify({
             "status": "success",
             "message": f"Product '{product_id}' successfully indexed",
             "product_id": product_id
         })
         
+    except CircuitOpenError as e:
+        logger.warning(f"Embedding service unavailable, indexing rejected: {e}")
+        return jsonify({
+            "error": "Embedding service unavailable",
+            "message": str(e)
+        }), 503
+    
     except Exception as e:
         logger.error(f"Error indexing product: {e}")
         return jsonify({
@@ -172,61 +524,364 @@ def index_product():
             "message": str(e)
         }), 500
 
+@app.route('/jobs/<job_id>', methods=['GET'])
+def get_job(job_id):
+    """Status of an asynchronous indexing job"""
+    job = index_job_queue.get(job_id)
+    if job is None:
+        return jsonify({"error": f"Job '{job_id}' not found"}), 404
+    return jsonify(job)
+
+@app.route('/jobs/stats', methods=['GET'])
+def job_stats():
+    """Indexing queue depth and job counts by status"""
+    return jsonify(index_job_queue.stats())
+
+@app.route('/index_batch', methods=['POST'])
+def index_products_batch():
+    """Index a batch of products, reporting the outcome per product"""
+    try:
+        data = request.get_json()
+        
+        if not data or 'products' not in data:
+            return jsonify({"error": "Missing 'products' field"}), 400
+        
+        products = data['products']
+        
+        if not isinstance(products, list) or not products:
+            return jsonify({"error": "'products' must be a non-empty list"}), 400
+        
+        if len(products) > INDEX_BATCH_MAX_PRODUCTS:
+            return jsonify({"error": f"At most {INDEX_BATCH_MAX_PRODUCTS} products are allowed per request"}), 400
+        
+        results = index_products(products)
+        
+        indexed = sum(1 for result in results if result["status"] == "success")
+        logger.info(f"Batch indexing finished: {indexed} indexed, {len(products) - indexed} failed")
+        return jsonify({
+            "status": "completed",
+            "total": len(products),
+            "indexed": indexed,
+            "failed": len(products) - indexed,
+            "results": results
+        })
+    
+    except Exception as e:
+        logger.error(f"Error in batch indexing: {e}")
+        return jsonify({
+            "error": "Batch indexing failed",
+            "message": str(e)
+        }), 500
+
+def scroll_sync_state() -> dict:
+    """Map every stored id to its content_hash, updated_at and ends_at, in one pass over the collection"""
+    stored = {}
+    for page in vector_store.scroll(["content_hash", "updated_at", "ends_at"], SYNC_SCROLL_BATCH):
+        for product_id, payload in page:
+            stored[product_id] = payload
+    return stored
+
+def has_product_fields(entry: dict) -> bool:
+    return all(field in entry for field in REQUIRED_PRODUCT_FIELDS)
+
+def manifest_entry_changed(entry: dict, stored) -> bool:
+    """Whether a manifest entry differs from the stored point; points indexed before hashing always count as changed"""
+    if stored is None:
+        return True
+    
+    entry_hash = entry.get('content_hash')
+    if entry_hash is None and has_product_fields(entry):
+        entry_hash = content_hash(entry['title'], entry['description'], entry['category'])
+    if entry_hash is not None:
+        return entry_hash != stored.get('content_hash')
+    
+    return stored.get('updated_at') is None or entry['updated_at'] > stored['updated_at']
+
+def validate_manifest_entry(entry) -> str:
+    """Return an error message for an invalid manifest entry, or None"""
+    if not isinstance(entry, dict):
+        return "Manifest entry must be a JSON object"
+    if not isinstance(entry.get('product_id'), int):
+        return "product_id must be an integer"
+    if 'content_hash' in entry and not isinstance(entry['content_hash'], str):
+        return "content_hash must be a string"
+    for field in OPTIONAL_PRODUCT_FIELDS:
+        if not isinstance(entry.get(field, 0), (int, float)):
+            return f"{field} must be a Unix timestamp"
+    if 'content_hash' not in entry and 'updated_at' not in entry and not has_product_fields(entry):
+        return "Entry needs content_hash, updated_at or the product fields"
+    return None
+
+@app.route('/sync', methods=['POST'])
+def sync_index():
+    """Bring the index in line with a catalogue manifest, re-indexing only changed items
+    
+    Each manifest entry has a product_id and a content_hash (see content_hash())
+    or an updated_at timestamp. Entries may also carry title, description and
+    category: changed ones are then re-indexed right away, changed ones without
+    them are returned in 'needs_content' for the caller to send again. ends_at
+    is not part of the content hash; for unchanged entries a different ends_at
+    is written to the stored payload without re-indexing. Stored ids missing
+    from the manifest are deleted unless delete_missing is false.
+    At most INDEX_BATCH_MAX_PRODUCTS products are re-indexed per call; the ids
+    of the rest come back in 'remaining' with status 'partial', and sending
+    the same manifest again continues where this call stopped.
+    """
+    try:
+        data = request.get_json()
+        
+        if not data or 'manifest' not in data:
+            return jsonify({"error": "Missing 'manifest' field"}), 400
+        
+        manifest = data['manifest']
+        delete_missing = data.get('delete_missing', True)
+        dry_run = data.get('dry_run', False)
+        
+        # An empty manifest would delete the whole index
+        if not isinstance(manifest, list) or not manifest:
+            return jsonify({"error": "'manifest' must be a non-empty list"}), 400
+        
+        for i, entry in enumerate(manifest):
+            error = validate_manifest_entry(entry)
+            if error:
+                return jsonify({"error": f"Manifest entry {i}: {error}"}), 400
+        
+        stored = scroll_sync_state()
+        manifest_ids = {entry['product_id'] for entry in manifest}
+        changed = [entry for entry in manifest if manifest_entry_changed(entry, stored.get(entry['product_id']))]
+        to_index = [entry for entry in changed if has_product_fields(entry)]
+        remaining = [entry['product_id'] for entry in to_index[INDEX_BATCH_MAX_PRODUCTS:]]
+        needs_content = [entry['product_id'] for entry in changed if not has_product_fields(entry)]
+        changed_ids = {entry['product_id'] for entry in changed}
+        to_refresh = {entry['product_id']: {'ends_at': entry['ends_at']} for entry in manifest
+                      if 'ends_at' in entry and entry['product_id'] not in changed_ids
+                      and entry['ends_at'] != stored[entry['product_id']].get('ends_at')}
+        vanished = sorted(product_id for product_id in stored if product_id not in manifest_ids) if delete_missing else []
+        
+        logger.info(f"Sync diff: {len(manifest)} in manifest, {len(stored)} stored, {len(changed)} changed, "
+                    f"{len(vanished)} vanished")
+        
+        response = {
+            "status": "dry_run" if dry_run else "partial" if remaining else "completed",
+            "manifest": len(manifest),
+            "stored": len(stored),
+            "unchanged": len(manifest) - len(changed),
+            "changed": len(changed),
+            "needs_content": needs_content,
+            "vanished": len(vanished)
+        }
+        if dry_run:
+            response["to_index"] = [entry['product_id'] for entry in to_index]
+            response["to_refresh"] = sorted(to_refresh)
+            response["to_delete"] = vanished
+            return jsonify(response)
+        
+        products = [{field: entry[field] for field in REQUIRED_PRODUCT_FIELDS + OPTIONAL_PRODUCT_FIELDS if field in entry}
+                    for entry in to_index[:INDEX_BATCH_MAX_PRODUCTS]]
+        results = index_products(products) if products else []
+        failed = [result for result in results if result["status"] != "success"]
+        
+        response["indexed"] = len(results) - len(failed)
+        response["failed"] = len(failed)
+        response["errors"] = failed
+        response["remaining"] = remaining
+        for chunk in chunked(list(to_refresh.items()), DELETE_BATCH_SIZE):
+            vector_store.update_payload(dict(chunk))
+        response["refreshed"] = len(to_refresh)
+        response["deleted"] = delete_products(vanished, known_to_exist=True) if vanished else 0
+        
+        logger.info(f"Sync finished: {response['indexed']} indexed, {response['refreshed']} refreshed, {len(failed)} failed, "
+                    f"{response['deleted']} deleted")
+        return jsonify(response)
+    
+    except Exception as e:
+        logger.error(f"Error in sync: {e}")
+        return jsonify({
+            "error": "Sync failed",
+            "message": str(e)
+        }), 500
+
+def parse_search_params(data: dict):
+    """Validate a search request; returns (params, None) or (None, error message)"""
+    if not data or 'query' not in data:
+        return None, "Missing 'query' field"
+    
+    params = {
+        "query": data['query'],
+        "limit": data.get('limit', 100),
+        "offset": data.get('offset', 0),
+        "score_threshold": data.get('score_threshold', 0.12),
+        "category_filter": data.get('category_filter') or None,
+        "keyword_mode": data.get('keyword_mode', KEYWORD_SEARCH_MODE),
+        "fields": data.get('fields') or []
+    }
+    
+    if not isinstance(params['query'], str):
+        return None, "query must be a string"
+    # bool is an int subclass; JSON true/false must not pass as numbers
+    if (not isinstance(params['limit'], int) or isinstance(params['limit'], bool)
+            or not 1 <= params['limit'] <= SEARCH_MAX_LIMIT):
+        return None, f"limit must be an integer between 1 and {SEARCH_MAX_LIMIT}"
+    if not isinstance(params['offset'], int) or isinstance(params['offset'], bool) or params['offset'] < 0:
+        return None, "offset must be a non-negative integer"
+    if params['score_threshold'] is not None and (not isinstance(params['score_threshold'], (int, float))
+                                                  or isinstance(params['score_threshold'], bool)):
+        return None, "score_threshold must be a number or null"
+    if params['category_filter'] is not None and not isinstance(params['category_filter'], str):
+        return None, "category_filter must be a string"
+    if params['keyword_mode'] not in KEYWORD_SEARCH_MODES:
+        return None, f"keyword_mode must be one of {', '.join(KEYWORD_SEARCH_MODES)}"
+    if not isinstance(params['fields'], list) or not set(params['fields']) <= set(SEARCH_PAYLOAD_FIELDS):
+        return None, f"fields must be a list of: {', '.join(SEARCH_PAYLOAD_FIELDS)}"
+    
+    if data.get('cursor'):
+        if 'offset' in data:
+            return None, "Use either 'offset' or 'cursor', not both"
+        offset = decode_cursor(data['cursor'], search_fingerprint(params))
+        if offset is None:
+            return None, "Invalid cursor for this query"
+        params['offset'] = offset
+    
+    return params, None
+
+def search_fingerprint(params: dict) -> str:
+    """Identifies a result list independent of the page, so a cursor only works for its own query"""
+    key = search_cache.make_key(params['query'], params['limit'], params['score_threshold'],
+                                params['category_filter'], params['keyword_mode'], params['fields'])
+    return hashlib.sha1(json.dumps(key).encode("utf-8")).hexdigest()[:16]
+
+def encode_cursor(offset: int, fingerprint: str) -> str:
+    return base64.urlsafe_b64encode(json.dumps({"o": offset, "f": fingerprint}).encode("utf-8")).decode("ascii")
+
+def decode_cursor(cursor: str, fingerprint: str):
+    try:
+        data = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+        offset = data["o"]
+    except (ValueError, KeyError, TypeError, AttributeError):
+        return None
+    if data.get("f") != fingerprint or not isinstance(offset, int) or isinstance(offset, bool) or offset < 0:
+        return None
+    return offset
+
+def fetch_payloads(ids: List[str], fields: List[str]) -> dict:
+    """Selected payload fields for result ids that came without a payload, in one store call"""
+    if not ids or not fields:
+        return {}
+    with metrics.time_stage("vector_retrieve"):
+        payloads = vector_store.retrieve([int(item_id) for item_id in ids], fields)
+    return {str(product_id): payload for product_id, payload in payloads.items()}
+
+def keyword_matches(params: dict) -> List[Tuple[str, float]]:
+    """Keyword index (id, score) hits up to the end of the requested page, or [] if the index is off or not ready
+    
+    exact: products with a keyword equal to the query, all scored 1.0;
+    fusion: products sharing query words, best first (KeywordIndex.ranked_lookup)
+    """
+    if params['keyword_mode'] == "off" or not keyword_index.ready:
+        return []
+    end = params['offset'] + params['limit']
+    if params['keyword_mode'] == "exact":
+        return [(str(product_id), 1.0) for product_id in keyword_index.lookup(params['query'], params['category_filter'], end)]
+    return [(str(product_id), score)
+            for product_id, score in keyword_index.ranked_lookup(params['query'], params['category_filter'], end)]
+
+def build_search_response(params: dict, results: List[dict], ranking: str) -> dict:
+    """Response for one page; results are {"id", "score", "payload"} dicts"""
+    limit = params['limit']
+    offset = params['offset']
+    response = {
+        "query": params['query'],
+        "auction_ids": [r["id"] for r in results],
+        "scores": [r["score"] for r in results],
+        "total_found": len(results),
+        "limit": limit,
+        "offset": offset,
+        "score_threshold": params['score_threshold'],
+        "ranking": ranking,
+        # A full page may have more behind it; the next request simply comes back empty if not
+        "next_cursor": encode_cursor(offset + limit, search_fingerprint(params)) if len(results) == limit else None
+    }
+    if params['fields']:
+        response["items"] = [
+            {"id": r["id"], "score": r["score"], **{field: (r.get("payload") or {}).get(field) for field in params['fields']}}
+            for r in results
+        ]
+    return response
+
+def rank_search_results(params: dict, keyword_hits: List[Tuple[str, float]], hits) -> tuple:
+    """Merge vector hits (fetched from offset 0 in fusion mode) with keyword hits into one page"""
+    offset = params['offset']
+    limit = params['limit']
+    results = [{"id": str(hit.id), "score": hit.score, "payload": hit.payload} for hit in hits]
+    
+    if params['keyword_mode'] != "fusion" or not keyword_hits:
+        return results, "vector"
+    
+    payloads = {r["id"]: r["payload"] for r in results}
+    fused = reciprocal_rank_fusion([[(r["id"], r["score"]) for r in results], keyword_hits])[offset:offset + limit]
+    missing = [item_id for item_id, _ in fused if payloads.get(item_id) is None]
+    payloads.update(fetch_payloads(missing, params['fields']))
+    return [{"id": item_id, "score": score, "payload": payloads.get(item_id)} for item_id, score in fused], "rrf"
+
+def vector_search_request(params: dict, keyword_hits: List[Tuple[str, float]]) -> dict:
+    """Vector store search arguments for one query; fusion needs every vector hit before the page end"""
+    fusion = params['keyword_mode'] == "fusion" and bool(keyword_hits)
+    return {
+        "limit": params['offset'] + params['limit'] if fusion else params['limit'],
+        "offset": 0 if fusion else params['offset'],
+        "score_threshold": params['score_threshold'],
+        "category": params['category_filter'],
+        "with_payload": params['fields'] or False
+    }
+
 @app.route('/search', methods=['POST'])
 def search_products():
     try:
-        data = request.get_json()
+        params, error = parse_search_params(request.get_json())
+        if error:
+            return jsonify({"error": error}), 400
+        
+        query = params['query']
+        cache_key = search_cache.make_key(query, params['limit'], params['offset'], params['score_threshold'],
+                                          params['category_filter'], params['keyword_mode'], params['fields'])
+        cached = search_cache.get(cache_key)
+        if cached is not None:
+            logger.info(f"Search cache hit: {query}")
+            return jsonify({**cached, "query": query})
+        # Read before searching, so a write that lands mid-search keeps this result out of the cache
+        generation = search_cache.current_generation()
         
-        if not data or 'query' not in data:
-            return jsonify({"error": "Missing 'query' field"}), 400
+        keyword_hits = keyword_matches(params)
         
-        query = data['query']
-        limit = data.get('limit', 100)
-        score_threshold = data.get('score_threshold', 0.12)
-        category_filter = data.get('category_filter')
+        if params['keyword_mode'] == "exact" and keyword_hits:
+            page = keyword_hits[params['offset']:params['offset'] + params['limit']]
+            logger.info(f"Keyword index answered search: {query} ({len(page)} results)")
+            payloads = fetch_payloads([item_id for item_id, _ in page], params['fields'])
+            results = [{"id": item_id, "score": score, "payload": payloads.get(item_id)} for item_id, score in page]
+            response = build_search_response(params, results, "keyword")
+            search_cache.put(cache_key, response, generation)
+            return jsonify(response)
         
         logger.info(f"Executing search: {query}")
         search_embedding = get_embedding(query)
         
-        search_filter = None
-        if category_filter:
-            search_filter = models.Filter(
-                must=[
-                    models.FieldCondition(
-                        key="category",
-                        match=models.MatchValue(value=category_filter)
-                    )
-                ]
-            )
+        with metrics.time_stage("vector_search"):
+            search_results = vector_store.search(search_embedding, **vector_search_request(params, keyword_hits))
         
-        search_results = qdrant_client.search(
-            collection_name=COLLECTION_NAME,
-            query_vector=search_embedding,
-            limit=limit,
-            score_threshold=score_threshold,
-            query_filter=search_filter,
-            with_payload=False
-        )
-        
-        logger.info(f"Search found {len(search_results)} results above threshold {score_threshold}")
-        
-        results = []
-        for hit in search_results:
-            result = {
-                "id": str(hit.id),
-                "score": hit.score
-            }
-            results.append(result)
+        logger.info(f"Search found {len(search_results)} results above threshold {params['score_threshold']}")
         
-        return jsonify({
-            "query": query,
-            "auction_ids": [r["id"] for r in results],
-            "scores": [r["score"] for r in results],
-            "total_found": len(results),
-            "limit": limit,
-            "score_threshold": score_threshold
-        })
+        results, ranking = rank_search_results(params, keyword_hits, search_results)
+        response = build_search_response(params, results, ranking)
+        search_cache.put(cache_key, response, generation)
+        return jsonify(response)
         
+    except CircuitOpenError as e:
+        logger.warning(f"Embedding service unavailable, search rejected: {e}")
+        return jsonify({
+            "error": "Embedding service unavailable",
+            "message": str(e)
+        }), 503
+    
     except Exception as e:
         logger.error(f"Error during search: {e}")
         return jsonify({
@@ -235,31 +890,162 @@ def search_products():
         }), 500
 
 
-@app.route('/delete', methods=['DELETE'])
-def delete_product():
-    """Delete a product from the search index"""
+@app.route('/search_batch', methods=['POST'])
+def search_products_batch():
+    """Run many searches with one embedding batch and one vector store batch search; results in input order"""
     try:
         data = request.get_json()
         
-        if not data or 'product_id' not in data:
-            return jsonify({"error": "Missing 'product_id' field"}), 400
+        if not data or 'searches' not in data:
+            return jsonify({"error": "Missing 'searches' field"}), 400
         
-        product_id = data['product_id']
+        searches = data['searches']
+        
+        if not isinstance(searches, list) or not searches:
+            return jsonify({"error": "'searches' must be a non-empty list"}), 400
+        
+        if len(searches) > SEARCH_BATCH_MAX_QUERIES:
+            return jsonify({"error": f"At most {SEARCH_BATCH_MAX_QUERIES} searches are allowed per request"}), 400
         
-        if not isinstance(product_id, int):
-            return jsonify({"error": "product_id must be an integer"}), 400
+        results = [None] * len(searches)
+        generation = search_cache.current_generation()
+        pending = []
+        
+        for i, search in enumerate(searches):
+            params, error = parse_search_params(search) if isinstance(search, dict) else (None, "Search must be a JSON object")
+            if error:
+                results[i] = {"error": error}
+                continue
+            
+            cache_key = search_cache.make_key(params['query'], params['limit'], params['offset'], params['score_threshold'],
+                                              params['category_filter'], params['keyword_mode'], params['fields'])
+            cached = search_cache.get(cache_key)
+            if cached is not None:
+                results[i] = {**cached, "query": params['query']}
+                continue
+            
+            keyword_hits = keyword_matches(params)
+            if params['keyword_mode'] == "exact" and keyword_hits:
+                page = keyword_hits[params['offset']:params['offset'] + params['limit']]
+                payloads = fetch_payloads([item_id for item_id, _ in page], params['fields'])
+                page_results = [{"id": item_id, "score": score, "payload": payloads.get(item_id)} for item_id, score in page]
+                results[i] = build_search_response(params, page_results, "keyword")
+                search_cache.put(cache_key, results[i], generation)
+                continue
+            
+            pending.append((i, params, keyword_hits, cache_key))
         
-        qdrant_client.delete(
-            collection_name=COLLECTION_NAME,
-            points_selector=models.PointIdsList(points=[product_id])
-        )
+        if pending:
+            # Identical query texts (e.g. the same query per category) are embedded once
+            texts = list(dict.fromkeys(params['query'] for _, params, _, _ in pending))
+            embeddings = dict(zip(texts, get_embeddings(texts)))
+            
+            logger.info(f"Batch search: {len(pending)} vector searches, {len(texts)} embeddings")
+            with metrics.time_stage("vector_search_batch"):
+                batch_results = vector_store.search_batch([
+                    (embeddings[params['query']], vector_search_request(params, keyword_hits))
+                    for _, params, keyword_hits, _ in pending
+                ])
+            
+            for (i, params, keyword_hits, cache_key), hits in zip(pending, batch_results):
+                page_results, ranking = rank_search_results(params, keyword_hits, hits)
+                results[i] = build_search_response(params, page_results, ranking)
+                search_cache.put(cache_key, results[i], generation)
         
-        logger.info(f"Product deleted from index: {product_id}")
         return jsonify({
-            "status": "success",
-            "message": f"Product '{product_id}' deleted from index",
-            "product_id": product_id
+            "total": len(searches),
+            "results": results
         })
+    
+    except CircuitOpenError as e:
+        logger.warning(f"Embedding service unavailable, batch search rejected: {e}")
+        return jsonify({
+            "error": "Embedding service unavailable",
+            "message": str(e)
+        }), 503
+    
+    except Exception as e:
+        logger.error(f"Error during batch search: {e}")
+        return jsonify({
+            "error": "Batch search error",
+            "message": str(e)
+        }), 500
+
+
+def parse_delete_filter(delete_filter) -> tuple:
+    """Validate a /delete filter; returns ((category, ended_before), error)"""
+    if not isinstance(delete_filter, dict) or not delete_filter:
+        return None, "'filter' must be a non-empty object"
+    unknown = set(delete_filter) - {'category', 'ended_before'}
+    if unknown:
+        return None, f"Unknown filter fields: {', '.join(sorted(unknown))}"
+    
+    category = delete_filter.get('category')
+    ended_before = delete_filter.get('ended_before')
+    if category is not None and (not isinstance(category, str) or not category):
+        return None, "category must be a non-empty string"
+    if ended_before is not None and not isinstance(ended_before, (int, float)):
+        return None, "ended_before must be a Unix timestamp"
+    if category is None and ended_before is None:
+        return None, "'filter' needs category or ended_before"
+    return (category, ended_before), None
+
+@app.route('/delete', methods=['DELETE'])
+def delete_product():
+    """Delete one product, a list of product ids, or every product matching a filter
+    
+    Body: {"product_id": 1}, {"product_ids": [1, 2]} or
+    {"filter": {"category": "...", "ended_before": <Unix timestamp>}}. Deletes
+    run in chunks of DELETE_BATCH_SIZE ids. 'deleted' counts only the ids that
+    were indexed, 'requested' the distinct ids asked for; deletion is idempotent.
+    """
+    try:
+        data = request.get_json()
+        
+        selectors = [key for key in ('product_id', 'product_ids', 'filter') if key in (data or {})]
+        if len(selectors) != 1:
+            return jsonify({"error": "Exactly one of 'product_id', 'product_ids' or 'filter' is required"}), 400
+        
+        if 'product_id' in data:
+            product_id = data['product_id']
+        
+            if not isinstance(product_id, int):
+                return jsonify({"error": "product_id must be an integer"}), 400
+        
+            deleted = delete_products([product_id])
+        
+            logger.info(f"Product deleted from index: {product_id}")
+            return jsonify({
+                "status": "success",
+                "message": f"Product '{product_id}' deleted from index",
+                "product_id": product_id,
+                "requested": 1,
+                "deleted": deleted
+            })
+        
+        if 'product_ids' in data:
+            product_ids = data['product_ids']
+            
+            if not isinstance(product_ids, list) or not product_ids:
+                return jsonify({"error": "'product_ids' must be a non-empty list"}), 400
+            if not all(isinstance(product_id, int) for product_id in product_ids):
+                return jsonify({"error": "product_ids must be integers"}), 400
+            if len(product_ids) > DELETE_MAX_IDS:
+                return jsonify({"error": f"At most {DELETE_MAX_IDS} product_ids are allowed per request"}), 400
+            
+            unique_ids = list(dict.fromkeys(product_ids))
+            deleted = delete_products(unique_ids)
+            logger.info(f"Bulk delete: {deleted} of {len(unique_ids)} products deleted from index")
+            return jsonify({"status": "success", "requested": len(unique_ids), "deleted": deleted})
+        
+        parsed, error = parse_delete_filter(data['filter'])
+        if error:
+            return jsonify({"error": error}), 400
+        
+        category, ended_before = parsed
+        deleted = delete_matching(category, ended_before)
+        logger.info(f"Filter delete (category={category}, ended_before={ended_before}): {deleted} products deleted")
+        return jsonify({"status": "success", "deleted": deleted, "filter": data['filter']})
         
     except Exception as e:
         logger.error(f"Error deleting product: {e}")
@@ -269,12 +1055,75 @@ def delete_product():
         }), 500
 
 
-if __name__ == "__main__":
+@app.route('/reindex', methods=['POST'])
+def start_reindex():
+    """Rebuild the collection into a new version in the background; the alias switches once it verifies"""
+    if reindexer is None:
+        return jsonify({"error": "Reindexing requires the qdrant vector store backend"}), 400
+    
+    if not reindexer.start():
+        return jsonify({"error": "A reindex is already running", "reindex": reindexer.status()}), 409
+    
+    logger.info("Reindex started")
+    response = jsonify(reindexer.status())
+    response.headers["Location"] = "/reindex"
+    return response, 202
+
+
+@app.route('/reindex', methods=['GET'])
+def reindex_status():
+    """Phase, progress and verification result of the current or last reindex"""
+    if reindexer is None:
+        return jsonify({"error": "Reindexing requires the qdrant vector store backend"}), 400
+    return jsonify(reindexer.status())
+
+
+@app.route('/keywords/cache/stats', methods=['GET'])
+def keyword_cache_stats():
+    """Keyword cache size and hit ratio"""
+    return jsonify(keyword_cache.stats())
+
+
+@app.route('/keywords/index/stats', methods=['GET'])
+def keyword_index_stats():
+    """Keyword index size and rebuild state"""
+    return jsonify({"mode": KEYWORD_SEARCH_MODE, **keyword_index.stats()})
+
+
+@app.route('/store/stats', methods=['GET'])
+def vector_store_stats():
+    """Vector store backend and size"""
     try:
-        ensure_collection_exists()
-        logger.info("Search service successfully initialized")
+        return jsonify(vector_store.stats())
     except Exception as e:
-        logger.error(f"Initialization error: {e}")
-        exit(1)
-    
+        logger.error(f"Error reading vector store stats: {e}")
+        return jsonify({
+            "error": "Vector store unavailable",
+            "message": str(e)
+        }), 500
+
+
+@app.route('/search/cache/stats', methods=['GET'])
+def search_cache_stats():
+    """Search result cache size, memory use and hit ratio"""
+    return jsonify(search_cache.stats())
+
+
+@app.route('/embedder/stats', methods=['GET'])
+def embedder_stats():
+    """Embedding client state: in-flight requests, retries and circuit breaker."""
+    return jsonify(embedder.stats())
+
+
+if __name__ == "__main__":
+    # debug=True runs the app in a reloader child; the parent only watches files,
+    # so only the child opens the vector store (a local store allows one process)
+    if is_running_from_reloader():
+        try:
+            ensure_collection_exists()
+            logger.info("Search service successfully initialized")
+        except Exception as e:
+            logger.error(f"Initialization error: {e}")
+            exit(1)
+        start_background_workers()
     app.run(host='0.0.0.0', port=8001, debug=True)
\ No newline at end of file
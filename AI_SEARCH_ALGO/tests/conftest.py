@@ -0,0 +1,41 @@
+import os
+import sys
+
+import numpy as np
+import pytest
+
+# The service modules live flat in AI_SEARCH_ALGO
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+VECTOR_SIZE = 8
+
+
+@pytest.fixture
+def qdrant_store():
+    """A QdrantStore on an in-memory client, collection created behind its alias."""
+    from qdrant_client import QdrantClient
+    
+    from collection_profiles import get_profile
+    from vector_store import QdrantStore
+    
+    store = QdrantStore("localhost", 6333, "products", VECTOR_SIZE, get_profile("indexed", hnsw_ef=64))
+    store.client = QdrantClient(":memory:")
+    store.ensure_collection()
+    yield store
+    store.client.close()
+
+
+@pytest.fixture(scope="session")
+def service(tmp_path_factory):
+    """search_service_flask on the local vector store; it reads its configuration at import"""
+    os.environ["SEARCH_DATA_DIR"] = str(tmp_path_factory.mktemp("search_data"))
+    os.environ["VECTOR_STORE_BACKEND"] = "local"
+    os.environ["SEARCH_CACHE_MAX_ENTRIES"] = "0"
+    import search_service_flask
+    
+    return search_service_flask
+
+
+def unit_vector(seed: int) -> np.ndarray:
+    vector = np.random.default_rng(seed).standard_normal(VECTOR_SIZE).astype(np.float32)
+    return vector / np.linalg.norm(vector)
@@ -0,0 +1,29 @@
+import numpy as np
+
+
+def index_locally(service, product_ids):
+    payload = {"title": "t", "description": "d", "category": "c", "keywords": []}
+    service.vector_store.upsert([(product_id, np.ones(service.VECTOR_SIZE), payload) for product_id in product_ids])
+
+
+def test_delete_counts_only_indexed_ids(service):
+    index_locally(service, [9001, 9002])
+    client = service.app.test_client()
+    
+    response = client.delete('/delete', json={"product_ids": [9001, 9002, 9002, 9003]}).get_json()
+    assert (response["requested"], response["deleted"]) == (3, 2)
+    
+    response = client.delete('/delete', json={"product_id": 9001}).get_json()
+    assert (response["requested"], response["deleted"]) == (1, 0)
+
+
+def test_local_delete_is_one_store_call_per_chunk(service, monkeypatch):
+    index_locally(service, range(9100, 9105))
+    calls = []
+    delete = service.vector_store.delete
+    monkeypatch.setattr(service.vector_store, "delete", lambda ids, **kwargs: calls.append(ids) or delete(ids, **kwargs))
+    monkeypatch.setattr(service.vector_store, "retrieve", None)
+    monkeypatch.setattr(service, "DELETE_BATCH_SIZE", 2)
+    
+    assert service.delete_products(list(range(9100, 9106))) == 5
+    assert [len(ids) for ids in calls] == [2, 2, 2]
@@ -0,0 +1,68 @@
+from keyword_index import KeywordIndex, reciprocal_rank_fusion
+
+
+def test_ranked_lookup_prefers_whole_keyword_and_rare_words():
+    index = KeywordIndex()
+    index.add(1, ["red shoes"], "fashion")
+    index.add(2, ["shoes"], "fashion")
+    index.add(3, ["running shoes", "red"], "sport")
+    index.add(4, ["blue shirt"], "fashion")
+    
+    ranked = index.ranked_lookup("Red  Shoes")
+    
+    assert [product_id for product_id, _ in ranked] == [1, 3, 2]
+    assert ranked[0][1] > ranked[1][1] > ranked[2][1]
+    assert [product_id for product_id, _ in index.ranked_lookup("red shoes", "sport")] == [3]
+    assert index.ranked_lookup("hat") == []
+
+
+def test_ranked_lookup_truncates_by_score_not_by_id():
+    index = KeywordIndex()
+    for product_id in range(1, 50):
+        index.add(product_id, ["lamp"])
+    index.add(100, ["desk lamp"])
+    
+    assert index.ranked_lookup("desk lamp", limit=1)[0][0] == 100
+    assert index.lookup("lamp", limit=3) == [1, 2, 3]
+
+
+def test_ranked_lookup_forgets_removed_and_replaced_keywords():
+    index = KeywordIndex()
+    index.add(1, ["green tea"])
+    index.add(1, ["coffee"])
+    index.add(2, ["tea pot"])
+    index.remove(2)
+    
+    assert index.ranked_lookup("tea") == []
+    assert index.ranked_lookup("coffee")[0][0] == 1
+    assert index.stats()["words"] == 1
+
+
+def test_rrf_gives_tied_scores_the_same_rank():
+    vector = [("a", 0.9), ("b", 0.8)]
+    keyword = [("z", 1.0), ("y", 1.0), ("b", 1.0)]
+    
+    fused = dict(reciprocal_rank_fusion([vector, keyword]))
+    
+    assert fused["z"] == fused["y"] == fused["a"]
+    assert max(fused, key=fused.get) == "b"
+
+
+def test_fusion_ranks_keyword_hits_by_relevance(service):
+    params = {"offset": 0, "limit": 3, "keyword_mode": "fusion", "fields": [], "query": "desk lamp",
+              "category_filter": None}
+    
+    class Hit:
+        def __init__(self, id, score):
+            self.id, self.score, self.payload = id, score, None
+    
+    index = KeywordIndex()
+    for product_id in range(1, 20):
+        index.add(product_id, ["lamp"])
+    index.add(500, ["desk lamp"])
+    keyword_hits = [(str(product_id), score) for product_id, score in index.ranked_lookup("desk lamp", limit=3)]
+    
+    results, ranking = service.rank_search_results(params, keyword_hits, [Hit(700, 0.9), Hit(500, 0.8)])
+    
+    assert ranking == "rrf"
+    assert [r["id"] for r in results][:2] == ["500", "700"]
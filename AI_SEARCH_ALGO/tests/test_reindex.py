@@ -0,0 +1,67 @@
+import time
+import zlib
+
+import numpy as np
+
+from collection_profiles import alias_target, collection_versions
+from conftest import VECTOR_SIZE
+from reindex import FAILED, SUCCEEDED, Reindexer
+
+
+def embed_texts(texts):
+    vectors = [np.random.default_rng(zlib.crc32(text.encode())).standard_normal(VECTOR_SIZE) for text in texts]
+    return np.asarray([vector / np.linalg.norm(vector) for vector in vectors], dtype=np.float32)
+
+
+def build_points(products):
+    vectors = embed_texts([product['title'] for product in products])
+    return [
+        (product['product_id'], vector, {
+            "title": product['title'],
+            "description": product['description'],
+            "category": product['category'],
+            "content_hash": product['title'],
+            "indexed_at": time.time()
+        })
+        for product, vector in zip(products, vectors)
+    ]
+
+
+def make_products(count: int):
+    return [{"product_id": i, "title": f"item {i}", "description": "d", "category": "c"} for i in range(count)]
+
+
+def run(reindexer: Reindexer) -> dict:
+    assert reindexer.start()
+    reindexer._thread.join(timeout=60)
+    return reindexer.status()
+
+
+def test_reindex_verifies_and_switches_the_alias(qdrant_store):
+    qdrant_store.upsert(build_points(make_products(50)))
+    switched = []
+    reindexer = Reindexer(qdrant_store, build_points, embed_texts, lambda: switched.append(True),
+                          batch_size=20, keep_versions=0, sample_size=20)
+    
+    status = run(reindexer)
+    
+    assert status["state"] == SUCCEEDED, status.get("error")
+    assert status["verification"]["shadow_points"] == 50
+    assert status["verification"]["recall_at_10"] == 1.0
+    assert alias_target(qdrant_store.client, "products") == "products_v2"
+    assert [name for _, name in collection_versions(qdrant_store.client, "products")] == ["products_v2"]
+    assert switched == [True]
+    assert qdrant_store.mirror is None
+    assert qdrant_store.search(embed_texts(["item 7"])[0], limit=1)[0].id == 7
+
+
+def test_failed_verification_keeps_the_live_version(qdrant_store):
+    qdrant_store.upsert(build_points(make_products(20)))
+    reindexer = Reindexer(qdrant_store, build_points, embed_texts, lambda: None, min_recall=1.01)
+    
+    status = run(reindexer)
+    
+    assert status["state"] == FAILED
+    assert "recall" in status["error"]
+    assert alias_target(qdrant_store.client, "products") == "products_v1"
+    assert [name for _, name in collection_versions(qdrant_store.client, "products")] == ["products_v1"]
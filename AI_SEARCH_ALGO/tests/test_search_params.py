@@ -0,0 +1,38 @@
+import pytest
+
+
+@pytest.mark.parametrize("body, message", [
+    ({"query": "lamp", "score_threshold": "high"}, "score_threshold"),
+    ({"query": "lamp", "score_threshold": True}, "score_threshold"),
+    ({"query": "lamp", "score_threshold": [0.5]}, "score_threshold"),
+    ({"query": "lamp", "limit": True}, "limit"),
+    ({"query": "lamp", "limit": 1.5}, "limit"),
+    ({"query": "lamp", "offset": False}, "offset"),
+    ({"query": "lamp", "offset": -1}, "offset"),
+    ({"query": "lamp", "category_filter": 3}, "category_filter"),
+    ({"query": 5}, "query"),
+])
+def test_search_rejects_invalid_params(service, body, message):
+    response = service.app.test_client().post('/search', json=body)
+    
+    assert response.status_code == 400
+    assert message in response.get_json()["error"]
+
+
+def test_search_batch_reports_invalid_params_per_search(service):
+    response = service.app.test_client().post('/search_batch', json={"searches": [
+        {"query": "lamp", "score_threshold": "high"},
+        {"query": "lamp", "limit": True}
+    ]})
+    
+    assert response.status_code == 200
+    assert ["score_threshold" in result["error"] for result in response.get_json()["results"]] == [True, False]
+    assert "limit" in response.get_json()["results"][1]["error"]
+
+
+def test_search_params_accept_numbers_and_null_threshold(service):
+    params, error = service.parse_search_params({"query": "lamp", "score_threshold": None, "limit": 5, "offset": 0})
+    assert error is None and params["score_threshold"] is None
+    
+    params, error = service.parse_search_params({"query": "lamp", "score_threshold": 0, "category_filter": "toys"})
+    assert error is None and params["score_threshold"] == 0
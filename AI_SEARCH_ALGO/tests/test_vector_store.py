@@ -0,0 +1,98 @@
+import asyncio
+import os
+import subprocess
+import sys
+
+import pytest
+
+from conftest import VECTOR_SIZE, unit_vector
+from vector_store import AsyncQdrantStore, LocalVectorStore, StoreLockedError
+
+
+def product(category: str) -> dict:
+    return {"title": f"{category} item", "category": category}
+
+
+def test_qdrant_search_returns_nearest_hits(qdrant_store):
+    qdrant_store.upsert([(i, unit_vector(i), product("books" if i % 2 else "toys")) for i in range(10)])
+    
+    hits = qdrant_store.search(unit_vector(3), limit=3, with_payload=True)
+    
+    assert hits[0].id == 3
+    assert hits[0].score > 0.99
+    assert hits[0].payload == product("books")
+    assert len(hits) == 3
+
+
+def test_qdrant_search_applies_filter_offset_and_threshold(qdrant_store):
+    qdrant_store.upsert([(i, unit_vector(i), product("books" if i % 2 else "toys")) for i in range(10)])
+    
+    filtered = qdrant_store.search(unit_vector(3), limit=10, category="toys")
+    assert {hit.id for hit in filtered} == {0, 2, 4, 6, 8}
+    assert qdrant_store.search(unit_vector(3), limit=2, offset=1)[0].id != 3
+    assert [hit.id for hit in qdrant_store.search(unit_vector(3), limit=10, score_threshold=0.99)] == [3]
+
+
+def test_qdrant_search_batch_keeps_request_order(qdrant_store):
+    qdrant_store.upsert([(i, unit_vector(i), product("books")) for i in range(10)])
+    
+    results = qdrant_store.search_batch([
+        (unit_vector(7), {"limit": 2}),
+        (unit_vector(1), {"limit": 1, "with_payload": ["title"]}),
+        (unit_vector(4), {"limit": 5, "category": "toys"})
+    ])
+    
+    assert [len(hits) for hits in results] == [2, 1, 0]
+    assert results[0][0].id == 7
+    assert results[1][0].id == 1
+    assert results[1][0].payload == {"title": "books item"}
+
+
+def test_async_qdrant_search(qdrant_store):
+    from qdrant_client import AsyncQdrantClient
+    
+    async def run():
+        store = AsyncQdrantStore(qdrant_store)
+        store.client = AsyncQdrantClient(":memory:")
+        await store.client.create_collection(
+            "products",
+            vectors_config=qdrant_store.models.VectorParams(size=VECTOR_SIZE, distance=qdrant_store.models.Distance.COSINE)
+        )
+        await store.upsert([(i, unit_vector(i), product("books" if i % 2 else "toys")) for i in range(10)])
+        
+        single = await store.search(unit_vector(5), limit=3, category="books", with_payload=True)
+        batch = await store.search_batch([(unit_vector(2), {"limit": 1}), (unit_vector(9), {"limit": 4})])
+        await store.close()
+        return single, batch
+    
+    single, batch = asyncio.run(run())
+    
+    assert single[0].id == 5 and single[0].payload == product("books")
+    assert all(hit.id % 2 for hit in single)
+    assert [hits[0].id for hits in batch] == [2, 9]
+    assert len(batch[1]) == 4
+
+
+def test_qdrant_delete_counts_only_existing_ids(qdrant_store):
+    qdrant_store.upsert([(i, unit_vector(i), product("books")) for i in range(5)])
+    
+    assert qdrant_store.delete([1, 2, 99], count_existing=True) == 2
+    assert qdrant_store.delete([3, 98]) == 2
+    assert sorted(qdrant_store.retrieve(list(range(5)), [])) == [0, 4]
+
+
+def test_local_store_refuses_a_second_process(tmp_path):
+    owner = LocalVectorStore(str(tmp_path), VECTOR_SIZE)
+    owner.ensure_collection()
+    
+    other_process = subprocess.run(
+        [sys.executable, "-c", f"from vector_store import LocalVectorStore; "
+                               f"LocalVectorStore({str(tmp_path)!r}, {VECTOR_SIZE}).ensure_collection()"],
+        cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))), capture_output=True, text=True
+    )
+    assert other_process.returncode != 0
+    assert "StoreLockedError" in other_process.stderr
+    
+    # The lock is per open file, so a second store in the same process is refused too
+    with pytest.raises(StoreLockedError):
+        LocalVectorStore(str(tmp_path), VECTOR_SIZE).ensure_collection()
@@ -0,0 +1,710 @@
+"""
+Vector Store - Cserélhető vektortár a keresőszolgáltatás mögött
+The search service talks to a VectorStore instead of Qdrant directly:
+- QdrantStore keeps the existing Qdrant collection (with its collection profile),
+  addressed through an alias so a reindex can swap versions under it
+- LocalVectorStore needs no server: a memory-mapped float32 matrix searched
+  with one vectorized dot product and argpartition top-k, category codes for
+  filter masks, and an id map, all persisted under one directory
+Search hits are objects with id, score and payload attributes.
+create_async_vector_store() gives the awaitable search/upsert side used by the
+ASGI serving mode: AsyncQdrantClient for Qdrant, worker threads for the local store.
+"""
+
+from abc import ABC, abstractmethod
+import asyncio
+import copy
+import json
+import logging
+import os
+import sqlite3
+import threading
+from typing import Dict, Iterator, List, Optional, Tuple, Union
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+logger = logging.getLogger(__name__)
+
+VECTOR_STORE_BACKENDS = ("qdrant", "local")
+
+# (id, vector, payload)
+Point = Tuple[int, np.ndarray, dict]
+PayloadSelector = Union[bool, List[str]]
+
+
+class SearchHit:
+    __slots__ = ("id", "score", "payload")
+    
+    def __init__(self, id: int, score: float, payload: Optional[dict] = None):
+        self.id = id
+        self.score = score
+        self.payload = payload
+
+
+class VectorStore(ABC):
+    """Storage and nearest-neighbour search for product vectors and payloads."""
+    
+    @abstractmethod
+    def ensure_collection(self):
+        """Create the collection if it does not exist yet."""
+    
+    @abstractmethod
+    def upsert(self, points: List[Point]):
+        pass
+    
+    @abstractmethod
+    def delete(self, ids: List[int], count_existing: bool = False) -> int:
+        """Delete ids; returns how many existed, or len(ids) unless count_existing."""
+    
+    @abstractmethod
+    def update_payload(self, updates: Dict[int, dict]):
+        """Merge fields into the payloads of existing ids, leaving vectors alone."""
+    
+    @abstractmethod
+    def search(self, vector: np.ndarray, limit: int, offset: int = 0, score_threshold: Optional[float] = None,
+               category: Optional[str] = None, with_payload: PayloadSelector = False) -> list:
+        pass
+    
+    def search_batch(self, searches: List[Tuple[np.ndarray, dict]]) -> List[list]:
+        """Run (vector, search kwargs) pairs; backends override this with a single round-trip."""
+        return [self.search(vector, **kwargs) for vector, kwargs in searches]
+    
+    @abstractmethod
+    def retrieve(self, ids: List[int], fields: List[str]) -> Dict[int, dict]:
+        """Selected payload fields by id; unknown ids are left out."""
+    
+    @abstractmethod
+    def scroll(self, fields: List[str], batch_size: int = 1000) -> Iterator[List[Tuple[int, dict]]]:
+        """Yield pages of (id, payload) covering the whole collection."""
+    
+    @abstractmethod
+    def find_ids(self, category: Optional[str] = None, ends_before: Optional[float] = None,
+                 batch_size: int = 1000) -> Iterator[List[int]]:
+        """Yield pages of ids whose payload matches the category and has ends_at < ends_before."""
+    
+    @abstractmethod
+    def stats(self) -> dict:
+        pass
+
+
+class QdrantStore(VectorStore):
+    """A Qdrant collection configured by a collection profile."""
+    
+    def __init__(self, host: str, port: int, collection_name: str, vector_size: int, profile: dict,
+                 migrate: bool = True):
+        from qdrant_client import QdrantClient
+        from qdrant_client.http import models
+        
+        from collection_profiles import search_params
+        
+        self.models = models
+        self.host = host
+        self.port = port
+        self.client = QdrantClient(host=host, port=port)
+        self.collection_name = collection_name
+        self.vector_size = vector_size
+        self.profile = profile
+        self.migrate = migrate
+        self.search_params = search_params(profile)
+        # Shadow collection that also receives every upsert and delete while a reindex builds it
+        self.mirror: Optional["QdrantStore"] = None
+        self.mirror_errors = 0
+    
+    def for_collection(self, name: str) -> "QdrantStore":
+        """The same client and profile on another collection, e.g. a version behind the alias."""
+        store = copy.copy(self)
+        store.collection_name = name
+        store.mirror = None
+        store.mirror_errors = 0
+        return store
+    
+    def ensure_collection(self):
+        from collection_profiles import (alias_target, create_collection, migrate_collection, move_behind_alias,
+                                         switch_alias, version_name)
+        
+        # collection_name is an alias to a versioned collection
+        target = alias_target(self.client, self.collection_name)
+        collection_names = [col.name for col in self.client.get_collections().collections]
+        if target is None and self.collection_name not in collection_names:
+            target = version_name(self.collection_name, 1)
+            logger.info(f"Creating collection: {target} (profile '{self.profile['name']}') as {self.collection_name}")
+            # It exists when a migration stopped between dropping the original and creating the alias
+            if target not in collection_names:
+                create_collection(self.client, target, self.vector_size, self.profile)
+            switch_alias(self.client, self.collection_name, target)
+            logger.info("Collection successfully created")
+            return
+        
+        if target is None:
+            if not self.migrate:
+                logger.warning(f"Collection {self.collection_name} has no alias; reindexing needs COLLECTION_MIGRATE=true once")
+                logger.info("Collection already exists")
+                return
+            target = move_behind_alias(self.client, self.collection_name, self.vector_size, self.profile)
+        
+        if self.migrate:
+            changed = migrate_collection(self.client, target, self.profile)
+            logger.info(f"Collection already exists, migrated: {', '.join(changed)}" if changed else "Collection already exists")
+        else:
+            logger.info("Collection already exists")
+    
+    def drop(self):
+        """Delete the alias and every collection version behind it."""
+        from collection_profiles import alias_target, collection_versions
+        
+        if alias_target(self.client, self.collection_name) is not None:
+            self.client.update_collection_aliases(change_aliases_operations=[
+                self.models.DeleteAliasOperation(delete_alias=self.models.DeleteAlias(alias_name=self.collection_name))
+            ])
+        elif self.client.collection_exists(self.collection_name):
+            self.client.delete_collection(self.collection_name)
+        for _, name in collection_versions(self.client, self.collection_name):
+            self.client.delete_collection(name)
+    
+    def _mirror_write(self, method: str, argument):
+        mirror = self.mirror
+        if mirror is None:
+            return
+        # A failing shadow must not fail live writes; the reindex checks mirror_errors before switching
+        try:
+            getattr(mirror, method)(argument)
+        except Exception as e:
+            self.mirror_errors += 1
+            logger.warning(f"Mirrored {method} to {mirror.collection_name} failed: {e}")
+    
+    def _filter(self, category: Optional[str], ends_before: Optional[float] = None):
+        conditions = []
+        if category:
+            conditions.append(self.models.FieldCondition(
+                key="category",
+                match=self.models.MatchValue(value=category)
+            ))
+        if ends_before is not None:
+            conditions.append(self.models.FieldCondition(
+                key="ends_at",
+                range=self.models.Range(lt=ends_before)
+            ))
+        return self.models.Filter(must=conditions) if conditions else None
+    
+    def upsert(self, points: List[Point]):
+        self.client.upsert(
+            collection_name=self.collection_name,
+            points=[
+                self.models.PointStruct(id=point_id, vector=np.asarray(vector).tolist(), payload=payload)
+                for point_id, vector, payload in points
+            ]
+        )
+        self._mirror_write("upsert", points)
+    
+    def delete(self, ids: List[int], count_existing: bool = False) -> int:
+        # Qdrant's delete result carries no count, so counting costs one id lookup first
+        existing = len(self.client.retrieve(
+            collection_name=self.collection_name,
+            ids=list(ids),
+            with_payload=False,
+            with_vectors=False
+        )) if count_existing else len(ids)
+        self.client.delete(
+            collection_name=self.collection_name,
+            points_selector=self.models.PointIdsList(points=list(ids))
+        )
+        self._mirror_write("delete", ids)
+        return existing
+    
+    def update_payload(self, updates: Dict[int, dict]):
+        self.client.batch_update_points(
+            collection_name=self.collection_name,
+            update_operations=[
+                self.models.SetPayloadOperation(set_payload=self.models.SetPayload(payload=fields, points=[point_id]))
+                for point_id, fields in updates.items()
+            ]
+        )
+        self._mirror_write("update_payload", updates)
+    
+    def search(self, vector, limit, offset=0, score_threshold=None, category=None, with_payload=False):
+        return self.client.query_points(
+            collection_name=self.collection_name,
+            query=np.asarray(vector).tolist(),
+            limit=limit,
+            offset=offset,
+            score_threshold=score_threshold,
+            query_filter=self._filter(category),
+            search_params=self.search_params,
+            with_payload=with_payload
+        ).points
+    
+    def query_request(self, vector, kwargs: dict):
+        """One entry of a query_batch_points call, from search() keyword arguments."""
+        return self.models.QueryRequest(
+            query=np.asarray(vector).tolist(),
+            limit=kwargs['limit'],
+            offset=kwargs.get('offset', 0),
+            score_threshold=kwargs.get('score_threshold'),
+            filter=self._filter(kwargs.get('category')),
+            params=self.search_params,
+            with_payload=kwargs.get('with_payload', False)
+        )
+    
+    def search_batch(self, searches):
+        responses = self.client.query_batch_points(
+            collection_name=self.collection_name,
+            requests=[self.query_request(vector, kwargs) for vector, kwargs in searches]
+        )
+        return [response.points for response in responses]
+    
+    def retrieve(self, ids, fields):
+        points = self.client.retrieve(
+            collection_name=self.collection_name,
+            ids=list(ids),
+            with_payload=fields,
+            with_vectors=False
+        )
+        return {point.id: point.payload or {} for point in points}
+    
+    def scroll(self, fields, batch_size=1000):
+        offset = None
+        while True:
+            points, offset = self.client.scroll(
+                collection_name=self.collection_name,
+                limit=batch_size,
+                offset=offset,
+                with_payload=fields,
+                with_vectors=False
+            )
+            yield [(point.id, point.payload or {}) for point in points]
+            if offset is None:
+                return
+    
+    def find_ids(self, category=None, ends_before=None, batch_size=1000):
+        offset = None
+        while True:
+            points, offset = self.client.scroll(
+                collection_name=self.collection_name,
+                scroll_filter=self._filter(category, ends_before),
+                limit=batch_size,
+                offset=offset,
+                with_payload=False,
+                with_vectors=False
+            )
+            yield [point.id for point in points]
+            if offset is None:
+                return
+    
+    def changed_since(self, timestamp: float, fields: List[str], batch_size: int = 1000) -> Iterator[List[Tuple[int, dict]]]:
+        """Yield pages of (id, payload) for points written at or after the timestamp (payload indexed_at)."""
+        offset = None
+        while True:
+            points, offset = self.client.scroll(
+                collection_name=self.collection_name,
+                scroll_filter=self.models.Filter(must=[
+                    self.models.FieldCondition(key="indexed_at", range=self.models.Range(gte=timestamp))
+                ]),
+                limit=batch_size,
+                offset=offset,
+                with_payload=fields,
+                with_vectors=False
+            )
+            yield [(point.id, point.payload or {}) for point in points]
+            if offset is None:
+                return
+    
+    def stats(self):
+        from collection_profiles import alias_target
+        
+        info = self.client.get_collection(self.collection_name)
+        return {
+            "backend": "qdrant",
+            "collection": self.collection_name,
+            "version": alias_target(self.client, self.collection_name),
+            "reindex_shadow": self.mirror.collection_name if self.mirror is not None else None,
+            "profile": self.profile['name'],
+            "points": info.points_count,
+            "status": str(info.status)
+        }
+
+
+def _select_fields(payload: dict, with_payload: PayloadSelector) -> Optional[dict]:
+    if not with_payload:
+        return None
+    if with_payload is True:
+        return payload
+    return {field: payload[field] for field in with_payload if field in payload}
+
+
+class StoreLockedError(Exception):
+    """Raised when another process already has the LocalVectorStore directory open."""
+    pass
+
+
+class LocalVectorStore(VectorStore):
+    """Memory-mapped NumPy vector index persisted in a directory.
+    
+    Rows of vectors.f32 hold L2-normalized vectors, so cosine similarity is a
+    dot product. ids.i64 maps rows to product ids (-1 = free row) and
+    categories.i32 holds a category code per row for filter masks. Payloads and
+    the category names live in a SQLite file next to them. One process owns the
+    directory; the id map is only read from disk when the store is opened, so
+    opening takes a lock on owner.lock and a second process gets StoreLockedError.
+    """
+    
+    INITIAL_CAPACITY = 1024
+    
+    def __init__(self, directory: str, vector_size: int):
+        self.directory = directory
+        self.vector_size = vector_size
+        self._lock = threading.Lock()
+        self._vectors = None
+        self._ids = None
+        self._categories = None
+        self._capacity = 0
+        self._rows = 0  # high-water mark; rows above it were never used
+        self._row_of: Dict[int, int] = {}
+        self._free_rows: List[int] = []
+        self._category_codes: Dict[str, int] = {}
+        self._db = None
+        self._owner_lock = None
+    
+    def _path(self, name: str) -> str:
+        return os.path.join(self.directory, name)
+    
+    def _lock_directory(self):
+        # Kept open for the life of the process; the OS releases it even if the process is killed
+        lock_file = open(self._path("owner.lock"), "a+")
+        lock_file.seek(0)
+        try:
+            if fcntl is not None:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+            else:
+                msvcrt.locking(lock_file.fileno(), msvcrt.LK_NBLCK, 1)
+        except OSError:
+            lock_file.close()
+            raise StoreLockedError(f"Local vector store {self.directory} is open in another process")
+        self._owner_lock = lock_file
+    
+    def _open_arrays(self, capacity: int):
+        # Files are grown first, then mapped, so existing rows are kept as they are
+        for name, dtype, width, fill in (("vectors.f32", np.float32, self.vector_size, 0),
+                                         ("ids.i64", np.int64, 1, -1),
+                                         ("categories.i32", np.int32, 1, -1)):
+            path = self._path(name)
+            itemsize = np.dtype(dtype).itemsize * width
+            old_rows = os.path.getsize(path) // itemsize if os.path.exists(path) else 0
+            if old_rows < capacity:
+                with open(path, "ab") as f:
+                    f.write(np.full((capacity - old_rows) * width, fill, dtype=dtype).tobytes())
+        
+        self._vectors = np.memmap(self._path("vectors.f32"), dtype=np.float32, mode="r+", shape=(capacity, self.vector_size))
+        self._ids = np.memmap(self._path("ids.i64"), dtype=np.int64, mode="r+", shape=(capacity,))
+        self._categories = np.memmap(self._path("categories.i32"), dtype=np.int32, mode="r+", shape=(capacity,))
+        self._capacity = capacity
+    
+    def ensure_collection(self):
+        with self._lock:
+            if self._db is not None:
+                return
+            os.makedirs(self.directory, exist_ok=True)
+            if self._owner_lock is None:
+                self._lock_directory()
+            
+            self._db = sqlite3.connect(self._path("payloads.db"), check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("CREATE TABLE IF NOT EXISTS payloads (id INTEGER PRIMARY KEY, payload TEXT NOT NULL)")
+            self._db.execute("CREATE TABLE IF NOT EXISTS categories (name TEXT PRIMARY KEY, code INTEGER NOT NULL)")
+            self._db.commit()
+            self._category_codes = dict(self._db.execute("SELECT name, code FROM categories").fetchall())
+            
+            ids_path = self._path("ids.i64")
+            existing = os.path.getsize(ids_path) // 8 if os.path.exists(ids_path) else 0
+            self._open_arrays(max(existing, self.INITIAL_CAPACITY))
+            
+            used = np.flatnonzero(self._ids >= 0)
+            self._rows = int(used[-1]) + 1 if len(used) else 0
+            self._row_of = {int(self._ids[row]): int(row) for row in used}
+            self._free_rows = [int(row) for row in np.flatnonzero(self._ids[:self._rows] < 0)]
+            logger.info(f"Local vector store opened: {len(self._row_of)} vectors in {self.directory}")
+    
+    def _category_code(self, category: Optional[str]) -> int:
+        if category is None:
+            return -1
+        code = self._category_codes.get(category)
+        if code is None:
+            code = len(self._category_codes)
+            self._db.execute("INSERT INTO categories (name, code) VALUES (?, ?)", (category, code))
+            self._category_codes[category] = code
+        return code
+    
+    def _allocate_row(self) -> int:
+        if self._free_rows:
+            return self._free_rows.pop()
+        if self._rows == self._capacity:
+            self._flush()
+            self._open_arrays(self._capacity * 2)
+        self._rows += 1
+        return self._rows - 1
+    
+    def _flush(self):
+        for array in (self._vectors, self._ids, self._categories):
+            array.flush()
+    
+    def upsert(self, points):
+        self.ensure_collection()
+        with self._lock:
+            for point_id, vector, payload in points:
+                vector = np.asarray(vector, dtype=np.float32)
+                norm = np.linalg.norm(vector)
+                row = self._row_of.get(point_id)
+                if row is None:
+                    row = self._allocate_row()
+                self._vectors[row] = vector / norm if norm else vector
+                self._categories[row] = self._category_code(payload.get('category'))
+                # The id is written last: it is what marks the row as used
+                self._ids[row] = point_id
+                self._row_of[point_id] = row
+                self._db.execute(
+                    "INSERT OR REPLACE INTO payloads (id, payload) VALUES (?, ?)",
+                    (point_id, json.dumps(payload, ensure_ascii=False))
+                )
+            self._flush()
+            self._db.commit()
+    
+    def delete(self, ids, count_existing=False):
+        self.ensure_collection()
+        existing = 0
+        with self._lock:
+            for point_id in ids:
+                row = self._row_of.pop(point_id, None)
+                if row is None:
+                    continue
+                existing += 1
+                self._ids[row] = -1
+                self._free_rows.append(row)
+                self._db.execute("DELETE FROM payloads WHERE id = ?", (point_id,))
+            self._flush()
+            self._db.commit()
+        return existing
+    
+    def update_payload(self, updates):
+        self.ensure_collection()
+        with self._lock:
+            for point_id, payload in self._payloads(list(updates)).items():
+                payload.update(updates[point_id])
+                if 'category' in updates[point_id]:
+                    self._categories[self._row_of[point_id]] = self._category_code(payload['category'])
+                self._db.execute(
+                    "UPDATE payloads SET payload = ? WHERE id = ?",
+                    (json.dumps(payload, ensure_ascii=False), point_id)
+                )
+            self._flush()
+            self._db.commit()
+    
+    def _payloads(self, ids: List[int]) -> Dict[int, dict]:
+        payloads = {}
+        for start in range(0, len(ids), 500):
+            chunk = ids[start:start + 500]
+            rows = self._db.execute(
+                f"SELECT id, payload FROM payloads WHERE id IN ({','.join('?' * len(chunk))})", chunk
+            ).fetchall()
+            payloads.update((point_id, json.loads(payload)) for point_id, payload in rows)
+        return payloads
+    
+    def _top_k(self, scores: np.ndarray, limit: int, offset: int, score_threshold: Optional[float],
+               category: Optional[str], with_payload: PayloadSelector) -> List[SearchHit]:
+        rows = self._rows
+        mask = self._ids[:rows] >= 0
+        if category:
+            code = self._category_codes.get(category)
+            if code is None:
+                return []
+            mask &= self._categories[:rows] == code
+        scores = np.where(mask, scores, -np.inf)
+        
+        k = min(offset + limit, rows)
+        if k <= 0:
+            return []
+        # argpartition finds the k best in linear time; only those k are sorted
+        top = np.argpartition(-scores, k - 1)[:k] if k < rows else np.arange(rows)
+        top = top[np.argsort(-scores[top], kind="stable")][offset:]
+        top = top[np.isfinite(scores[top])]
+        if score_threshold is not None:
+            top = top[scores[top] >= score_threshold]
+        
+        ids = [int(self._ids[row]) for row in top]
+        payloads = self._payloads(ids) if with_payload else {}
+        return [
+            SearchHit(point_id, float(scores[row]), _select_fields(payloads.get(point_id, {}), with_payload))
+            for point_id, row in zip(ids, top)
+        ]
+    
+    def _normalize(self, vectors: np.ndarray) -> np.ndarray:
+        norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+        return vectors / np.where(norms == 0, 1, norms)
+    
+    def search(self, vector, limit, offset=0, score_threshold=None, category=None, with_payload=False):
+        self.ensure_collection()
+        with self._lock:
+            query = self._normalize(np.asarray(vector, dtype=np.float32))
+            scores = self._vectors[:self._rows] @ query
+            return self._top_k(scores, limit, offset, score_threshold, category, with_payload)
+    
+    def search_batch(self, searches):
+        self.ensure_collection()
+        if not searches:
+            return []
+        with self._lock:
+            # One pass over the matrix scores every query at once
+            queries = self._normalize(np.stack([np.asarray(vector, dtype=np.float32) for vector, _ in searches]))
+            scores = self._vectors[:self._rows] @ queries.T
+            return [
+                self._top_k(scores[:, i], kwargs['limit'], kwargs.get('offset', 0), kwargs.get('score_threshold'),
+                            kwargs.get('category'), kwargs.get('with_payload', False))
+                for i, (_, kwargs) in enumerate(searches)
+            ]
+    
+    def retrieve(self, ids, fields):
+        self.ensure_collection()
+        with self._lock:
+            payloads = self._payloads(list(ids))
+        return {point_id: _select_fields(payload, fields or True) for point_id, payload in payloads.items()}
+    
+    def scroll(self, fields, batch_size=1000):
+        self.ensure_collection()
+        last_id = None
+        while True:
+            with self._lock:
+                rows = self._db.execute(
+                    "SELECT id, payload FROM payloads WHERE id > ? ORDER BY id LIMIT ?",
+                    (last_id if last_id is not None else -2 ** 63, batch_size)
+                ).fetchall()
+            yield [(point_id, _select_fields(json.loads(payload), fields or True)) for point_id, payload in rows]
+            if len(rows) < batch_size:
+                return
+            last_id = rows[-1][0]
+    
+    def find_ids(self, category=None, ends_before=None, batch_size=1000):
+        self.ensure_collection()
+        last_id = -2 ** 63
+        while True:
+            with self._lock:
+                ids = [row[0] for row in self._db.execute(
+                    "SELECT id FROM payloads WHERE id > ?"
+                    " AND (? IS NULL OR json_extract(payload, '$.category') = ?)"
+                    " AND (? IS NULL OR json_extract(payload, '$.ends_at') < ?)"
+                    " ORDER BY id LIMIT ?",
+                    (last_id, category, category, ends_before, ends_before, batch_size)
+                ).fetchall()]
+            yield ids
+            if len(ids) < batch_size:
+                return
+            last_id = ids[-1]
+    
+    def stats(self):
+        self.ensure_collection()
+        with self._lock:
+            return {
+                "backend": "local",
+                "directory": self.directory,
+                "points": len(self._row_of),
+                "rows": self._rows,
+                "capacity": self._capacity,
+                "free_rows": len(self._free_rows),
+                "categories": len(self._category_codes),
+                "vectors_mb": self._capacity * self.vector_size * 4 / (1024 * 1024)
+            }
+
+
+class AsyncQdrantStore:
+    """Awaitable search, retrieve and upsert on the same collection through AsyncQdrantClient."""
+    
+    def __init__(self, store: QdrantStore):
+        from qdrant_client import AsyncQdrantClient
+        
+        self.store = store
+        self.client = AsyncQdrantClient(host=store.host, port=store.port)
+    
+    async def upsert(self, points: List[Point]):
+        await self.client.upsert(
+            collection_name=self.store.collection_name,
+            points=[
+                self.store.models.PointStruct(id=point_id, vector=np.asarray(vector).tolist(), payload=payload)
+                for point_id, vector, payload in points
+            ]
+        )
+        if self.store.mirror is not None:
+            await asyncio.to_thread(self.store._mirror_write, "upsert", points)
+    
+    async def search(self, vector, limit, offset=0, score_threshold=None, category=None, with_payload=False):
+        response = await self.client.query_points(
+            collection_name=self.store.collection_name,
+            query=np.asarray(vector).tolist(),
+            limit=limit,
+            offset=offset,
+            score_threshold=score_threshold,
+            query_filter=self.store._filter(category),
+            search_params=self.store.search_params,
+            with_payload=with_payload
+        )
+        return response.points
+    
+    async def search_batch(self, searches):
+        responses = await self.client.query_batch_points(
+            collection_name=self.store.collection_name,
+            requests=[self.store.query_request(vector, kwargs) for vector, kwargs in searches]
+        )
+        return [response.points for response in responses]
+    
+    async def retrieve(self, ids, fields):
+        points = await self.client.retrieve(
+            collection_name=self.store.collection_name,
+            ids=list(ids),
+            with_payload=fields,
+            with_vectors=False
+        )
+        return {point.id: point.payload or {} for point in points}
+    
+    async def close(self):
+        await self.client.close()
+
+
+class ThreadedAsyncStore:
+    """Awaitable wrapper running a synchronous store in worker threads; NumPy releases the GIL while scoring."""
+    
+    def __init__(self, store: VectorStore):
+        self.store = store
+    
+    async def upsert(self, points):
+        await asyncio.to_thread(self.store.upsert, points)
+    
+    async def search(self, vector, **kwargs):
+        return await asyncio.to_thread(self.store.search, vector, **kwargs)
+    
+    async def search_batch(self, searches):
+        return await asyncio.to_thread(self.store.search_batch, searches)
+    
+    async def retrieve(self, ids, fields):
+        return await asyncio.to_thread(self.store.retrieve, ids, fields)
+    
+    async def close(self):
+        pass
+
+
+def create_async_vector_store(store: VectorStore):
+    """Async access to a store built by create_vector_store(); both share the same collection."""
+    if isinstance(store, QdrantStore):
+        return AsyncQdrantStore(store)
+    return ThreadedAsyncStore(store)
+
+
+def create_vector_store(backend: str, **kwargs) -> VectorStore:
+    """Build the configured backend; kwargs are the settings both backends may need."""
+    if backend == "qdrant":
+        return QdrantStore(kwargs['host'], kwargs['port'], kwargs['collection_name'], kwargs['vector_size'],
+                           kwargs['profile'], kwargs.get('migrate', True))
+    if backend == "local":
+        return LocalVectorStore(kwargs['directory'], kwargs['vector_size'])
+    raise ValueError(f"Unknown vector store backend '{backend}', expected one of {', '.join(VECTOR_STORE_BACKENDS)}")
@@ -3,22 +3,194 @@ Embedding Service - Szöveg vektorizáló szolgáltatás
 A sentence-transformers modellt használja embedding generáláshoz.
 """
 
-from flask import Flask, jsonify, request
-from sentence_transformers import SentenceTransformer
+from flask import Flask, Response, jsonify, request
+from typing import List
+import io
 import logging
+import multiprocessing
+import os
+import threading
+import time
+
+# A local snapshot never needs the hub; this must be set before huggingface_hub is imported
+MODEL_PATH = os.getenv("EMBED_MODEL_PATH")
+if MODEL_PATH:
+    os.environ.setdefault("HF_HUB_OFFLINE", "1")
+
+import numpy as np
+
+from batcher import MicroBatcher
+from embedding_cache import EmbeddingCache
+from inference import MODEL_NAME, configure_threads, load_model, warmup
+from metrics import metrics
+from worker_pool import EmbeddingWorkerPool
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 app = Flask(__name__)
+metrics.instrument_app(app)
+
+MAX_BATCH_SIZE = int(os.getenv("EMBED_MAX_BATCH_SIZE", "32"))
+MAX_WAIT_MS = float(os.getenv("EMBED_MAX_WAIT_MS", "5"))
+MAX_TEXTS_PER_REQUEST = int(os.getenv("EMBED_MAX_TEXTS_PER_REQUEST", "256"))
+CACHE_MAX_ENTRIES = int(os.getenv("EMBED_CACHE_MAX_ENTRIES", "10000"))
+CACHE_MAX_MB = float(os.getenv("EMBED_CACHE_MAX_MB", "64"))
+INFERENCE_BACKEND = os.getenv("EMBED_BACKEND", "torch")
+INTRA_OP_THREADS = int(os.getenv("EMBED_INTRA_OP_THREADS", "0"))
+INTER_OP_THREADS = int(os.getenv("EMBED_INTER_OP_THREADS", "0"))
+WARMUP_ENABLED = os.getenv("EMBED_WARMUP", "true").lower() == "true"
+# "thread": encode in this process; "pool": fork worker processes sharing the model weights
+SERVING_MODE = os.getenv("EMBED_SERVING_MODE", "thread")
+POOL_WORKERS = int(os.getenv("EMBED_POOL_WORKERS", str(os.cpu_count() or 1)))
+POOL_THREADS_PER_WORKER = int(os.getenv("EMBED_POOL_THREADS_PER_WORKER", "1"))
+
+# JSON stays first so clients without an Accept header keep the old format
+JSON_MIMETYPE = "application/json"
+BINARY_MIMETYPE = "application/octet-stream"
+NPY_MIMETYPE = "application/x-npy"
+RESPONSE_MIMETYPES = [JSON_MIMETYPE, BINARY_MIMETYPE, NPY_MIMETYPE]
+
+PROCESS_STARTED = time.monotonic()
+
+model = None
+worker_pool = None
+model_ready = threading.Event()
+startup_state = {
+    "status": "loading",
+    "error": None,
+    "load_seconds": None,
+    "warmup_seconds": None,
+    "time_to_ready_seconds": None
+}
+
+
+def initialize_model():
+    """Load and warm up the model; /readyz reports ready only after this finishes."""
+    global model, worker_pool
+    try:
+        configure_threads(INTRA_OP_THREADS, INTER_OP_THREADS)
+        load_args = {
+            "backend": INFERENCE_BACKEND,
+            "model_name": MODEL_PATH or MODEL_NAME,
+            "intra_op_threads": INTRA_OP_THREADS,
+            "local_files_only": bool(MODEL_PATH)
+        }
+        
+        if SERVING_MODE == "pool":
+            # The pool's forkserver loads the model; this process never holds a copy
+            pool_started = time.monotonic()
+            worker_pool = EmbeddingWorkerPool(
+                load_args,
+                POOL_WORKERS,
+                threads_per_worker=POOL_THREADS_PER_WORKER,
+                batch_size=MAX_BATCH_SIZE,
+                warmup_enabled=WARMUP_ENABLED
+            )
+            startup_state["load_seconds"] = worker_pool.load_seconds
+            startup_state["warmup_seconds"] = time.monotonic() - pool_started - worker_pool.load_seconds
+            logger.info(f"Model loaded in the worker pool: {MODEL_PATH or MODEL_NAME} (backend: {INFERENCE_BACKEND})")
+        else:
+            load_started = time.monotonic()
+            model = load_model(**load_args)
+            startup_state["load_seconds"] = time.monotonic() - load_started
+            logger.info(f"Model loaded: {MODEL_PATH or MODEL_NAME} (backend: {INFERENCE_BACKEND})")
+        
+            if WARMUP_ENABLED:
+                startup_state["warmup_seconds"] = warmup(model, MAX_BATCH_SIZE)
+        
+        startup_state["time_to_ready_seconds"] = time.monotonic() - PROCESS_STARTED
+        startup_state["status"] = "ready"
+        model_ready.set()
+        logger.info(f"Embedding service ready in {startup_state['time_to_ready_seconds']:.2f}s")
+    
+    except Exception as e:
+        logger.error(f"Model initialization failed: {e}")
+        startup_state["status"] = "failed"
+        startup_state["error"] = str(e)
 
-model = SentenceTransformer('all-MiniLM-L6-v2')
-logger.info("Model loaded: all-MiniLM-L6-v2")
+
+# Pool workers re-import the main module (forkserver); only the serving process loads
+if multiprocessing.parent_process() is None:
+    threading.Thread(target=initialize_model, name="model-loader", daemon=True).start()
+
+
+def encode_texts(texts: List[str]):
+    """Encode a list of texts in a single forward pass per batch."""
+    with metrics.time_stage("encode"):
+        if worker_pool is not None:
+            return worker_pool.encode(texts)
+        return model.encode(texts, batch_size=MAX_BATCH_SIZE, convert_to_numpy=True)
+
+
+# One collector thread per worker process so every worker can have a batch in flight
+batcher = MicroBatcher(
+    encode_texts,
+    max_batch_size=MAX_BATCH_SIZE,
+    max_wait_ms=MAX_WAIT_MS,
+    num_workers=POOL_WORKERS if SERVING_MODE == "pool" else 1
+)
+embedding_cache = EmbeddingCache(max_entries=CACHE_MAX_ENTRIES, max_bytes=int(CACHE_MAX_MB * 1024 * 1024))
+
+
+def get_embedding(text: str):
+    """Return the embedding for a single text, going through the cache and the batcher."""
+    embedding = embedding_cache.get(text)
+    if embedding is None:
+        # Queue wait plus the shared forward pass, as seen by one request
+        with metrics.time_stage("batcher_submit"):
+            embedding = batcher.submit(text)
+        embedding_cache.put(text, embedding)
+    return embedding
+
+
+def get_embeddings(texts: List[str]) -> List:
+    """Return embeddings for many texts, encoding only the cache misses in one call."""
+    embeddings = [embedding_cache.get(text) for text in texts]
+    missing = [i for i, embedding in enumerate(embeddings) if embedding is None]
+    
+    if missing:
+        encoded = encode_texts([texts[i] for i in missing])
+        for i, embedding in zip(missing, encoded):
+            embeddings[i] = embedding
+            embedding_cache.put(texts[i], embedding)
+    
+    return embeddings
+
+
+def embedding_response(embeddings, field: str):
+    """Serialize embeddings in the format requested by the Accept header.
+    
+    Binary formats carry little-endian float32: a single vector for /embed,
+    a row-major (count, dim) matrix for /embed_batch.
+    """
+    mimetype = request.accept_mimetypes.best_match(RESPONSE_MIMETYPES, default=JSON_MIMETYPE)
+    
+    if mimetype == JSON_MIMETYPE:
+        if field == "embedding":
+            return jsonify({field: embeddings.tolist()})
+        return jsonify({field: [embedding.tolist() for embedding in embeddings]})
+    
+    array = np.asarray(embeddings if field == "embedding" else np.stack(embeddings), dtype='<f4')
+    
+    if mimetype == NPY_MIMETYPE:
+        buffer = io.BytesIO()
+        np.save(buffer, array, allow_pickle=False)
+        body = buffer.getvalue()
+    else:
+        body = array.tobytes()
+    
+    response = Response(body, mimetype=mimetype)
+    response.headers["X-Embedding-Shape"] = ",".join(str(dim) for dim in array.shape)
+    return response
 
 
 @app.route('/embed', methods=['POST'])
 def embed_text():
     """Create embedding for the provided text."""
+    if not model_ready.is_set():
+        return jsonify({"error": "Model is not ready yet"}), 503
+    
     try:
         data = request.get_json()
         
@@ -31,9 +203,9 @@ def embed_text():
             return jsonify({"error": "Text cannot be empty"}), 400
         
         logger.info(f"Generating embedding for: {text[:50]}...")
-        embedding = model.encode([text])[0].tolist()
+        embedding = get_embedding(text)
         
-        return jsonify({"embedding": embedding})
+        return embedding_response(embedding, "embedding")
     
     except Exception as e:
         logger.error(f"Error generating embedding: {e}")
@@ -43,5 +215,69 @@ def embed_text():
         }), 500
 
 
+@app.route('/embed_batch', methods=['POST'])
+def embed_batch():
+    """Create embeddings for a list of texts, returned in input order."""
+    if not model_ready.is_set():
+        return jsonify({"error": "Model is not ready yet"}), 503
+    
+    try:
+        data = request.get_json()
+        
+        if not data or 'texts' not in data:
+            return jsonify({"error": "'texts' field is required"}), 400
+        
+        texts = data['texts']
+        
+        if not isinstance(texts, list) or not texts:
+            return jsonify({"error": "'texts' must be a non-empty list"}), 400
+        
+        if len(texts) > MAX_TEXTS_PER_REQUEST:
+            return jsonify({"error": f"At most {MAX_TEXTS_PER_REQUEST} texts are allowed per request"}), 400
+        
+        for i, text in enumerate(texts):
+            if not isinstance(text, str) or not text.strip():
+                return jsonify({"error": f"Text at index {i} cannot be empty"}), 400
+        
+        logger.info(f"Generating embeddings for batch of {len(texts)} texts")
+        embeddings = get_embeddings(texts)
+        
+        return embedding_response(embeddings, "embeddings")
+    
+    except Exception as e:
+        logger.error(f"Error generating batch embeddings: {e}")
+        return jsonify({
+            "error": "Embedding generation failed",
+            "message": str(e)
+        }), 500
+
+
+@app.route('/healthz', methods=['GET'])
+def healthz():
+    """Liveness probe: the process is up, whether or not the model is loaded."""
+    return jsonify({
+        "status": "ok",
+        "uptime_seconds": time.monotonic() - PROCESS_STARTED
+    })
+
+
+@app.route('/readyz', methods=['GET'])
+def readyz():
+    """Readiness probe: 200 only once the model is loaded and warmed up, and some pool worker is up."""
+    status_code = 200 if model_ready.is_set() else 503
+    state = {**startup_state, "backend": INFERENCE_BACKEND, "serving_mode": SERVING_MODE}
+    if worker_pool is not None:
+        state["pool"] = worker_pool.stats()
+        if state["pool"]["ready_workers"] == 0:
+            status_code = 503
+    return jsonify(state), status_code
+
+
+@app.route('/cache/stats', methods=['GET'])
+def cache_stats():
+    """Return embedding cache size and hit/miss counters."""
+    return jsonify(embedding_cache.stats())
+
+
 if __name__ == "__main__":
-    app.run(host='0.0.0.0', port=5001, debug=True)
\ No newline at end of file
+    app.run(host='0.0.0.0', port=5001, debug=True)
@@ -0,0 +1,75 @@
+"""
+Micro-batcher - Párhuzamos embedding kérések összevonása
+Concurrent single-text requests are queued and merged into one encode call,
+bounded by a maximum batch size and a maximum wait time.
+"""
+
+from concurrent.futures import Future
+import logging
+import queue
+import threading
+import time
+from typing import Callable, List, Sequence
+
+logger = logging.getLogger(__name__)
+
+
+class MicroBatcher:
+    """Collects texts from concurrent callers and encodes them together."""
+    
+    def __init__(self, encode_fn: Callable[[List[str]], Sequence], max_batch_size: int = 32,
+                 max_wait_ms: float = 5.0, num_workers: int = 1):
+        if max_batch_size < 1:
+            raise ValueError("max_batch_size must be at least 1")
+        if num_workers < 1:
+            raise ValueError("num_workers must be at least 1")
+        
+        self.encode_fn = encode_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self._queue = queue.Queue()
+        self._workers = []
+        
+        for i in range(num_workers):
+            worker = threading.Thread(target=self._run, name=f"micro-batcher-{i}", daemon=True)
+            worker.start()
+            self._workers.append(worker)
+    
+    def submit(self, text: str, timeout: float = None):
+        """Queue a single text and block until its embedding is ready."""
+        future = Future()
+        self._queue.put((text, future))
+        return future.result(timeout=timeout)
+    
+    def _collect_batch(self) -> list:
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.max_wait
+        
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                if remaining <= 0:
+                    # Still take whatever is already waiting, just don't wait for more
+                    batch.append(self._queue.get_nowait())
+                else:
+                    batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        
+        return batch
+    
+    def _run(self):
+        while True:
+            batch = self._collect_batch()
+            texts = [text for text, _ in batch]
+            
+            try:
+                embeddings = self.encode_fn(texts)
+            except Exception as e:
+                logger.error(f"Batch encode failed for {len(texts)} texts: {e}")
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+            
+            for (_, future), embedding in zip(batch, embeddings):
+                future.set_result(embedding)
@@ -0,0 +1,132 @@
+"""
+Backend benchmark - Inferencia backendek összehasonlítása
+Each backend runs in its own process so resident memory is measured in
+isolation. Reports single-text latency, batch throughput, RSS and the
+cosine similarity of each backend's embeddings against fp32 torch.
+
+Usage: python benchmark_backends.py --backends torch torch-int8 onnx --threads 4
+"""
+
+import argparse
+import multiprocessing
+import resource
+import time
+
+import numpy as np
+
+CORPUS = [
+    "iphone",
+    "bicikli",
+    "rolex",
+    "gaming laptop",
+    "antik fa szekrény",
+    "vintage volkswagen beetle 1970",
+    "samsung galaxy s21 ultra 256gb fekete",
+    "elektromos gitár fender stratocaster made in mexico",
+    "női bőr kabát barna M méret, alig használt",
+    "régi magyar pengő érmék gyűjteménye díszdobozban",
+    "Canon EOS 5D Mark IV digital SLR camera body with two batteries and charger",
+    "Eladó egy jó állapotú, 2015-ös gyártású mountain bike, 21 sebességes váltóval, "
+    "hidraulikus tárcsafékekkel és új gumikkal.",
+    "Beautiful mid-century modern teak sideboard with four drawers and two sliding doors. "
+    "Some light surface scratches on the top, otherwise in excellent original condition.",
+    "Limited edition LEGO Star Wars Millennium Falcon set 75192, complete with all minifigures, "
+    "instruction booklets and the original box. Built once and displayed in a smoke-free home.",
+    "Antik ezüst zsebóra a 19. század végéről, működőképes szerkezettel, gravírozott fedéllel "
+    "és eredeti lánccal. Gyűjtőknek kiváló darab, kisebb kopásokkal a tokon.",
+    "Professional espresso machine with dual boiler, PID temperature control and a commercial "
+    "grade grinder. Recently descaled and serviced, comes with portafilters and tamper.",
+]
+
+
+def current_rss_mb() -> float:
+    try:
+        with open("/proc/self/status") as status:
+            for line in status:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    # Peak RSS in KB on Linux; good enough where /proc is unavailable
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def run_backend(backend, threads, repeats, results):
+    from inference import configure_threads, load_model
+    
+    configure_threads(threads)
+    model = load_model(backend, intra_op_threads=threads)
+    rss_mb = current_rss_mb()
+    
+    model.encode(CORPUS)
+    
+    latencies = []
+    for _ in range(repeats):
+        for text in CORPUS:
+            start = time.perf_counter()
+            model.encode([text])
+            latencies.append(time.perf_counter() - start)
+    
+    started = time.perf_counter()
+    for _ in range(repeats):
+        embeddings = model.encode(CORPUS, batch_size=32, convert_to_numpy=True)
+    elapsed = time.perf_counter() - started
+    
+    latencies.sort()
+    results.put({
+        "backend": backend,
+        "p50_ms": latencies[len(latencies) // 2] * 1000,
+        "p99_ms": latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] * 1000,
+        "texts_per_s": len(CORPUS) * repeats / elapsed,
+        "rss_mb": rss_mb,
+        "embeddings": np.asarray(embeddings, dtype=np.float32),
+    })
+
+
+def cosine_drift(reference, embeddings):
+    reference = reference / np.linalg.norm(reference, axis=1, keepdims=True)
+    embeddings = embeddings / np.linalg.norm(embeddings, axis=1, keepdims=True)
+    similarities = np.sum(reference * embeddings, axis=1)
+    return float(similarities.mean()), float(similarities.min())
+
+
+def main():
+    from inference import BACKENDS
+    
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--backends", nargs="+", default=list(BACKENDS), choices=BACKENDS)
+    parser.add_argument("--threads", type=int, default=0, help="intra-op threads, 0 keeps the default")
+    parser.add_argument("--repeats", type=int, default=20)
+    parser.add_argument("--timeout", type=float, default=600, help="seconds to wait for each backend")
+    args = parser.parse_args()
+    
+    # The fp32 run is the reference for drift, so it always goes first
+    backends = ["torch"] + [backend for backend in args.backends if backend != "torch"]
+    
+    context = multiprocessing.get_context("spawn")
+    results = {}
+    for backend in backends:
+        queue = context.Queue()
+        process = context.Process(target=run_backend, args=(backend, args.threads, args.repeats, queue))
+        process.start()
+        try:
+            results[backend] = queue.get(timeout=args.timeout)
+        except Exception:
+            print(f"{backend}: no result (exit code {process.exitcode}), skipped")
+            process.terminate()
+        process.join()
+    
+    if "torch" not in results:
+        print("The fp32 torch reference run failed, cannot compute drift")
+        return
+    
+    reference = results["torch"]["embeddings"]
+    print(f"{'backend':<12} {'p50 ms':>8} {'p99 ms':>8} {'texts/s':>9} {'RSS MB':>8} {'cos mean':>9} {'cos min':>9}")
+    for backend, stats in results.items():
+        mean_cos, min_cos = cosine_drift(reference, stats["embeddings"])
+        print(f"{backend:<12} {stats['p50_ms']:>8.2f} {stats['p99_ms']:>8.2f} {stats['texts_per_s']:>9.1f} "
+              f"{stats['rss_mb']:>8.1f} {mean_cos:>9.5f} {min_cos:>9.5f}")
+
+
+if __name__ == "__main__":
+    main()
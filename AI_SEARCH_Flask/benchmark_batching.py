@@ -0,0 +1,80 @@
+"""
+Batching benchmark - Egyenkénti és micro-batch kódolás összehasonlítása
+Drives concurrent single-text requests through the per-request encode path
+and through the MicroBatcher, then reports req/s and p50/p99 latency.
+
+Usage: python benchmark_batching.py --requests 2000 --concurrency 1 8 32
+"""
+
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+import random
+import time
+
+from app import MAX_BATCH_SIZE, MAX_WAIT_MS, encode_texts, model_ready, startup_state
+from batcher import MicroBatcher
+
+QUERIES = [
+    "iphone", "bicikli", "rolex", "vintage volkswagen beetle", "gaming laptop rtx",
+    "antik fa szekrény", "samsung galaxy s21 ultra 256gb", "régi érmék gyűjtemény",
+    "elektromos gitár fender stratocaster", "női bőr kabát barna",
+]
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100.0 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def run(call, total_requests, concurrency):
+    texts = [random.choice(QUERIES) for _ in range(total_requests)]
+    
+    def timed(text):
+        start = time.perf_counter()
+        call(text)
+        return time.perf_counter() - start
+    
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        latencies = list(executor.map(timed, texts))
+    elapsed = time.perf_counter() - started
+    
+    return {
+        "req_per_s": total_requests / elapsed,
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--max-batch-size", type=int, default=MAX_BATCH_SIZE)
+    parser.add_argument("--max-wait-ms", type=float, default=MAX_WAIT_MS)
+    args = parser.parse_args()
+    
+    if not model_ready.wait(timeout=600):
+        raise SystemExit(f"Model did not become ready: {startup_state}")
+    
+    batcher = MicroBatcher(encode_texts, max_batch_size=args.max_batch_size, max_wait_ms=args.max_wait_ms)
+    paths = {
+        "per-request": lambda text: encode_texts([text])[0],
+        "micro-batch": batcher.submit,
+    }
+    
+    # Warm up both paths so the first measurement doesn't pay for allocator setup
+    for call in paths.values():
+        run(call, 50, 4)
+    
+    print(f"{'path':<12} {'concurrency':>11} {'req/s':>10} {'p50 ms':>10} {'p99 ms':>10}")
+    for concurrency in args.concurrency:
+        for name, call in paths.items():
+            stats = run(call, args.requests, concurrency)
+            print(f"{name:<12} {concurrency:>11} {stats['req_per_s']:>10.1f} "
+                  f"{stats['p50_ms']:>10.2f} {stats['p99_ms']:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
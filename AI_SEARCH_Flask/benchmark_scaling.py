@@ -0,0 +1,76 @@
+"""
+Scaling benchmark - Worker pool skálázódás 1..N magon
+Starts an EmbeddingWorkerPool with 1..N workers forked from one loaded model and
+drives it with concurrent batches. Reports throughput, speedup over one worker,
+and summed RSS and PSS of the pool, its forkserver included. PSS divides shared
+pages between processes, so it shows how much of the model really stays shared.
+
+Usage: python benchmark_scaling.py --max-workers 8 --batches 400
+"""
+
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+import os
+import time
+
+from benchmark_backends import CORPUS
+from worker_pool import EmbeddingWorkerPool
+
+
+def memory_mb(pid: int, field: str) -> float:
+    path = f"/proc/{pid}/smaps_rollup" if field == "Pss:" else f"/proc/{pid}/status"
+    try:
+        with open(path) as memory:
+            for line in memory:
+                if line.startswith(field):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return 0.0
+
+
+def parent_pid(pid: int) -> int:
+    with open(f"/proc/{pid}/stat") as stat:
+        return int(stat.read().rsplit(")", 1)[1].split()[1])
+
+
+def pool_memory(pool: EmbeddingWorkerPool):
+    workers = [worker["pid"] for worker in pool.stats()["workers"]]
+    # The workers are forked from the forkserver that holds the model
+    pids = [os.getpid(), parent_pid(workers[0])] + workers
+    return sum(memory_mb(pid, "VmRSS:") for pid in pids), sum(memory_mb(pid, "Pss:") for pid in pids)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--max-workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--batches", type=int, default=200, help="batches per run")
+    parser.add_argument("--batch-size", type=int, default=8)
+    parser.add_argument("--threads-per-worker", type=int, default=1)
+    args = parser.parse_args()
+    
+    # Loaded once by the forkserver and never used for inference there, so every pool forks a cold, shareable copy
+    load_args = {"backend": "torch"}
+    batch = (CORPUS * (args.batch_size // len(CORPUS) + 1))[:args.batch_size]
+    
+    print(f"{'workers':>7} {'texts/s':>10} {'speedup':>8} {'RSS MB':>9} {'PSS MB':>9}")
+    baseline = None
+    for num_workers in range(1, args.max_workers + 1):
+        pool = EmbeddingWorkerPool(load_args, num_workers, threads_per_worker=args.threads_per_worker,
+                                   batch_size=args.batch_size)
+        try:
+            started = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=num_workers * 2) as executor:
+                list(executor.map(lambda _: pool.encode(batch), range(args.batches)))
+            elapsed = time.perf_counter() - started
+            
+            throughput = args.batches * args.batch_size / elapsed
+            baseline = baseline or throughput
+            rss, pss = pool_memory(pool)
+            print(f"{num_workers:>7} {throughput:>10.1f} {throughput / baseline:>7.2f}x {rss:>9.1f} {pss:>9.1f}")
+        finally:
+            pool.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""
+Serialization benchmark - JSON és bináris embedding formátumok összehasonlítása
+Measures payload size and encode+decode time for one 384-dim embedding in
+the JSON, raw float32 and .npy wire formats. Does not load the model.
+
+Usage: python benchmark_serialization.py --iterations 20000
+"""
+
+import argparse
+import io
+import json
+import time
+
+import numpy as np
+
+VECTOR_SIZE = 384
+
+
+def json_roundtrip(vector):
+    body = json.dumps({"embedding": vector.tolist()}).encode("utf-8")
+    decoded = np.asarray(json.loads(body)["embedding"], dtype=np.float32)
+    return body, decoded
+
+
+def raw_roundtrip(vector):
+    body = vector.astype('<f4', copy=False).tobytes()
+    decoded = np.frombuffer(body, dtype='<f4')
+    return body, decoded
+
+
+def npy_roundtrip(vector):
+    buffer = io.BytesIO()
+    np.save(buffer, vector.astype('<f4', copy=False), allow_pickle=False)
+    body = buffer.getvalue()
+    decoded = np.load(io.BytesIO(body), allow_pickle=False)
+    return body, decoded
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=10000)
+    args = parser.parse_args()
+    
+    vector = np.random.default_rng(42).standard_normal(VECTOR_SIZE).astype(np.float32)
+    vector /= np.linalg.norm(vector)
+    
+    formats = {
+        "json": json_roundtrip,
+        "octet-stream": raw_roundtrip,
+        "npy": npy_roundtrip,
+    }
+    
+    print(f"{'format':<14} {'bytes':>8} {'us/roundtrip':>14} {'max abs err':>12}")
+    for name, roundtrip in formats.items():
+        body, decoded = roundtrip(vector)
+        error = float(np.max(np.abs(decoded - vector)))
+        
+        started = time.perf_counter()
+        for _ in range(args.iterations):
+            roundtrip(vector)
+        elapsed = time.perf_counter() - started
+        
+        print(f"{name:<14} {len(body):>8} {elapsed / args.iterations * 1e6:>14.2f} {error:>12.2e}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""
+Embedding Cache - Memóriában tárolt LRU gyorsítótár az embeddingekhez
+Vectors are stored as raw float32 bytes keyed by a hash of the normalized text,
+bounded by both an entry count and a memory cap.
+"""
+
+from collections import OrderedDict
+import hashlib
+import threading
+import unicodedata
+
+import numpy as np
+
+
+def normalize_text(text: str) -> str:
+    # all-MiniLM-L6-v2 uses an uncased tokenizer that also splits on whitespace,
+    # so case and whitespace differences produce the same embedding.
+    text = unicodedata.normalize("NFC", text)
+    return " ".join(text.split()).lower()
+
+
+def cache_key(text: str) -> bytes:
+    return hashlib.sha1(normalize_text(text).encode("utf-8")).digest()
+
+
+class EmbeddingCache:
+    """Thread-safe LRU cache of float32 embedding vectors."""
+    
+    def __init__(self, max_entries: int = 10000, max_bytes: int = 64 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+    
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0 and self.max_bytes > 0
+    
+    def get(self, text: str):
+        """Return the cached vector for the text, or None on a miss."""
+        if not self.enabled:
+            return None
+        
+        key = cache_key(text)
+        with self._lock:
+            data = self._entries.get(key)
+            if data is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+        
+        return np.frombuffer(data, dtype=np.float32)
+    
+    def put(self, text: str, vector):
+        if not self.enabled:
+            return
+        
+        key = cache_key(text)
+        data = np.asarray(vector, dtype=np.float32).tobytes()
+        entry_size = len(key) + len(data)
+        if entry_size > self.max_bytes:
+            return
+        
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= len(key) + len(old)
+            
+            self._entries[key] = data
+            self._bytes += entry_size
+            
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                old_key, old_data = self._entries.popitem(last=False)
+                self._bytes -= len(old_key) + len(old_data)
+                self.evictions += 1
+    
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+    
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "enabled": self.enabled,
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_ratio": self.hits / lookups if lookups else 0.0
+            }
@@ -0,0 +1,87 @@
+"""
+Inference backends - CPU inferencia beállítások a MiniLM modellhez
+Supported backends:
+  torch       - plain fp32 PyTorch (default)
+  torch-int8  - PyTorch with dynamic int8 quantization of the Linear layers
+  onnx        - ONNX Runtime (needs sentence-transformers>=3.2 and optimum[onnxruntime])
+"""
+
+import logging
+import time
+
+from sentence_transformers import SentenceTransformer
+import torch
+
+logger = logging.getLogger(__name__)
+
+MODEL_NAME = 'all-MiniLM-L6-v2'
+BACKENDS = ("torch", "torch-int8", "onnx")
+
+# Roughly 1, 8, 32, 128 and 256 tokens - the range of queries and enriched product texts
+WARMUP_LENGTHS = (1, 8, 32, 128, 256)
+
+
+def configure_threads(intra_op_threads: int = 0, inter_op_threads: int = 0):
+    """Set torch thread pools; 0 keeps torch's default."""
+    if intra_op_threads > 0:
+        torch.set_num_threads(intra_op_threads)
+    if inter_op_threads > 0:
+        try:
+            torch.set_num_interop_threads(inter_op_threads)
+        except RuntimeError as e:
+            # Can only be set once, before any inter-op parallel work has started
+            logger.warning(f"Could not set inter-op threads: {e}")
+    
+    logger.info(f"Torch threads: intra-op={torch.get_num_threads()}, inter-op={torch.get_num_interop_threads()}")
+
+
+def load_model(backend: str = "torch", model_name: str = MODEL_NAME, intra_op_threads: int = 0,
+               local_files_only: bool = False) -> SentenceTransformer:
+    """Load the sentence-transformers model with the selected inference backend.
+    
+    model_name may also be a path to a pre-downloaded snapshot; with
+    local_files_only the Hugging Face hub is never contacted.
+    """
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown backend '{backend}', expected one of: {', '.join(BACKENDS)}")
+    
+    if backend == "torch":
+        return SentenceTransformer(model_name, device="cpu", local_files_only=local_files_only)
+    
+    if backend == "torch-int8":
+        model = SentenceTransformer(model_name, device="cpu", local_files_only=local_files_only)
+        model.eval()
+        return torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8, inplace=True)
+    
+    try:
+        import onnxruntime
+    except ImportError as e:
+        raise RuntimeError("The onnx backend requires the 'optimum[onnxruntime]' package") from e
+    
+    session_options = onnxruntime.SessionOptions()
+    if intra_op_threads > 0:
+        session_options.intra_op_num_threads = intra_op_threads
+    
+    return SentenceTransformer(
+        model_name,
+        device="cpu",
+        backend="onnx",
+        local_files_only=local_files_only,
+        model_kwargs={"provider": "CPUExecutionProvider", "session_options": session_options}
+    )
+
+
+def warmup(model: SentenceTransformer, batch_size: int = 32) -> float:
+    """Run throwaway encodes over typical sequence lengths and batch sizes.
+    
+    Returns the time spent in seconds.
+    """
+    started = time.perf_counter()
+    for length in WARMUP_LENGTHS:
+        text = " ".join(["auction"] * length)
+        model.encode([text])
+        model.encode([text] * batch_size, batch_size=batch_size)
+    elapsed = time.perf_counter() - started
+    
+    logger.info(f"Model warmup finished in {elapsed:.2f}s")
+    return elapsed
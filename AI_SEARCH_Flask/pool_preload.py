@@ -0,0 +1,9 @@
+"""
+Pool preload - A worker pool forkserverében tölti be a modellt
+Imported only by the forkserver of EmbeddingWorkerPool, so the weights are loaded
+once there and every worker forked from it shares them.
+"""
+
+import worker_pool
+
+worker_pool.load_shared_model()
@@ -0,0 +1,285 @@
+"""
+Worker pool - Több magos embedding kiszolgálás közös modell súlyokkal
+The model is loaded once in a multiprocessing forkserver (see pool_preload) and
+every inference worker is forked from there, sharing the weights copy-on-write.
+The forkserver is a fresh single-threaded process, so forking never copies locks
+held by the serving threads, and a worker that dies is respawned the same way.
+Each request goes to the least-loaded live worker.
+"""
+
+import gc
+import json
+import logging
+import multiprocessing
+import os
+import sys
+import threading
+import time
+from typing import List, Optional
+
+import numpy as np
+import torch
+
+from inference import load_model, warmup
+
+logger = logging.getLogger(__name__)
+
+# load_model() keyword arguments for the forkserver, passed through its environment
+LOAD_ARGS_ENV = "EMBED_POOL_LOAD_ARGS"
+RESPAWN_BACKOFF_SECONDS = 1.0
+RESPAWN_BACKOFF_MAX_SECONDS = 60.0
+
+STARTING = "starting"
+READY = "ready"
+DEAD = "dead"
+
+# Set in the forkserver by load_shared_model(), inherited by every forked worker
+_shared_model = None
+_load_error = None
+_load_seconds = None
+
+
+def load_shared_model():
+    """Load the model in the forkserver before any worker is forked from it."""
+    global _shared_model, _load_error, _load_seconds
+    try:
+        started = time.monotonic()
+        model = load_model(**json.loads(os.environ[LOAD_ARGS_ENV]))
+        # Weights must stay untouched after fork to remain shared: no grads, and
+        # move everything already allocated out of the GC's reach so collections
+        # in the workers don't write to the forkserver's pages.
+        model.eval()
+        for parameter in model.parameters():
+            parameter.requires_grad_(False)
+        gc.freeze()
+        _shared_model = model
+        _load_seconds = time.monotonic() - started
+    except Exception as e:
+        _load_error = f"{type(e).__name__}: {e}"
+
+
+def _worker_main(conn, threads_per_worker: int, batch_size: int, warmup_enabled: bool):
+    if _shared_model is None:
+        # The forkserver swallows ImportError of its preload modules
+        conn.send(("error", _load_error or f"the forkserver did not import pool_preload (sys.path: {sys.path})"))
+        return
+    torch.set_num_threads(threads_per_worker)
+    
+    try:
+        if warmup_enabled:
+            warmup(_shared_model, batch_size)
+        conn.send(("ready", {"pid": os.getpid(), "load_seconds": _load_seconds}))
+    except Exception as e:
+        conn.send(("error", str(e)))
+        return
+    
+    while True:
+        try:
+            texts = conn.recv()
+        except EOFError:
+            return
+        
+        try:
+            embeddings = _shared_model.encode(texts, batch_size=batch_size, convert_to_numpy=True)
+            conn.send(("ok", np.asarray(embeddings, dtype=np.float32)))
+        except Exception as e:
+            conn.send(("error", str(e)))
+
+
+class _Worker:
+    def __init__(self, slot: int):
+        self.slot = slot
+        self.process = None
+        self.conn = None
+        self.lock = threading.Lock()
+        self.state = STARTING
+        self.in_flight = 0
+        self.completed = 0
+        self.restarts = 0
+        self.failures = 0
+        self.last_error = None
+
+
+class EmbeddingWorkerPool:
+    """Inference workers forked from a forkserver holding one copy of the model weights.
+    
+    One pool per process: the forkserver keeps the load arguments it was started with.
+    """
+    
+    def __init__(self, load_args: dict, num_workers: int, threads_per_worker: int = 1, batch_size: int = 32,
+                 warmup_enabled: bool = True):
+        if num_workers < 1:
+            raise ValueError("num_workers must be at least 1")
+        
+        os.environ[LOAD_ARGS_ENV] = json.dumps(load_args)
+        # The forkserver imports pool_preload from its own sys.path, whatever the working directory
+        module_dir = os.path.dirname(os.path.abspath(__file__))
+        python_path = os.environ.get("PYTHONPATH", "").split(os.pathsep)
+        if module_dir not in python_path:
+            os.environ["PYTHONPATH"] = os.pathsep.join(path for path in [module_dir] + python_path if path)
+        self._context = multiprocessing.get_context("forkserver")
+        self._context.set_forkserver_preload(["pool_preload"])
+        self._worker_args = (threads_per_worker, batch_size, warmup_enabled)
+        self._workers = [_Worker(slot) for slot in range(num_workers)]
+        self._dispatch_lock = threading.Lock()
+        self._closed = False
+        self.load_seconds = None
+        
+        for worker in self._workers:
+            self._start_process(worker)
+        for worker in self._workers:
+            try:
+                self._wait_ready(worker)
+            except RuntimeError:
+                self.close()
+                raise
+        
+        logger.info(f"Embedding worker pool started: {num_workers} workers x {threads_per_worker} threads")
+    
+    @property
+    def size(self) -> int:
+        return len(self._workers)
+    
+    def _start_process(self, worker: _Worker):
+        parent_conn, child_conn = self._context.Pipe()
+        process = self._context.Process(
+            target=_worker_main,
+            args=(child_conn, *self._worker_args),
+            name=f"embedding-worker-{worker.slot}",
+            daemon=True
+        )
+        process.start()
+        child_conn.close()
+        worker.process = process
+        worker.conn = parent_conn
+    
+    def _wait_ready(self, worker: _Worker):
+        try:
+            status, detail = worker.conn.recv()
+        except (EOFError, OSError):
+            status, detail = "error", f"exited with code {worker.process.exitcode} during startup"
+        if status != "ready":
+            raise RuntimeError(f"Embedding worker failed to start: {detail}")
+        
+        if self.load_seconds is None:
+            self.load_seconds = detail["load_seconds"]
+        with self._dispatch_lock:
+            worker.state = READY
+            worker.failures = 0
+    
+    def _acquire(self) -> _Worker:
+        with self._dispatch_lock:
+            live = []
+            for worker in self._workers:
+                if worker.state != READY:
+                    continue
+                # An idle worker that died is caught here; a busy one by its broken pipe
+                if worker.in_flight == 0 and not worker.process.is_alive():
+                    self._mark_dead(worker, f"exited with code {worker.process.exitcode}")
+                    continue
+                live.append(worker)
+            if not live:
+                raise RuntimeError("No embedding worker is available")
+            
+            worker = min(live, key=lambda w: w.in_flight)
+            worker.in_flight += 1
+            return worker
+    
+    def _release(self, worker: _Worker):
+        with self._dispatch_lock:
+            worker.in_flight -= 1
+            worker.completed += 1
+    
+    def _mark_dead(self, worker: _Worker, reason: str):
+        """Take a worker out of rotation and respawn it in the background; caller holds _dispatch_lock."""
+        if worker.state != READY:
+            return
+        logger.error(f"Embedding worker {worker.process.pid} died: {reason}")
+        worker.state = DEAD
+        worker.last_error = reason
+        if not self._closed:
+            threading.Thread(target=self._respawn, args=(worker,), name=f"worker-respawn-{worker.slot}",
+                             daemon=True).start()
+    
+    def _respawn(self, worker: _Worker):
+        while not self._closed:
+            with worker.lock:
+                worker.conn.close()
+                worker.process.join(timeout=5)
+                if worker.process.is_alive():
+                    worker.process.kill()
+                    worker.process.join()
+                
+                # Back off so a worker that dies on startup does not fork in a tight loop
+                time.sleep(min(RESPAWN_BACKOFF_SECONDS * 2 ** worker.failures, RESPAWN_BACKOFF_MAX_SECONDS))
+                if self._closed:
+                    return
+                with self._dispatch_lock:
+                    worker.state = STARTING
+                    worker.restarts += 1
+                try:
+                    self._start_process(worker)
+                    self._wait_ready(worker)
+                    logger.info(f"Embedding worker respawned in slot {worker.slot} (pid {worker.process.pid})")
+                    return
+                except Exception as e:
+                    logger.error(f"Embedding worker respawn in slot {worker.slot} failed: {e}")
+                    with self._dispatch_lock:
+                        worker.state = DEAD
+                        worker.failures += 1
+                        worker.last_error = str(e)
+    
+    def encode(self, texts: List[str]) -> np.ndarray:
+        """Encode texts on the least-loaded live worker."""
+        worker = self._acquire()
+        pid = worker.process.pid
+        lost: Optional[str] = None
+        try:
+            with worker.lock:
+                try:
+                    worker.conn.send(list(texts))
+                    status, payload = worker.conn.recv()
+                except (EOFError, OSError) as e:
+                    lost = f"{type(e).__name__} on its pipe"
+        finally:
+            self._release(worker)
+        
+        if lost is not None:
+            with self._dispatch_lock:
+                self._mark_dead(worker, lost)
+            raise RuntimeError(f"Embedding worker {pid} died while encoding")
+        if status != "ok":
+            raise RuntimeError(f"Embedding worker error: {payload}")
+        return payload
+    
+    def stats(self) -> dict:
+        with self._dispatch_lock:
+            return {
+                "ready_workers": sum(1 for worker in self._workers if worker.state == READY),
+                "restarts": sum(worker.restarts for worker in self._workers),
+                "workers": [
+                    {
+                        "slot": worker.slot,
+                        "pid": worker.process.pid,
+                        "state": worker.state,
+                        "alive": worker.process.is_alive(),
+                        "in_flight": worker.in_flight,
+                        "completed": worker.completed,
+                        "restarts": worker.restarts,
+                        "last_error": worker.last_error
+                    }
+                    for worker in self._workers
+                ]
+            }
+    
+    def close(self):
+        self._closed = True
+        for worker in self._workers:
+            if worker.conn is not None:
+                worker.conn.close()
+        for worker in self._workers:
+            if worker.process is None:
+                continue
+            worker.process.join(timeout=5)
+            if worker.process.is_alive():
+                worker.process.terminate()